@@ -23,10 +23,16 @@
 # this code uses the calsses defined elements.py
 # it calculates the transferfunction of a RLC circuit
 # prints the values and generates a plot using matplotlib
+#
+# usage:
+#   python RLC_with_elements.py                   print the values and show the plot
+#   python RLC_with_elements.py --noplot          only print the values
+#   python RLC_with_elements.py --report DIR      write the plot and table to DIR without showing anything
+# matplotlib is only imported when a plot is made
 
+import sys
 import math
 import cmath
-import matplotlib.pyplot as plt
 from elements import *
 
 
@@ -78,7 +84,21 @@ print("f  magnitude  phase")
 for freq, mag, phase in zip(f, Hmagnitude, Hphasedeg):
     print( f"{freq}Hz  {mag:.2f}  {phase:.1f}°" )
     
+# write the plot and table to files using report.py, for batch runs
+if "--report" in sys.argv:
+    import os
+    from report import bodeplot, bodetable
+    directory = sys.argv[ sys.argv.index("--report") + 1 ]
+    os.makedirs( directory, exist_ok = True )
+    with open( os.path.join( directory, "RLC.csv" ), "w" ) as file:
+        bodetable( file, f, H )
+    bodeplot( os.path.join( directory, "RLC.png" ), f, H, "RLC circuit" )
+    sys.exit()
+if "--noplot" in sys.argv:
+    sys.exit()
+
 # plot the values using matplotlib
+import matplotlib.pyplot as plt
 plt.subplot(2, 1, 1)
 plt.xscale("log")
 plt.yscale("log")
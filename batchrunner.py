@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+#
+#  batchrunner.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# command line batch runner for circuit description files
+#
+# usage:
+#   python -m elements filter1.net filter2.net ... --output DIR --workers 8
+#   python batchrunner.py variants/*.net --output results --format npz
+#
+# every file describes one circuit, solved over its frequencies with
+# Circuit.acsweep() of circuit.py, the voltages of the output nodes are
+# written as columns to DIR/<name of the file>.csv or .npz, files in different
+# directories keep their path below the directory the files have in common,
+# so a/f.net and b/f.net give DIR/a/f.csv and DIR/b/f.csv
+# the files are spread over a pool of worker processes, a line with
+# timings is printed per file and a summary of the throughput at the end
+#
+# circuit description, one item per line, # starts a comment:
+#
+#   Vin  in  0    1          voltage source, value in V
+#   R1   in  a    10k        element between two nodes, the kind follows from
+#   C3   a   out  1n         the first letter: R, C, L, V, I or Z for an impedance
+#   E1   out 0    b  0  1    voltage controlled voltage source with its gain
+#   frequency log 500 200k 30       log or lin with start, stop and number of points,
+#                                   or list followed by the frequencies
+#   output out                      nodes written to the result, several are allowed
+#
+# values are written like metricprefixtofloat() accepts them, "0" is the ground node
+#
+# this module defines:
+#
+# function readcircuit(lines)
+# function frequencyspec(words)
+# function outputnames(paths)
+# function runjob(path, directory, format = "csv", name = None)
+# function reportresults(results, quiet = False)
+# function main(arguments)
+
+import os
+import sys
+import time
+import argparse
+import concurrent.futures
+import numpy as np
+from elements import * # module containing classes for Resistance, Capacitance, ..
+from circuit import *
+
+
+# element class for the first letter of a component name
+elementclasses = { "R": Resistance, "C": Capacitance, "L": Inductance, "V": Voltage, "I": Current, "Z": Impedance }
+
+
+# value of a word with metric prefix, ValueError when it is not valid
+def parsevalue(word):
+    value = Electricalelement.metricprefixtofloat( word )
+    if value != value: # nan
+        raise ValueError(f"'{word}' is not a valid value")
+    return( value )
+
+
+# frequencies of a frequency line without the word frequency, for instance
+# [ "log", "500", "200k", "30" ], [ "lin", "0", "1k", "101" ] or [ "list", "1k", "2k" ]
+def frequencyspec(words):
+    if not words:
+        raise ValueError("frequency needs log, lin or list")
+    scale, values = words[0].lower(), [ parsevalue( word ) for word in words[1:] ]
+    if scale == "list":
+        return( np.array( values ) )
+    if scale not in ("log", "lin") or len( values ) != 3:
+        raise ValueError("frequency needs log or lin with start, stop and number of points")
+    start, stop, num = values
+    if scale == "log":
+        return( np.geomspace( start, stop, num = int( num ) ) )
+    return( np.linspace( start, stop, num = int( num ) ) )
+
+
+# Circuit, frequencies and output nodes of the lines of a circuit description
+# errors are raised as ValueError with the line number
+def readcircuit(lines):
+    circuit = Circuit()
+    frequency, outputs = None, []
+    for number, line in enumerate( lines, 1 ):
+        words = line.split( "#", 1 )[0].split()
+        if not words:
+            continue
+        try:
+            keyword = words[0].lower()
+            if keyword == "frequency":
+                frequency = frequencyspec( words[1:] )
+            elif keyword == "output":
+                outputs.extend( words[1:] )
+            elif words[0][0].upper() == "E":
+                if len( words ) != 6:
+                    raise ValueError("a VCVS needs two nodes, two control nodes and a gain")
+                circuit.addvcvs( words[0], *words[1:5], parsevalue( words[5] ) )
+            elif words[0][0].upper() in elementclasses:
+                if len( words ) != 4:
+                    raise ValueError("an element needs two nodes and a value")
+                circuit.add( words[0], elementclasses[ words[0][0].upper() ]( parsevalue( words[3] ) ), words[1], words[2] )
+            else:
+                raise ValueError(f"unknown item {words[0]}")
+        except ValueError as error:
+            raise ValueError(f"line {number}: {error}") from None
+    if frequency is None:
+        raise ValueError("no frequency line")
+    if not outputs:
+        raise ValueError("no output line")
+    return( circuit, frequency, outputs )
+
+
+# names of the results of the files in the output directory, their paths below the
+# directory the files have in common without the extension, a/f.net and b/f.net give
+# a/f and b/f, ValueError when two files would still be written to the same result
+def outputnames(paths):
+    paths = [ os.path.abspath( path ) for path in paths ]
+    common = os.path.commonpath( [ os.path.dirname( path ) for path in paths ] )
+    names, sources = [], {}
+    for path in paths:
+        name = os.path.splitext( os.path.relpath( path, common ) )[0]
+        if name in sources:
+            raise ValueError(f"{sources[name]} and {path} would both be written to {name}")
+        sources[name] = path
+        names.append( name )
+    return( names )
+
+
+# read, solve and write one circuit description file, run in a worker process
+# name is the result without extension relative to directory, by default the name of the file
+# returns a dict with the timings in s, the number of frequencies and the file written,
+# or the error
+def runjob(path, directory, format = "csv", name = None):
+    result = { "path": path }
+    try:
+        start = time.perf_counter()
+        with open( path ) as file:
+            circuit, frequency, outputs = readcircuit( file )
+        parsed = time.perf_counter()
+        solution = circuit.acsweep( frequency )
+        voltages = { node: solution.voltage( node ).value for node in outputs }
+        solved = time.perf_counter()
+        if name is None:
+            name = os.path.splitext( os.path.basename( path ) )[0]
+        result["output"] = os.path.join( directory, f"{name}.{format}" )
+        os.makedirs( os.path.dirname( result["output"] ), exist_ok = True )
+        if format == "npz":
+            np.savez( result["output"], frequency = frequency, **{ f"V({node})": v for node, v in voltages.items() } )
+        else:
+            columns, header = [ frequency ], [ "frequency (Hz)" ]
+            for node, v in voltages.items():
+                with np.errstate( divide="ignore" ):
+                    columns += [ np.round( 20 * np.log10( np.abs( v ) ), 4 ), np.round( np.degrees( np.angle( v ) ), 4 ) ]
+                header += [ f"V({node}) (dB)", f"V({node}) (degrees)" ]
+            with open( result["output"], "w" ) as file:
+                writetable( file, columns, header )
+        written = time.perf_counter()
+        result.update( { "points": len( frequency ), "parse": parsed - start, "solve": solved - parsed, \
+            "write": written - solved, "total": written - start } )
+    except Exception as error: # one file which cannot be solved does not stop the batch
+        result["error"] = f"{type(error).__name__}: {error}"
+    return( result )
+
+
+# print the results of runjob() as they come in, errors on stderr
+# returns the number of failed files, the frequencies solved and the time spent in runjob() in s
+def reportresults(results, quiet = False):
+    failed, points, busy = 0, 0, 0.0
+    for result in results:
+        if "error" in result:
+            failed += 1
+            print(f"{result['path']}: {result['error']}", file = sys.stderr)
+            continue
+        points += result["points"]
+        busy += result["total"]
+        if not quiet:
+            print(f"{result['path']}: {result['points']} frequencies, parse {result['parse'] * 1E3:.1f} ms, " \
+                f"solve {result['solve'] * 1E3:.1f} ms, write {result['write'] * 1E3:.1f} ms -> {result['output']}")
+    return( failed, points, busy )
+
+
+# run the command line, arguments without the program name
+# returns the exit status, 1 when a file failed
+def main(arguments):
+    parser = argparse.ArgumentParser( prog = "python -m elements", \
+        description = "solve circuit description files over frequency in a pool of worker processes" )
+    parser.add_argument( "files", nargs = "+", help = "circuit description files" )
+    parser.add_argument( "--output", default = ".", metavar = "DIR", help = "directory for the results" )
+    parser.add_argument( "--format", choices = ("csv", "npz"), default = "csv", help = "format of the results" )
+    parser.add_argument( "--workers", type = int, default = os.cpu_count(), help = "number of worker processes" )
+    parser.add_argument( "--quiet", action = "store_true", help = "only print the summary and errors" )
+    options = parser.parse_args( arguments )
+    try:
+        names = outputnames( options.files )
+    except ValueError as error:
+        parser.error( str( error ) )
+    os.makedirs( options.output, exist_ok = True )
+
+    start = time.perf_counter()
+    jobs = len( options.files )
+    paths = options.files
+    directories = [ options.output ] * jobs
+    formats = [ options.format ] * jobs
+    if options.workers > 1 and jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor( max_workers = options.workers ) as pool:
+            results = pool.map( runjob, paths, directories, formats, names, chunksize = max( 1, jobs // ( options.workers * 8 ) ) )
+            failed, points, busy = reportresults( results, options.quiet )
+    else:
+        failed, points, busy = reportresults( map( runjob, paths, directories, formats, names ), options.quiet )
+    elapsed = time.perf_counter() - start
+    print(f"{jobs - failed} of {jobs} circuits in {elapsed:.2f} s, {( jobs - failed ) / elapsed:.1f} circuits/s, " \
+        f"{points / elapsed:,.0f} frequencies/s, {busy / elapsed:.1f} workers busy on average")
+    return( 1 if failed else 0 )
+
+
+if __name__ == "__main__":
+    sys.exit( main( sys.argv[1:] ) )
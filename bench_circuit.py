@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+#
+#  bench_circuit.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# benchmark of the AC sweep methods of circuit.py
+# prints the cost per frequency point of refactorizing from scratch,
+# refactorizing with the cached ordering and solving stacked dense systems
+
+import time
+import numpy as np
+from elements import *
+from circuit import *
+
+
+# RC ladder with some inductances bridging sections to give a less regular pattern
+def ladder(sections):
+    circuit = Circuit()
+    circuit.add( "I1", Current("1mA"), "0", "n0" )
+    for i in range(sections):
+        circuit.add( f"R{i}", Resistance("100"), f"n{i}", f"n{i+1}" )
+        circuit.add( f"C{i}", Capacitance("10n"), f"n{i+1}", "0" )
+        if i % 10 == 0:
+            circuit.add( f"L{i}", Inductance("1u"), f"n{i+1}", f"n{(i * 7) % sections}" )
+    return( circuit )
+
+
+# return the time per frequency point of a sweep in microseconds
+def perpoint(circuit, f, method):
+    circuit.acsweep( f[:2], method ) # pattern and ordering are built once per topology
+    start = time.perf_counter()
+    circuit.acsweep( f, method )
+    return( ( time.perf_counter() - start ) / len(f) * 1E6 )
+
+
+f = np.geomspace(10, 1E6, num=200)
+print(f"{'sections':>10} {'unknowns':>10} | {'scratch':>12} {'cached':>12} {'dense':>12}   us per point")
+print("-"*76)
+for sections in (5, 20, 50, 200, 1000, 4000):
+    circuit = ladder( sections )
+    size = circuit.buildpattern()["size"]
+    times = [ perpoint( circuit, f, method ) for method in ("scratch", "sparse") ]
+    dense = f"{perpoint( circuit, f, 'dense' ):12.1f}" if size <= 400 else f"{'-':>12}"
+    print(f"{sections:>10} {size:>10} | {times[0]:12.1f} {times[1]:12.1f} {dense}")
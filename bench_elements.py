@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+#
+#  bench_elements.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# benchmark of the hot paths of elements.py
+# prints the memory used per object and the time per operation of
+# construction, arithmetic, parallel and series combinations, getimpedance,
+# metric prefix conversions and the two example sweeps end to end
+#
+# every workload runs over the same operands drawn with a fixed seed, the
+# time per operation is the best of several repeats of a fixed number of calls
+#
+# usage:
+#   python bench_elements.py                               benchmark ./elements.py
+#   python bench_elements.py old/elements.py               compare another version with ./elements.py
+#   python bench_elements.py --json results.json           also write the results as JSON
+#   python bench_elements.py --compare baseline.json       flag regressions against stored results
+#   python bench_elements.py --compare baseline.json --threshold 5
+#
+# --compare exits with status 1 when a workload is slower than in the baseline
+# by more than threshold percent (default 10), or when a workload of the baseline
+# is missing or fails, so it can be used in a script
+# a workload that fails is printed on stderr with its exception and timed as None
+# another version can be taken from git with
+#   git show <commit>:elements.py > /tmp/elements.py
+
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import traceback
+import tracemalloc
+import importlib.util
+
+SEED = 12345
+SIZE = 1000 # operands per workload
+REPEAT = 7
+
+
+# import an elements.py from a path under its own module name
+def loadelements(path, name):
+    spec = importlib.util.spec_from_file_location( name, path )
+    module = importlib.util.module_from_spec( spec )
+    spec.loader.exec_module( module )
+    return( module )
+
+
+# bytes allocated per object when making n of them
+def bytesperobject(make, n = 100000):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [ make(i) for i in range(n) ]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    listsize = sys.getsizeof( objects )
+    return( ( after - before - listsize ) / n )
+
+
+# seconds per operation of workload, which performs count operations per call
+# setup runs before every repeat, the best repeat is kept
+def timeperoperation(workload, count = SIZE, repeat = REPEAT, setup = None):
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        workload()
+        best = min( best, time.perf_counter() - start )
+    return( best / count )
+
+
+# operands of every workload, drawn with a fixed seed
+def operands(e, seed = SEED, size = SIZE):
+    rng = random.Random( seed )
+    prefixes = [ "p", "n", "u", "m", "", "k", "M" ]
+    numbers = [ rng.uniform( 1, 1000 ) for _ in range(size) ]
+    strings = [ f"{rng.randint( 1, 999 )}{rng.choice( prefixes )}" for _ in range(size) ]
+    frequencies = [ rng.uniform( 10, 1E6 ) for _ in range(size) ]
+    impedances = [ e.Impedance( complex( rng.uniform( 1, 1E4 ), rng.uniform( -1E4, 1E4 ) ) ) for _ in range(size + 2) ]
+    resistances = [ e.Resistance( rng.uniform( 1, 1E6 ) ) for _ in range(size) ]
+    capacitances = [ e.Capacitance( rng.uniform( 1E-12, 1E-6 ) ) for _ in range(size + 2) ]
+    inductances = [ e.Inductance( rng.uniform( 1E-9, 1E-3 ) ) for _ in range(size + 2) ]
+    voltages = [ e.Voltage( rng.uniform( -10, 10 ) ) for _ in range(size) ]
+    return( numbers, strings, frequencies, impedances, resistances, capacitances, inductances, voltages )
+
+
+# the transferfunction of RLC_with_elements.py over its frequency list, without printing and plotting
+def rlcexample(e):
+    import cmath
+    import math
+    R1, R2, L1, C1 = e.Resistance("100k"), e.Resistance(1), e.Inductance("500uH"), e.Capacitance("5nF")
+    def transferfunction( f ):
+        Zrl = R2 + L1.getimpedance( f )
+        Zparallel = Zrl.parallelwith( C1.getimpedance( f ) )
+        return( Zparallel / ( R1 + Zparallel ) )
+    f = [ freq for freq in range(90000,110000,150) ]
+    def run():
+        H = list( map( transferfunction, f ) )
+        Hmagnitude, Hphase = list( zip( * map( cmath.polar, H) ))
+        Hphasedeg = list( map( math.degrees, Hphase ) )
+    return( run )
+
+
+# the transferfunction of sallen_key_with_elements_numpy.py over its frequency array
+def sallenkeyexample(e):
+    import numpy as np
+    R1, R2, C3, C4 = e.Resistance("10k"), e.Resistance("10k"), e.Capacitance("1nF"), e.Capacitance("1nF")
+    def Vout_divby_Vin( freq ):
+        Z1 = R1
+        Z2 = R2
+        Z3 = C3.getimpedance( freq )
+        Z4 = C4.getimpedance( freq )
+        return( Z3 * Z4 / ( Z1 * Z2 + Z3 * (Z1 + Z2) + Z3 * Z4 ) )
+    f = np.round( np.geomspace(500, 200000, num=30), 0)
+    def run():
+        H = Vout_divby_Vin( f )
+        Hmagnitude_dB = 20 * np.log10( np.abs( H ) )
+        Hphasedeg = np.rad2deg( np.angle( H ) )
+    return( run )
+
+
+# memory and time per operation for one version of elements.py
+# a workload the version does not support gives None
+def measure(e):
+    numbers, strings, frequencies, impedances, resistances, capacitances, inductances, voltages = operands( e )
+    pairs = list( zip( impedances, impedances[1:] ) )
+    triples = list( zip( impedances, impedances[1:], impedances[2:] ) )
+    capacitancetriples = list( zip( capacitances, capacitances[1:], capacitances[2:] ) )
+    inductancetriples = list( zip( inductances, inductances[1:], inductances[2:] ) )
+    c1 = e.Capacitance("1nF")
+    l1 = e.Inductance("500uH")
+    cache = getattr( e, "impedancecache", None )
+    def clearcache():
+        if cache is not None:
+            cache.clear()
+
+    memory = {
+        "Impedance": bytesperobject( lambda i: e.Impedance( float(i) ) ),
+        "Resistance": bytesperobject( lambda i: e.Resistance( float(i) ) ),
+        "Capacitance": bytesperobject( lambda i: e.Capacitance( float(i) ) ),
+        "Voltage": bytesperobject( lambda i: e.Voltage( float(i) ) ),
+    }
+    workloads = {
+        "Impedance(number)": lambda: [ e.Impedance( x ) for x in numbers ],
+        "Resistance(number)": lambda: [ e.Resistance( x ) for x in numbers ],
+        "Capacitance(number)": lambda: [ e.Capacitance( x ) for x in numbers ],
+        "Resistance(string)": lambda: [ e.Resistance( x ) for x in strings ],
+        "Capacitance(string)": lambda: [ e.Capacitance( x ) for x in strings ],
+        "z1 + z2": lambda: [ a + b for a, b in pairs ],
+        "z1 - z2": lambda: [ a - b for a, b in pairs ],
+        "z1 * z2": lambda: [ a * b for a, b in pairs ],
+        "z1 / z2": lambda: [ a / b for a, b in pairs ],
+        "z1 * 3": lambda: [ a * 3 for a in impedances ],
+        "3 / z1": lambda: [ 3 / a for a in impedances ],
+        "-z1": lambda: [ -a for a in impedances ],
+        "r1 + r2": lambda: [ a + b for a, b in zip( resistances, resistances[1:] ) ],
+        "c1 + c2": lambda: [ a + b for a, b in zip( capacitances, capacitances[1:] ) ],
+        "l1 * 2": lambda: [ a * 2 for a in inductances ],
+        "v1 / z1": lambda: [ v / z for v, z in zip( voltages, impedances ) ],
+        "Impedance.parallel": lambda: [ e.Impedance.parallel( *x ) for x in triples ],
+        "Capacitance.series": lambda: [ e.Capacitance.series( *x ) for x in capacitancetriples ],
+        "Inductance.parallel": lambda: [ e.Inductance.parallel( *x ) for x in inductancetriples ],
+        "c1.getimpedance": ( lambda: [ c1.getimpedance( f ) for f in frequencies ], clearcache ),
+        "l1.getimpedance": ( lambda: [ l1.getimpedance( f ) for f in frequencies ], clearcache ),
+        "c1.getimpedance repeated": lambda: [ c1.getimpedance( 1E3 ) for f in frequencies ],
+        "metricprefixtofloat": lambda: [ e.Electricalelement.metricprefixtofloat( x ) for x in strings ],
+        "floattometricprefix": lambda: [ e.Electricalelement.floattometricprefix( x, "Ohm" ) for x in numbers ],
+    }
+    times = {}
+    for name, workload in workloads.items():
+        workload, setup = workload if isinstance( workload, tuple ) else ( workload, None )
+        times[name] = timeorfailure( e, name, lambda: workload, setup = setup )
+    for name, example in ( ("RLC_with_elements.py", rlcexample), ("sallen_key_with_elements_numpy.py", sallenkeyexample) ):
+        times[name] = timeorfailure( e, name, lambda: example( e ), count = 1, setup = clearcache )
+    return( memory, times )
+
+
+# time per operation of the workload returned by make(), or None when making or running
+# it fails, for instance on an older elements.py without the method, the exception is printed on stderr
+def timeorfailure(e, name, make, count = SIZE, setup = None):
+    try:
+        return( timeperoperation( make(), count = count, setup = setup ) )
+    except Exception as error:
+        print(f"{e.__file__}: workload {name!r} failed", file = sys.stderr)
+        traceback.print_exception( error, limit = -1, file = sys.stderr )
+        return( None )
+
+
+# times in s as a string in ns, us or ms
+def formattime(seconds):
+    if seconds is None:
+        return( "-" )
+    for scale, unit in ( (1E-9, "ns"), (1E-6, "us") ):
+        if seconds < scale * 1E3:
+            return( f"{seconds / scale:.1f} {unit}" )
+    return( f"{seconds * 1E3:.1f} ms" )
+
+
+# results as a dictionary written to JSON, times in seconds per operation
+def resultsdocument(memory, times):
+    return( {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": SEED,
+        "size": SIZE,
+        "repeat": REPEAT,
+        "bytesperobject": memory,
+        "secondsperoperation": times,
+    } )
+
+
+# workloads slower than baseline by more than threshold percent
+# returns rows (name, baseline, current, change in percent, regressed)
+# a workload timed in the baseline which is missing or failed now is regressed with change None
+def compareresults(baseline, times, threshold = 10.0):
+    rows = []
+    old = baseline["secondsperoperation"]
+    for name in list( times ) + [ name for name in old if name not in times ]:
+        current = times.get( name )
+        if old.get( name ) is None or current is None:
+            rows.append( ( name, old.get( name ), current, None, old.get( name ) is not None ) )
+            continue
+        change = ( current / old[name] - 1 ) * 100
+        rows.append( ( name, old[name], current, change, change > threshold ) )
+    return( rows )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser( description = "benchmark of the hot paths of elements.py" )
+    parser.add_argument( "other", nargs = "?", help = "another elements.py to compare with ./elements.py" )
+    parser.add_argument( "--json", metavar = "FILE", help = "write the results of ./elements.py as JSON" )
+    parser.add_argument( "--compare", metavar = "FILE", help = "JSON results to check for regressions" )
+    parser.add_argument( "--threshold", type = float, default = 10.0, help = "regression threshold in percent" )
+    arguments = parser.parse_args()
+
+    versions = [ ("elements.py", loadelements( "elements.py", "elements" )) ]
+    if arguments.other:
+        versions.insert( 0, (arguments.other, loadelements( arguments.other, "baselineelements" )) )
+    results = [ measure( e ) for _, e in versions ]
+    names = [ name for name, _ in versions ]
+
+    print("bytes per object")
+    print("-"*70)
+    print(f"{'':34}" + "".join( f"{name[-18:]:>18}" for name in names ))
+    for key in results[0][0]:
+        print(f"{key:34}" + "".join( f"{result[0][key]:18.1f}" for result in results ))
+    print("\ntime per operation")
+    print("-"*70)
+    print(f"{'':34}" + "".join( f"{name[-18:]:>18}" for name in names ))
+    for key in results[0][1]:
+        print(f"{key:34}" + "".join( f"{formattime( result[1][key] ):>18}" for result in results ))
+
+    memory, times = results[-1]
+    if arguments.json:
+        with open( arguments.json, "w" ) as file:
+            json.dump( resultsdocument( memory, times ), file, indent = 2 )
+        print(f"\nresults written to {arguments.json}")
+    if arguments.compare:
+        with open( arguments.compare ) as file:
+            baseline = json.load( file )
+        rows = compareresults( baseline, times, arguments.threshold )
+        print(f"\ncompared with {arguments.compare}, threshold {arguments.threshold:g} %")
+        print("-"*70)
+        for name, old, current, change, regressed in rows:
+            change = "-" if change is None else f"{change:+.1f} %"
+            flag = ( "  FAILED" if current is None else "  REGRESSION" ) if regressed else ""
+            print(f"{name:34}{formattime( old ):>10}{formattime( current ):>10}{change:>10}" + flag)
+        regressions = [ row[0] for row in rows if row[4] ]
+        failures = [ row[0] for row in rows if row[4] and row[2] is None ]
+        print(f"\n{len(regressions) - len(failures)} regressions, {len(failures)} workloads missing or failed")
+        sys.exit( 1 if regressions else 0 )
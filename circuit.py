@@ -0,0 +1,816 @@
+#!/usr/bin/env python3
+#
+#  circuit.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# netlist of elements connected to named nodes, solved with
+# Modified Nodal Analysis (MNA) over an array of frequencies
+#
+# the MNA matrix is written as A = G + s * B with s = j * 2 * pi * f
+# G and B share one sparse pattern which is built once,
+# for every frequency only the values of the matrix are filled in
+#
+# the column ordering of the sparse LU factorization, which decides the
+# fill-in, only depends on the pattern so it is analysed once per topology
+# and every frequency only does the numeric factorization
+# small circuits are solved as dense systems, stacked over the frequencies
+# in a single call to np.linalg.solve
+#
+# transient analysis integrates G x + B dx/dt = u(t) in the time domain
+# with the same pattern, see Circuit.transientchunks()
+#
+# unknowns are the node voltages followed by the currents through
+# voltage sources, inductances and voltage controlled voltage sources
+#
+# this module defines:
+#
+# class Circuit
+# class Solution
+# class Sensitivity
+# class Noise
+# class Transientsolution
+# function waveformfunction(waveform)
+# function companionstep(x0, x1, h, derivative, method)
+# function companionderivatives(time, x, derivative, method)
+# function lastderivative(time, x, derivative, method)
+
+import math
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+from elements import * # module containing classes for Resistance, Capacitance, ..
+
+
+# ----------------------------------------------------------
+# class for a circuit, a netlist of elements between named nodes
+# ----------------------------------------------------------
+class Circuit:
+
+    # ground is the name of the reference node at 0V
+    def __init__(self, ground = "0"):
+        self.ground = ground
+        self.nodes = {} # node name -> index in the unknowns
+        self.components = [] # (name, element, node1, node2, control)
+        self.names = {} # component name -> index in components
+        self.pattern = None # sparse pattern, built on first use
+        self.densesize = 40 # circuits with up to this many unknowns are solved dense
+        self.densebytes = 2**26 # memory used for the stacked dense systems at once
+
+    # return a machine readable representation of a Circuit
+    def __repr__(self):
+        return( f"Circuit({len(self.components)} components, {len(self.nodes)} nodes)" )
+
+    # add an element between node1 and node2
+    # currents are counted from node1 through the element to node2,
+    # a Voltage source makes V(node1) - V(node2) equal to its value
+    # an impedance of 0 Ohm has no admittance, a Voltage(0) connects two nodes instead
+    def add(self, name, element, node1, node2):
+        if not isinstance( element, (Impedance, Capacitance, Inductance, Voltage, Current) ):
+            raise TypeError(f"Cannot add a {type(element)} to a Circuit")
+        if isinstance( element, Impedance ) and element.value == 0:
+            raise ValueError(f"{name} is an impedance of 0 Ohm, connect {node1} and {node2} with a Voltage(0) instead")
+        return( self.addcomponent( name, element, node1, node2, None ) )
+
+    # add a voltage controlled voltage source, for instance an ideal opamp,
+    # V(node1) - V(node2) = gain * ( V(control1) - V(control2) )
+    def addvcvs(self, name, node1, node2, control1, control2, gain):
+        return( self.addcomponent( name, gain, node1, node2, (control1, control2) ) )
+
+    def addcomponent(self, name, element, node1, node2, control):
+        if name in self.names:
+            raise ValueError(f"Circuit already contains a component named {name}")
+        for node in (node1, node2) + ( control or () ):
+            if node != self.ground and node not in self.nodes:
+                self.nodes[node] = len( self.nodes )
+        self.names[name] = len( self.components )
+        self.components.append( (name, element, node1, node2, control) )
+        self.pattern = None
+        return( self )
+
+    # index of a node in the unknowns, -1 for ground
+    def nodeindex(self, node):
+        if node == self.ground:
+            return( -1 )
+        return( self.nodes[node] )
+
+    # components with a branch current as unknown
+    def isbranch(self, element):
+        return( isinstance( element, (Voltage, Inductance) ) or not isinstance( element, Electricalelement ) )
+
+    # build the sparse pattern of G and B and the right hand side once for this topology
+    def buildpattern(self):
+        n = len( self.nodes )
+        rows, cols, gvalues, bvalues = [], [], [], []
+        branches = {}
+        rhs = np.zeros( n + sum( self.isbranch(c[1]) for c in self.components ), dtype=complex )
+
+        def stamp(row, col, g, b = 0.0):
+            if row >= 0 and col >= 0:
+                rows.append( row )
+                cols.append( col )
+                gvalues.append( g )
+                bvalues.append( b )
+
+        for name, element, node1, node2, control in self.components:
+            a, b = self.nodeindex(node1), self.nodeindex(node2)
+            if self.isbranch(element):
+                k = n + len( branches )
+                branches[name] = k
+                stamp( a, k, 1.0 )
+                stamp( b, k, -1.0 )
+                stamp( k, a, 1.0 )
+                stamp( k, b, -1.0 )
+                if isinstance( element, Voltage ):
+                    rhs[k] = element.value
+                elif isinstance( element, Inductance ):
+                    stamp( k, k, 0.0, -element.value )
+                else:
+                    stamp( k, self.nodeindex( control[0] ), -element )
+                    stamp( k, self.nodeindex( control[1] ), element )
+            elif isinstance( element, Current ):
+                if a >= 0:
+                    rhs[a] -= element.value
+                if b >= 0:
+                    rhs[b] += element.value
+            else:
+                if isinstance( element, Capacitance ):
+                    g, c = 0.0, element.value
+                else:
+                    g, c = 1 / element.value, 0.0
+                stamp( a, a, g, c )
+                stamp( b, b, g, c )
+                stamp( a, b, -g, -c )
+                stamp( b, a, -g, -c )
+
+        # merge duplicate entries, sorted by column then row which is the order of a CSC matrix
+        size = len( rhs )
+        keys = np.asarray( cols, dtype=np.int64 ) * size + np.asarray( rows, dtype=np.int64 )
+        keys, inverse = np.unique( keys, return_inverse = True )
+        self.pattern = {
+            "size": size,
+            "indices": ( keys % size ).astype( np.int32 ),
+            "indptr": np.concatenate( ( [0], np.cumsum( np.bincount( keys // size, minlength = size ) ) ) ).astype( np.int32 ),
+            "g": np.bincount( inverse, weights = np.real( gvalues ), minlength = len(keys) ) \
+                + 1j * np.bincount( inverse, weights = np.imag( gvalues ), minlength = len(keys) ),
+            "b": np.bincount( inverse, weights = bvalues, minlength = len(keys) ),
+            "rhs": rhs,
+            "branches": branches,
+        }
+        return( self.pattern )
+
+    # return the sparse MNA matrix for one frequency
+    def matrix(self, frequency):
+        pattern = self.pattern or self.buildpattern()
+        s = 2j * math.pi * frequency
+        data = pattern["g"] + s * pattern["b"]
+        size = pattern["size"]
+        return( scipy.sparse.csc_matrix( ( data, pattern["indices"], pattern["indptr"] ), shape = (size, size) ) )
+
+    # column ordering of the sparse LU factorization, analysed once per topology
+    # the ordering only depends on the pattern, so random values are used to analyse it
+    def analyse(self):
+        pattern = self.pattern or self.buildpattern()
+        if "order" not in pattern:
+            size = pattern["size"]
+            rng = np.random.default_rng(0)
+            values = rng.uniform( 1, 2, len(pattern["g"]) ) + 1j * rng.uniform( 1, 2, len(pattern["g"]) )
+            structure = scipy.sparse.csc_matrix( ( values, pattern["indices"], pattern["indptr"] ), shape = (size, size) )
+            column = np.argsort( scipy.sparse.linalg.splu( structure, permc_spec = "COLAMD" ).perm_c )
+            # locate the entries of the matrix with reordered columns in the data of the pattern
+            positions = scipy.sparse.csc_matrix( ( np.arange( 1, len(values) + 1 ), pattern["indices"], pattern["indptr"] ), shape = (size, size) )
+            positions = positions[:, column].tocsc()
+            positions.sort_indices()
+            pattern["order"] = {
+                "column": column,
+                "take": positions.data - 1,
+                "indices": positions.indices,
+                "indptr": positions.indptr,
+            }
+        return( pattern["order"] )
+
+    # solve the circuit for an array of frequencies, returns a Solution
+    # method "dense" solves stacked dense systems, "sparse" refactorizes with
+    # the cached ordering and "scratch" analyses and factorizes every frequency from scratch
+    # the default is dense for small circuits and sparse otherwise
+    def acsweep(self, frequency, method = None):
+        pattern = self.pattern or self.buildpattern()
+        f = np.atleast_1d( np.asarray( frequency, dtype=float ) )
+        if method is None:
+            method = "dense" if pattern["size"] <= self.densesize else "sparse"
+        if method == "dense":
+            x = self.densesolve( f )
+        elif method == "sparse":
+            x = self.sparsesolve( f )
+        elif method == "scratch":
+            x = np.empty( ( len(f), pattern["size"] ), dtype=complex )
+            for i, freq in enumerate( f ):
+                x[i] = scipy.sparse.linalg.splu( self.matrix( freq ) ).solve( pattern["rhs"] )
+        else:
+            raise ValueError(f"Unknown method {method}")
+        return( Solution( self, f, x ) )
+
+    # numeric factorization for every frequency using the ordering of analyse()
+    # with an adjoint right hand side c the transposed system A^T y = c is solved
+    # with the same factorization, and the solutions of both are returned
+    def sparsesolve(self, f, adjoint = None):
+        pattern = self.pattern
+        order = self.analyse()
+        size = pattern["size"]
+        g = pattern["g"][ order["take"] ]
+        b = pattern["b"][ order["take"] ]
+        x = np.empty( ( len(f), size ), dtype=complex )
+        if adjoint is not None:
+            y = np.empty( ( len(f), size ), dtype=complex )
+            c = np.asarray( adjoint, dtype=complex )[ order["column"] ] # the columns of A are reordered, so the rows of A^T
+        for i, freq in enumerate( f ):
+            data = g + 2j * math.pi * freq * b
+            A = scipy.sparse.csc_matrix( ( data, order["indices"], order["indptr"] ), shape = (size, size) )
+            lu = scipy.sparse.linalg.splu( A, permc_spec = "NATURAL" )
+            x[i, order["column"]] = lu.solve( pattern["rhs"] )
+            if adjoint is not None:
+                y[i] = lu.solve( c, trans = "T" )
+        return( x if adjoint is None else ( x, y ) )
+
+    # dense systems for a chunk of frequencies solved in one call of np.linalg.solve
+    # with an adjoint right hand side c also the transposed systems A^T y = c
+    def densesolve(self, f, adjoint = None):
+        pattern = self.pattern
+        size = pattern["size"]
+        G = self.matrix( 0.0 ).toarray()
+        B = scipy.sparse.csc_matrix( ( pattern["b"], pattern["indices"], pattern["indptr"] ), shape = (size, size) ).toarray()
+        x = np.empty( ( len(f), size ), dtype=complex )
+        if adjoint is not None:
+            y = np.empty( ( len(f), size ), dtype=complex )
+        chunk = max( 1, self.densebytes // ( 16 * size * size ) )
+        for start in range( 0, len(f), chunk ):
+            s = 2j * math.pi * f[start:start + chunk]
+            A = G + s[:, None, None] * B
+            x[start:start + chunk] = np.linalg.solve( A, np.broadcast_to( pattern["rhs"][:, None], A.shape[:-1] + (1,) ) )[..., 0]
+            if adjoint is not None:
+                y[start:start + chunk] = np.linalg.solve( A.transpose( 0, 2, 1 ), \
+                    np.broadcast_to( np.asarray( adjoint, dtype=complex )[:, None], A.shape[:-1] + (1,) ) )[..., 0]
+        return( x if adjoint is None else ( x, y ) )
+
+    # thermal noise at node relative to reference of every Resistance over an array of
+    # frequencies, returns a Noise with the total density and the noise of every
+    # resistance integrated over the frequencies, which are sorted ascending
+    # a Resistance is a noiseless resistance with a noise current of density 4kT/R in
+    # parallel, the transimpedances from all of them to the node follow from one
+    # adjoint solve A^T y = c per frequency, see sensitivity()
+    # method "modal" diagonalizes the circuit once and evaluates the transimpedances of
+    # a chunk of frequencies with one matrix product, it is checked against a direct
+    # solve and "sparse" is used instead when it is not accurate, the default is
+    # dense for small circuits and modal otherwise
+    def noise(self, frequency, node, reference = None, method = None, chunksize = 4096):
+        pattern = self.pattern or self.buildpattern()
+        f = np.sort( np.atleast_1d( np.asarray( frequency, dtype=float ) ) )
+        if reference is None:
+            reference = self.ground
+        size = pattern["size"]
+        c = np.zeros( size, dtype=complex )
+        if self.nodeindex( node ) >= 0:
+            c[ self.nodeindex( node ) ] += 1
+        if self.nodeindex( reference ) >= 0:
+            c[ self.nodeindex( reference ) ] -= 1
+        resistances = [ ( name, element, node1, node2 ) for name, element, node1, node2, control in self.components \
+            if isinstance( element, Resistance ) ]
+        names = [ name for name, element, node1, node2 in resistances ]
+        first = np.array( [ self.nodeindex( node1 ) for name, element, node1, node2 in resistances ], dtype=int )
+        second = np.array( [ self.nodeindex( node2 ) for name, element, node1, node2 in resistances ], dtype=int )
+        # density of the noise current of every resistance, 4kT/R = 4kTR / R^2
+        currents = np.array( [ element.noisedensity() / element.value.real ** 2 for name, element, node1, node2 in resistances ] )
+        if method is None:
+            method = "dense" if size <= self.densesize else "modal"
+        transimpedances = None
+        if method == "modal":
+            transimpedances = self.modaltransimpedances( f, c, first, second )
+            if transimpedances is None:
+                method = "sparse"
+        if transimpedances is None:
+            if method not in ("dense", "sparse"):
+                raise ValueError(f"Unknown method {method}")
+            solve = self.densesolve if method == "dense" else self.sparsesolve
+            def transimpedances(chunk):
+                x, y = solve( chunk, c )
+                y = np.concatenate( ( y, np.zeros( ( len(chunk), 1 ) ) ), axis = 1 ) # index -1 of ground gives 0
+                return( y[:, first] - y[:, second] )
+        weights = trapezoidweights( f )
+        density = np.empty( len(f) )
+        integrated = np.zeros( len(names) )
+        for start in range( 0, len(f), chunksize ):
+            chunk = slice( start, start + chunksize )
+            Z = transimpedances( f[chunk] )
+            squared = Z.real ** 2 + Z.imag ** 2
+            density[chunk] = squared @ currents
+            integrated += weights[chunk] @ squared
+        return( Noise( self, f, density, names, integrated * currents, method ) )
+
+    # function of a chunk of frequencies returning the transimpedances from currents
+    # injected at first and taken out at second to the voltage c^T x, one column per pair,
+    # None when the modal expansion is not accurate for the frequencies f
+    # with K = G + s0 B and K^-1 B = V diag(w) V^-1 the transposed system gives
+    # e^T A(s)^-1^T c = sum over the modes of ( V^-1 K^-1 e ) ( V^T c ) / ( 1 + ( s - s0 ) w )
+    def modaltransimpedances(self, f, c, first, second, rtol = 1E-6):
+        pattern = self.pattern
+        size = pattern["size"]
+        G = self.matrix( 0.0 ).toarray()
+        B = scipy.sparse.csc_matrix( ( pattern["b"], pattern["indices"], pattern["indptr"] ), shape = (size, size) ).toarray()
+        s0 = 2j * math.pi * math.sqrt( f[0] * f[-1] ) if f[0] > 0 else 2j * math.pi * f[-1]
+        K = G + s0 * B
+        try:
+            w, V = np.linalg.eig( np.linalg.solve( K, B ) )
+            E = np.zeros( ( size + 1, len(first) ), dtype=complex ) # currents in at first and out at second
+            E[ first, np.arange( len(first) ) ] += 1
+            E[ second, np.arange( len(first) ) ] -= 1
+            W = np.linalg.solve( V, np.linalg.solve( K, E[:size] ) ) * ( V.T @ c )[:, None]
+        except np.linalg.LinAlgError:
+            return( None )
+        def transimpedances(chunk):
+            return( ( 1 / ( 1 + ( 2j * math.pi * chunk[:, None] - s0 ) * w ) ) @ W )
+        # compared with a direct solve at some frequencies spread over the sweep
+        check = f[ np.unique( np.linspace( 0, len(f) - 1, num = 7 ).astype( int ) ) ]
+        x, y = self.densesolve( check, c ) if size <= self.densesize else self.sparsesolve( check, c )
+        y = np.concatenate( ( y, np.zeros( ( len(check), 1 ) ) ), axis = 1 )
+        direct = y[:, first] - y[:, second]
+        if not np.all( np.isfinite( W ) ) or \
+                np.max( np.abs( transimpedances( check ) - direct ) ) > rtol * max( np.max( np.abs( direct ) ), 1E-300 ):
+            return( None )
+        return( transimpedances )
+
+    # sensitivity of the voltage of node relative to reference to the value of every
+    # component, for an array of frequencies, returns a Sensitivity
+    # for H = c^T x with A x = b the derivative to a value p is dH/dp = y^T ( db/dp - dA/dp x )
+    # with A^T y = c, so one adjoint solve per frequency, with the same factorization
+    # as the sweep, gives the derivatives of all components, dA/dp and db/dp are
+    # the stamps of a single component
+    def sensitivity(self, frequency, node, reference = None, method = None):
+        pattern = self.pattern or self.buildpattern()
+        f = np.atleast_1d( np.asarray( frequency, dtype=float ) )
+        if reference is None:
+            reference = self.ground
+        size = pattern["size"]
+        c = np.zeros( size, dtype=complex )
+        if self.nodeindex( node ) >= 0:
+            c[ self.nodeindex( node ) ] += 1
+        if self.nodeindex( reference ) >= 0:
+            c[ self.nodeindex( reference ) ] -= 1
+        if method is None:
+            method = "dense" if size <= self.densesize else "sparse"
+        if method == "dense":
+            x, y = self.densesolve( f, c )
+        elif method == "sparse":
+            x, y = self.sparsesolve( f, c )
+        else:
+            raise ValueError(f"Unknown method {method}")
+        # a column of zeros at the end, so index -1 of the ground node gives 0
+        x = np.concatenate( ( x, np.zeros( ( len(f), 1 ) ) ), axis = 1 )
+        y = np.concatenate( ( y, np.zeros( ( len(f), 1 ) ) ), axis = 1 )
+        s = 2j * math.pi * f[:, None]
+        branches = pattern["branches"]
+        names, values, kinds, first, second, branch, controls = [], [], [], [], [], [], []
+        for name, element, node1, node2, control in self.components:
+            names.append( name )
+            values.append( element.value if isinstance( element, Electricalelement ) else element )
+            kinds.append( "vcvs" if control else next( cls.__name__ for cls in \
+                ( Capacitance, Inductance, Voltage, Current, Impedance ) if isinstance( element, cls ) ) )
+            first.append( self.nodeindex( node1 ) )
+            second.append( self.nodeindex( node2 ) )
+            branch.append( branches.get( name, -1 ) )
+            controls.append( tuple( map( self.nodeindex, control ) ) if control else (-1, -1) )
+        values = np.asarray( values, dtype=complex )
+        kinds = np.asarray( kinds )
+        first, second, branch = np.asarray( first ), np.asarray( second ), np.asarray( branch )
+        controls = np.asarray( controls, dtype=int ).reshape( -1, 2 )
+        # voltage across and adjoint voltage across every component
+        dx = x[:, first] - x[:, second]
+        dy = y[:, first] - y[:, second]
+        derivative = np.zeros( ( len(f), len(names) ), dtype=complex )
+        admittance = kinds == "Impedance" # dY/dZ = -1 / Z^2, also a Resistance
+        derivative[:, admittance] = dy[:, admittance] * dx[:, admittance] / values[admittance] ** 2
+        capacitance = kinds == "Capacitance" # dY/dC = s
+        derivative[:, capacitance] = -s * dy[:, capacitance] * dx[:, capacitance]
+        inductance = kinds == "Inductance" # -s L in the row of its branch
+        derivative[:, inductance] = s * y[:, branch[inductance]] * x[:, branch[inductance]]
+        voltage = kinds == "Voltage" # value in the right hand side of its branch
+        derivative[:, voltage] = y[:, branch[voltage]]
+        current = kinds == "Current" # -I at node1 and +I at node2 of the right hand side
+        derivative[:, current] = -dy[:, current]
+        vcvs = kinds == "vcvs" # -gain and +gain in the row of its branch
+        derivative[:, vcvs] = y[:, branch[vcvs]] * ( x[:, controls[vcvs, 0]] - x[:, controls[vcvs, 1]] )
+        H = np.sum( x[:, :size] * c, axis = 1 )
+        return( Sensitivity( self, f, H, names, values, derivative ) )
+
+    # real G and B matrices of G x + B dx/dt = u(t) for a transient analysis
+    # and the right hand side split in a constant part and one vector per source with a waveform
+    def transientsystem(self, waveforms):
+        pattern = self.pattern or self.buildpattern()
+        size = pattern["size"]
+        if np.any( np.imag( pattern["g"] ) != 0 ) or np.any( np.imag( pattern["rhs"] ) != 0 ):
+            raise TypeError("Transient analysis needs real valued elements and sources")
+        G = scipy.sparse.csc_matrix( ( np.real( pattern["g"] ).copy(), pattern["indices"], pattern["indptr"] ), shape = (size, size) )
+        B = scipy.sparse.csc_matrix( ( pattern["b"], pattern["indices"], pattern["indptr"] ), shape = (size, size) )
+        constant = np.real( pattern["rhs"] ).copy()
+        directions = np.zeros( ( len(waveforms), size ) )
+        for i, name in enumerate( waveforms ):
+            _, element, node1, node2, _ = self.components[ self.names[name] ]
+            if isinstance( element, Voltage ):
+                directions[i, pattern["branches"][name]] = 1.0
+            elif isinstance( element, Current ):
+                for node, sign in ( (node1, -1.0), (node2, 1.0) ):
+                    if self.nodeindex( node ) >= 0:
+                        directions[i, self.nodeindex( node )] = sign
+            else:
+                raise TypeError(f"Only Voltage and Current sources can have a waveform, {name} is a {type(element).__name__}")
+            constant -= element.value.real * directions[i]
+        return( G, B, constant, directions )
+
+    # transient analysis from t = 0 to tstop, results are yielded as a Transientsolution
+    # per chunk of chunksize time steps so long runs do not have to fit in memory
+    #
+    # capacitances and inductances are replaced by their companion models, which
+    # amounts to integrating G x + B dx/dt = u(t) with the trapezoidal rule
+    # (method "trapezoidal") or backward Euler (method "euler")
+    # with a constant step the system matrix is factorized once, small circuits
+    # are stepped with dense matrices
+    # adaptive = True controls the step with the difference between a trapezoidal
+    # and a backward Euler step as error estimate, steps are step / 2**k so the
+    # factorization of every step size is reused
+    #
+    # waveforms gives sources a value changing in time by name, either a function
+    # of an ndarray of times or a pair of ndarrays (times, values) which is interpolated,
+    # other sources keep their value, initial is "zero" or "dc" for the operating point
+    def transientchunks(self, tstop, step, method = "trapezoidal", waveforms = None, adaptive = False, \
+            rtol = 1E-4, atol = 1E-9, chunksize = 65536, initial = "zero"):
+        if method not in ("trapezoidal", "euler"):
+            raise ValueError(f"Unknown method {method}")
+        waveforms = { name: waveformfunction( waveform ) for name, waveform in ( waveforms or {} ).items() }
+        G, B, constant, directions = self.transientsystem( waveforms )
+        size = G.shape[0]
+        def sources(t):
+            u = np.broadcast_to( constant, ( len(t), size ) ).copy()
+            for i, waveform in enumerate( waveforms.values() ):
+                u += np.outer( np.broadcast_to( waveform( t ), t.shape ), directions[i] )
+            return( u )
+        if initial == "dc":
+            x = scipy.sparse.linalg.splu( G ).solve( sources( np.zeros(1) )[0] )
+        elif initial == "zero":
+            x = np.zeros( size )
+        else:
+            raise ValueError(f"Unknown initial condition {initial}")
+        if adaptive:
+            yield from self.adaptivesteps( G, B, sources, x, tstop, step, method, rtol, atol, chunksize, waveforms )
+        else:
+            yield from self.constantsteps( G, B, sources, x, tstop, step, method, chunksize, waveforms )
+
+    # all chunks of transientchunks() joined in one Transientsolution
+    def transient(self, tstop, step, **options):
+        chunks = list( self.transientchunks( tstop, step, **options ) )
+        return( Transientsolution( self, np.concatenate( [ chunk.time for chunk in chunks ] ), \
+            np.concatenate( [ chunk.x for chunk in chunks ] ), chunks[0].waveforms, chunks[0].method, chunks[0].derivative ) )
+
+    # matrices of one step of size h, x1 = M^-1 ( N x0 + w0 u0 + w1 u1 )
+    def stepmatrices(self, G, B, h, method):
+        if method == "trapezoidal":
+            return( ( B / h + G / 2 ).tocsc(), ( B / h - G / 2 ).tocsc(), 0.5, 0.5 )
+        return( ( B / h + G ).tocsc(), ( B / h ).tocsc(), 0.0, 1.0 )
+
+    # one backward Euler step of size h from time t
+    def eulerstep(self, G, B, sources, x, t, h):
+        M, N, w0, w1 = self.stepmatrices( G, B, h, "euler" )
+        return( scipy.sparse.linalg.splu( M ).solve( N @ x + sources( np.array( [ t + h ] ) )[0] ) )
+
+    # the solution at t = 0 and after a first backward Euler step of size h, which damps
+    # an initial state not matching the sources, as two Transientsolutions
+    # dx/dt of the companion models at t = 0 is taken as that of the first step,
+    # so continuing with the trapezoidal rule gives the current of the Euler step
+    def firststep(self, G, B, sources, x, h, method, waveforms):
+        x1 = self.eulerstep( G, B, sources, x, 0.0, h )
+        derivative = ( x1 - x ) / h
+        return( Transientsolution( self, np.zeros(1), x[None, :], waveforms, method, derivative ), \
+            Transientsolution( self, np.array( [ h ] ), x1[None, :], waveforms, method, derivative ) )
+
+    # constant step, the matrix is factorized once
+    def constantsteps(self, G, B, sources, x, tstop, step, method, chunksize, waveforms):
+        steps = int( round( tstop / step ) )
+        if steps == 0:
+            yield Transientsolution( self, np.zeros(1), x[None, :], waveforms, method )
+            return
+        initial, first = self.firststep( G, B, sources, x, step, method, waveforms )
+        yield initial
+        yield first
+        x, derivative = first.x[0], first.derivative
+        M, N, w0, w1 = self.stepmatrices( G, B, step, method )
+        dense = G.shape[0] <= self.densesize
+        if dense: # x1 = P x0 + R u
+            P = np.linalg.solve( M.toarray(), N.toarray() )
+            R = np.linalg.inv( M.toarray() )
+        else:
+            lu = scipy.sparse.linalg.splu( M )
+        for start in range( 2, steps + 1, chunksize ):
+            t = np.arange( start - 1, min( start + chunksize, steps + 1 ) ) * step
+            u = sources( t )
+            u = w0 * u[:-1] + w1 * u[1:]
+            if dense:
+                u = u @ R.T
+            x_chunk = np.empty( ( len(u), len(x) ) )
+            previous = x
+            for n in range( len(u) ):
+                if dense:
+                    x = P @ x + u[n]
+                else:
+                    x = lu.solve( N @ x + u[n] )
+                x_chunk[n] = x
+            derivative = companionstep( previous, x_chunk[0], step, derivative, method )
+            yield Transientsolution( self, t[1:], x_chunk, waveforms, method, derivative )
+            derivative = lastderivative( t[1:], x_chunk, derivative, method )
+
+    # adaptive step, error estimated from the difference of a trapezoidal and a backward Euler step
+    def adaptivesteps(self, G, B, sources, x, tstop, step, method, rtol, atol, chunksize, waveforms):
+        factorized = {} # (step size, method) -> factorization and matrices
+        def solve(x, t, h, how):
+            key = (h, how)
+            if key not in factorized:
+                M, N, w0, w1 = self.stepmatrices( G, B, h, how )
+                factorized[key] = ( scipy.sparse.linalg.splu( M ), N, w0, w1 )
+            lu, N, w0, w1 = factorized[key]
+            u = sources( np.array( [ t, t + h ] ) )
+            return( lu.solve( N @ x + w0 * u[0] + w1 * u[1] ) )
+        t, k = 0.0, 4 # start at step / 16
+        times, values = [], []
+        if tstop <= 0:
+            yield Transientsolution( self, np.zeros(1), x[None, :], waveforms, method )
+            return
+        initial, first = self.firststep( G, B, sources, x, min( step / 2**k, tstop ), method, waveforms )
+        yield initial
+        t, x, derivative = first.time[0], first.x[0], first.derivative
+        times.append( t )
+        values.append( x )
+        start = derivative # dx/dt of the companion models at the first time of the chunk
+        while t < tstop * (1 - 1E-12):
+            h = step / 2**k
+            if t + h > tstop:
+                h = tstop - t
+            trapezoidal, euler = solve( x, t, h, "trapezoidal" ), solve( x, t, h, "euler" )
+            error = np.max( np.abs( trapezoidal - euler ) / ( atol + rtol * np.abs( trapezoidal ) ) )
+            if error > 1 and k < 40:
+                k += 1 + int( error > 16 ) # halve the step, quarter it for large errors
+                continue
+            derivative = companionstep( x, trapezoidal if method == "trapezoidal" else euler, h, derivative, method )
+            x = trapezoidal if method == "trapezoidal" else euler
+            t += h
+            if not times:
+                start = derivative
+            times.append( t )
+            values.append( x )
+            if error < 0.25 and k > 0: # the error of the step size below is about 4 times larger
+                k -= 1
+            if len( times ) == chunksize:
+                yield Transientsolution( self, np.array( times ), np.array( values ), waveforms, method, start )
+                times, values = [], []
+        if times:
+            yield Transientsolution( self, np.array( times ), np.array( values ), waveforms, method, start )
+
+
+# return a waveform as a function of an ndarray of times
+# a pair of ndarrays (times, values) is interpolated linearly
+def waveformfunction(waveform):
+    if callable( waveform ):
+        return( waveform )
+    times, values = ( np.asarray( x, dtype=float ) for x in waveform )
+    return( lambda t: np.interp( t, times, values ) )
+
+
+# dx/dt of the companion models of capacitances and inductances after a step of size h
+# from x0 to x1, backward Euler: (x1 - x0) / h, trapezoidal rule: 2 (x1 - x0) / h - dx0/dt
+def companionstep(x0, x1, h, derivative, method):
+    if method == "euler":
+        return( ( x1 - x0 ) / h )
+    return( 2 * ( x1 - x0 ) / h - derivative )
+
+
+# dx/dt of the companion models at all times, rows of x, from dx/dt at the first time
+# with the trapezoidal rule (-1)**n dxn/dt is a cumulative sum
+def companionderivatives(time, x, derivative, method):
+    shape = ( -1, ) + ( 1, ) * ( x.ndim - 1 )
+    rate = np.diff( x, axis = 0 ) / np.diff( time ).reshape( shape )
+    if method == "euler":
+        return( np.concatenate( ( np.asarray( derivative )[None], rate ) ) )
+    sign = ( -1.0 ) ** np.arange( len(time) )
+    alternating = np.cumsum( 2 * sign[:-1].reshape( shape ) * rate, axis = 0 )
+    return( sign.reshape( shape ) * np.concatenate( ( np.asarray( derivative )[None], derivative - alternating ) ) )
+
+
+# dx/dt of the companion models at the last time only, without the array of all of them
+def lastderivative(time, x, derivative, method):
+    if len(time) == 1:
+        return( derivative )
+    if method == "euler":
+        return( ( x[-1] - x[-2] ) / ( time[-1] - time[-2] ) )
+    a = ( -1.0 ) ** np.arange( len(time) - 1 ) * 2 / np.diff( time )
+    c = np.concatenate( ( [0.0], a ) ) - np.concatenate( ( a, [0.0] ) )
+    return( ( -1.0 ) ** ( len(time) - 1 ) * ( derivative - c @ x ) )
+
+
+# ----------------------------------------------------------
+# class for the result of a transient analysis of a Circuit
+# time domain values are real, they are returned as float ndarrays
+# ----------------------------------------------------------
+class Transientsolution:
+
+    def __init__(self, circuit, time, x, waveforms = None, method = "trapezoidal", derivative = None):
+        self.circuit = circuit
+        self.time = time
+        self.x = x # one row of unknowns per time step
+        self.waveforms = waveforms or {} # source name -> function of time
+        self.method = method
+        # dx/dt of the companion models at the first time step, carried over from the chunk before
+        self.derivative = np.zeros( x.shape[1] ) if derivative is None else derivative
+
+    # return a machine readable representation of a Transientsolution
+    def __repr__(self):
+        return( f"Transientsolution({len(self.time)} time steps, {self.x.shape[1]} unknowns)" )
+
+    # node voltage as float ndarray, ground is 0
+    def nodevalues(self, node):
+        index = self.circuit.nodeindex( node )
+        if index < 0:
+            return( np.zeros( len(self.time) ) )
+        return( self.x[:, index] )
+
+    # return the voltage of node relative to reference
+    def voltage(self, node, reference = None):
+        if reference is None:
+            reference = self.circuit.ground
+        return( self.nodevalues( node ) - self.nodevalues( reference ) )
+
+    # return the current through a component from its first node to its second node
+    # the current of a Capacitance is the one of its companion model, C dv/dt as integrated
+    # by the method, continuing from the state at the first time step so chunks join up
+    def current(self, name):
+        circuit = self.circuit
+        _, element, node1, node2, _ = circuit.components[ circuit.names[name] ]
+        if circuit.isbranch( element ):
+            return( self.x[:, circuit.pattern["branches"][name]] )
+        elif name in self.waveforms:
+            return( np.broadcast_to( self.waveforms[name]( self.time ), self.time.shape ).astype( float ) )
+        elif isinstance( element, Current ):
+            return( np.full( len(self.time), element.value.real ) )
+        v = self.nodevalues( node1 ) - self.nodevalues( node2 )
+        if isinstance( element, Capacitance ):
+            circuit = self.circuit
+            derivative = sum( sign * self.derivative[circuit.nodeindex( node )] \
+                for node, sign in ( (node1, 1.0), (node2, -1.0) ) if circuit.nodeindex( node ) >= 0 )
+            return( element.value * companionderivatives( self.time, v, derivative, self.method ) )
+        return( v / element.value.real )
+
+# ----------------------------------------------------------
+# class for the result of an AC sweep of a Circuit
+# ----------------------------------------------------------
+class Solution:
+
+    def __init__(self, circuit, frequency, x):
+        self.circuit = circuit
+        self.frequency = frequency
+        self.x = x # one row of unknowns per frequency
+
+    # return a machine readable representation of a Solution
+    def __repr__(self):
+        return( f"Solution({len(self.frequency)} frequencies, {self.x.shape[1]} unknowns)" )
+
+    # node voltage as complex ndarray, ground is 0
+    def nodevalues(self, node):
+        index = self.circuit.nodeindex( node )
+        if index < 0:
+            return( np.zeros( len(self.frequency), dtype=complex ) )
+        return( self.x[:, index] )
+
+    # return the voltage of node relative to reference as a VoltageArray
+    def voltage(self, node, reference = None):
+        if reference is None:
+            reference = self.circuit.ground
+        return( VoltageArray( self.nodevalues( node ) - self.nodevalues( reference ) ) )
+
+    # return the current through a component from its first node to its second node as a CurrentArray
+    def current(self, name):
+        circuit = self.circuit
+        _, element, node1, node2, _ = circuit.components[ circuit.names[name] ]
+        if circuit.isbranch( element ):
+            return( CurrentArray( self.x[:, circuit.pattern["branches"][name]] ) )
+        elif isinstance( element, Current ):
+            return( CurrentArray( np.full( len(self.frequency), element.value, dtype=complex ) ) )
+        v = self.nodevalues( node1 ) - self.nodevalues( node2 )
+        if isinstance( element, Capacitance ):
+            return( CurrentArray( v * 2j * math.pi * self.frequency * element.value ) )
+        return( CurrentArray( v / element.value ) )
+
+
+# ----------------------------------------------------------
+# class for the thermal noise of the resistances of a Circuit at a node
+# densities are in V^2/Hz at the node, integrals in V^2 and rms values in V
+# ----------------------------------------------------------
+class Noise:
+
+    def __init__(self, circuit, frequency, density, names, integrated, method):
+        self.circuit = circuit
+        self.frequency = frequency # ascending
+        self.density = density # total noise density at every frequency
+        self.names = names # names of the resistances
+        self.integrated = integrated # noise of every resistance integrated over all frequencies
+        self.method = method # method used to solve, see Circuit.noise()
+
+    # return a machine readable representation of a Noise
+    def __repr__(self):
+        return( f"Noise({len(self.frequency)} frequencies, {len(self.names)} resistances)" )
+
+    # noise voltage density in V/sqrt(Hz)
+    def voltagedensity(self):
+        return( np.sqrt( self.density ) )
+
+    # rms noise voltage in the band from low to high, integrating the density over
+    # the frequencies of the sweep within the band, all frequencies by default
+    def rms(self, low = None, high = None):
+        inside = np.ones( len(self.frequency), dtype=bool )
+        if low is not None:
+            inside &= self.frequency >= low
+        if high is not None:
+            inside &= self.frequency <= high
+        return( math.sqrt( np.sum( trapezoidweights( self.frequency[inside] ) * self.density[inside] ) ) )
+
+    # rms noise voltage of every resistance over all frequencies, largest first
+    def contributions(self):
+        order = np.argsort( -self.integrated, kind = "stable" )
+        return( { self.names[i]: math.sqrt( self.integrated[i] ) for i in order } )
+
+
+# weights of the trapezoidal rule for samples at ascending frequencies f
+def trapezoidweights(f):
+    weights = np.zeros( len(f) )
+    if len(f) > 1:
+        step = np.diff( f ) / 2
+        weights[:-1] += step
+        weights[1:] += step
+    return( weights )
+
+
+# ----------------------------------------------------------
+# class for the sensitivity of a voltage H to the values of all components of a Circuit
+# values are the value of every element, the gain of a VCVS, the derivatives
+# are to these values in their own unit, for instance per ohm or per farad
+# ----------------------------------------------------------
+class Sensitivity:
+
+    def __init__(self, circuit, frequency, H, names, values, derivative):
+        self.circuit = circuit
+        self.frequency = frequency
+        self.H = H # complex voltage at every frequency
+        self.names = { name: i for i, name in enumerate( names ) } # component name -> column of derivative
+        self.values = values
+        self.derivative = derivative # dH/dp, one row per frequency, one column per component
+
+    # return a machine readable representation of a Sensitivity
+    def __repr__(self):
+        return( f"Sensitivity({len(self.frequency)} frequencies, {len(self.names)} components)" )
+
+    # dH/dp of a component as complex ndarray
+    def dH(self, name):
+        return( self.derivative[:, self.names[name]] )
+
+    # d|H|/dp of a component
+    def magnitude(self, name):
+        return( np.real( np.conj( self.H ) * self.dH( name ) ) / np.abs( self.H ) )
+
+    # dphase/dp of a component, in radians per unit of the value
+    def phase(self, name):
+        return( np.imag( self.dH( name ) / self.H ) )
+
+    # normalized sensitivity p / H * dH/dp, the real part is the relative change of |H|
+    # for a relative change of p and the imaginary part the change of phase in radians
+    def relative(self, name):
+        return( self.values[ self.names[name] ] * self.dH( name ) / self.H )
+
+    # component names with the largest normalized magnitude sensitivity over the frequencies first
+    def ranking(self):
+        largest = np.max( np.abs( np.real( self.values * self.derivative / self.H[:, None] ) ), axis = 0 )
+        return( sorted( self.names, key = lambda name: -largest[ self.names[name] ] ) )
+
+
+# --- tests --------------------------
+if __name__ == "__main__":
+    import test_circuit
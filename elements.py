@@ -30,24 +30,144 @@
 # class Inductance(Electricalelement)
 # class Voltage(Electricalelement)
 # class Current(Electricalelement)
+#
+# and the numpy backed counterparts holding a whole array of values:
+#
+# class ElectricalelementArray
+# class ImpedanceArray(ElectricalelementArray)
+# class VoltageArray(ElectricalelementArray)
+# class CurrentArray(ElectricalelementArray)
+#
+# class Tolerance
+# class Impedancecache, with the instance impedancecache used by getimpedance()
+# function writetable(file, columns, header = None, delimiter = ",")
 
+import re
 import math
 import cmath
+import functools
+import collections
+
+# numpy is only needed for the array classes
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Boltzmann constant in J/K, for the thermal noise of a Resistance
+boltzmann = 1.380649E-23
+
+# grammar of a value with metric prefix and unit, for instance "5k6", "470nF", "0.1kOhm" or "1.5E3"
+# a number after the prefix gives the decimals, "5k6" is 5.6k
+# prefixes are case sensitive, units are not
+metricprefixpattern = re.compile( r"""
+    \s*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)   # mantissa
+    \s*([TGMkmµμunpf])?(\d+)?                      # prefix and decimals
+    \s*(?i:V|A|Ohms?|Ω|F|Farads?|H|Henrys?|Henries)?\s*  # unit""", re.VERBOSE )
+metricprefixexponents = {'T': 12, 'G': 9, 'M': 6, 'k': 3, 'm': -3, 'µ': -6, 'μ': -6, 'u': -6, \
+    'n': -9, 'p': -12, 'f': -15}
+
+# convert a string with metric prefix to float, return nan if not valid
+# the string is parsed in a single pass and the most recent results are cached
+@functools.lru_cache( maxsize = 65536 )
+def parsemetricprefix( expression ):
+    match = metricprefixpattern.fullmatch( expression )
+    if match is None:
+        return( math.nan )
+    mantissastr, prefix, decimals = match.groups()
+    if prefix is None:
+        return( math.nan if decimals is not None else float( mantissastr ) )
+    if decimals is not None:
+        try:
+            mantissa = float( f"{mantissastr}.{decimals}" )
+        except ValueError: # "1.5k2" or "1E3k2"
+            return( math.nan )
+    else:
+        mantissa = float( mantissastr )
+    return( mantissa * 10 ** metricprefixexponents[prefix] )
+
+
+# fast constructor used for the results of calculations, the value is
+# stored as it is without the checks and conversions of __init__
+# elements are immutable, setvalue() is the only way to store their value
+def newelement( cls, value, new = object.__new__ ):
+    element = new(cls)
+    setvalue( element, value )
+    return( element )
+
+
+# element made again by pickle, see Electricalelement.__reduce__()
+def restoreelement( cls, value, state ):
+    element = newelement( cls, value )
+    for name, attribute in state.items():
+        object.__setattr__( element, name, attribute )
+    return( element )
+
 
 # ----------------------------------------------------------
 # generic class for actual electric elements to inherit from
 # ----------------------------------------------------------
 class Electricalelement:
     
+    # the value is the only data kept per object, the unit belongs to the class,
+    # only a generic Electricalelement keeps the unit it is made with
+    __slots__ = ("value", "_unit")
+    
     # initialising the Electricalelement using a number or string as parameter
-    def __init__(self, value = 0, unit = ""):        
+    # a class with its own unit only accepts that unit
+    def __init__(self, value = 0, unit = None):        
         if  isinstance(value, (float, int, complex)):
-            self.value = value
+            setvalue( self, value )
         elif isinstance(value, str):
-            self.value = Electricalelement.metricprefixtofloat(value)
+            setvalue( self, Electricalelement.metricprefixtofloat(value) )
         else:
             raise TypeError(f"Cannot initialise Electricalelement using a {type(value)}")
-        self.unit = unit
+        if type(self).unit is Electricalelement.unit:
+            if unit:
+                object.__setattr__( self, "_unit", unit )
+        elif unit is not None and unit != self.unit:
+            raise ValueError(f"The unit of {type(self).__name__} is '{self.unit}'")
+    
+    # unit of a generic Electricalelement, the classes of elements replace it by their unit
+    @property
+    def unit(self):
+        return( getattr( self, "_unit", "" ) )
+    
+    # elements are values, they cannot be changed once made
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+    
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+    
+    # pickle makes an element again with newelement() and the other slots that are set,
+    # like a tolerance, copies of a value that cannot change can be the value itself
+    def __reduce__(self):
+        state = { name: getattr( self, name ) for cls in type(self).__mro__ \
+            for name in getattr( cls, "__slots__", () ) if name != "value" and hasattr( self, name ) }
+        return( restoreelement, ( type(self), self.value, state ) )
+    
+    def __copy__(self):
+        return( self )
+    
+    def __deepcopy__(self, memo):
+        return( self )
+    
+    # elements are equal when they have the same unit and value,
+    # so Resistance(100) == Impedance(100)
+    def __eq__(self, other):
+        if not isinstance( other, Electricalelement ):
+            return( NotImplemented )
+        return( self.unit == other.unit and self.value == other.value )
+    
+    def __hash__(self):
+        return( hash( (self.unit, self.value) ) )
+    
+    # Tolerance of a component, None for an exact value
+    # the tolerance does not take part in comparing elements
+    @property
+    def tolerance(self):
+        return( getattr( self, "_tolerance", None ) )
     
     # return a machine readable representation of an Electricalelement
     def __repr__(self):
@@ -93,36 +213,30 @@ class Electricalelement:
             
     
     # static method, convert a string with metric prefix to float return nan if not valid
+    # repeated strings are answered from a cache, see parsemetricprefix()
     @staticmethod
     def metricprefixtofloat( expression ): 
-        #print("--- expression",expression,end=" ---> ")
-        expression = expression.strip()
-        units = ("V", "A", "Ohm", "F","Farad" ,"H" ,"Henry")
-        for unit in units:
-            if unit in expression:
-                expression = expression.replace(unit, "")        
-        #print("expression",expression)
-        dictprefixinv = {'T': 12, 'G': 9, 'M': 6, 'k': 3, 'm': -3, 'µ': -6, 'u': -6, \
-            'n': -9, 'p': -12, 'f': -15}
-        value=None
-        for prefix in dictprefixinv:
-            if prefix in expression:
-                mantissastr,*otherstr=expression.split(prefix)
-                if otherstr[0].isnumeric():
-                    mantissastr=f"{mantissastr}.{otherstr[0]}"
-                exponent=dictprefixinv[prefix]
-                try:
-                    value=float(mantissastr) * 10 ** exponent
-                except ValueError:
-                    value=math.nan
-                finally:
-                    break
-        if value is None: # no metric prefix was encountered
-            try:
-                value=float(expression) # see if it is a regular valid float 
-            except ValueError:
-                value=math.nan
-        return value
+        return( parsemetricprefix( expression ) )
+    
+    # static method, convert a list or array of strings with metric prefix to a float ndarray
+    # with nan for invalid entries, numbers are taken as they are
+    # every distinct string is parsed only once
+    @staticmethod
+    def parse_many( expressions ):
+        if np is None:
+            raise ImportError("parse_many needs numpy")
+        expressions = list( expressions )
+        distinct = dict.fromkeys( expressions )
+        parse = parsemetricprefix
+        if len( distinct ) > parsemetricprefix.cache_info().maxsize: # would only churn the cache
+            parse = parsemetricprefix.__wrapped__
+        strings = [ expression for expression in distinct if isinstance( expression, str ) ]
+        lookup = dict( zip( strings, map( parse, strings ) ) )
+        if len( lookup ) < len( distinct ): # not all entries are strings
+            for expression in distinct:
+                if expression not in lookup:
+                    lookup[expression] = float( expression ) if isinstance( expression, (int, float) ) else math.nan
+        return( np.fromiter( map( lookup.__getitem__, expressions ), dtype=float, count=len(expressions) ) )
         
         
     # static method, convert a float to string with metric prefix
@@ -145,25 +259,72 @@ class Electricalelement:
             engstr = f"{newmantissa} {prefix}{unit}"
         return engstr
     
+    # static method, convert an array of floats to an ndarray of strings with metric prefix
+    # same precision and prefix rules as floattometricprefix(), but exponent and
+    # mantissa are calculated with numpy for the whole array at once
+    @staticmethod
+    def floattometricprefixarray( x, unit="", precision=3 ):
+        if np is None:
+            raise ImportError("floattometricprefixarray needs numpy")
+        x = np.asarray( x, dtype=float )
+        finite = np.isfinite( x ) & ( x != 0 )
+        # 10.0 ** exponent underflows for subnormals, these are formatted one by one
+        subnormal = finite & ( np.abs( x ) < np.finfo( float ).tiny )
+        finite &= ~subnormal
+        with np.errstate( divide="ignore", invalid="ignore" ):
+            exponent = np.where( finite, np.floor( np.log10( np.abs( x ) ) ), 0 ).astype( int )
+            # mantissa with 6 decimals like f"{x:e}", rounding can carry into the exponent
+            mantissa = x / 10.0 ** exponent
+            carry = np.abs( np.round( mantissa, 6 ) ) >= 10
+            exponent = exponent + carry
+            mantissa = np.where( carry, mantissa / 10, mantissa )
+        mantissa, ties = roundarray( mantissa, 6 )
+        for i in np.flatnonzero( ties ): # exactly as f"{x:e}" for values close to halfway
+            mantissa.flat[i] = float( f"{x.flat[i]:e}".split("e")[0] )
+        newexponent = exponent // 3 * 3
+        newmantissa = mantissa * 10 ** ( exponent % 3 )
+        rounded, ties = roundarray( newmantissa, precision )
+        for i in np.flatnonzero( ties ):
+            rounded.flat[i] = round( float( newmantissa.flat[i] ), precision )
+        newmantissa = rounded
+        prefixes = np.array( ["f", "p", "n", "µ", "m", "", "k", "M", "G", "T"] )
+        inrange = ( newexponent >= -15 ) & ( newexponent <= 12 )
+        prefix = np.where( inrange, prefixes[ np.clip( newexponent // 3 + 5, 0, 9 ) ], "" )
+        exponentstr = ""
+        if not np.all( inrange ): # no prefix, the exponent is written out
+            exponentstr = np.where( inrange, "", np.char.mod( "E%+03d", newexponent ) )
+        result = joinstrings( newmantissa.astype( str ), exponentstr, " ", prefix, unit )
+        if np.any( subnormal ):
+            scalar = np.array( [ Electricalelement.floattometricprefix( value, unit, precision ) for value in x[subnormal] ] )
+            result = result.astype( np.result_type( result, scalar ) )
+            result[subnormal] = scalar
+        return( result )
+    
 
 
     
 
 
+# store the value of an element bypassing __setattr__
+setvalue = Electricalelement.value.__set__
+
+
 # -----------------------------------------------------------------       
 # Class for an impedance to be used with resistance, capacitance and inductance
 # -----------------------------------------------------------------       
 class Impedance(Electricalelement):
     
-    # value is the impedance value in Ohm
+    __slots__ = ()
+    unit = "Ohm"
+    
+    # value is the impedance value in Ohm, always kept as a complex number
     def __init__(self, value = 0):
         if isinstance( value, complex ):
-            super().__init__( value, "Ohm" )
+            setvalue( self, value )
         elif isinstance( value, (int, float) ):
-            super().__init__( complex(value), "Ohm" )
+            setvalue( self, complex(value) )
         elif isinstance(value, str):
-            floatvalue = Electricalelement.metricprefixtofloat(value)
-            super().__init__( complex(floatvalue), "Ohm" )
+            setvalue( self, complex( Electricalelement.metricprefixtofloat(value) ) )
         else:
             raise TypeError(f"Not able to initialise Impedance using a {type(value)}")
     
@@ -174,24 +335,29 @@ class Impedance(Electricalelement):
     # negation of an Impedance   
     # returns a Impedance object
     def __neg__(self):
-        return( Impedance( -self.value ) )
+        return( newelement( Impedance, -self.value ) )
     
     # adding two Impedance    
     # returns a Impedance object
     def __add__(self, other):
-        thistype = type(self)
-        return( Impedance( self.value + other.value ) )
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
+        return( newelement( Impedance, self.value + other.value ) )
     
     # subtracting two Impedance  
     # returns a Impedance object
     def __sub__(self, other):
-        return( Impedance( self.value - other.value ) ) 
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
+        return( newelement( Impedance, self.value - other.value ) ) 
         
     # multiplication of an Impedance times number returns an Impedance
     # multiplication of an Impedance times another Impedance returns a float
     def __mul__(self,other):
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
         if isinstance(other, ( float, int )): 
-            return( Impedance( self.value * other) )
+            return( newelement( Impedance, self.value * other) )
         elif isinstance(other, Impedance):
             return( self.value * other.value )
         else:
@@ -203,8 +369,10 @@ class Impedance(Electricalelement):
     # division of an Impedance by number returns an Impedance
     # division of an Impedance by another Impedance returns a float
     def __truediv__(self,other):
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
         if isinstance(other, ( float, int )): 
-            return( Impedance( self.value / other ) )
+            return( newelement( Impedance, self.value / other ) )
         elif isinstance(other, Impedance):
             return( self.value / other.value )
         else:
@@ -212,6 +380,8 @@ class Impedance(Electricalelement):
     
     # division in reverse order returns a float
     def __rtruediv__(self,other):
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
         if isinstance(other, ( float, int )): 
             return( other / self.value )
         elif isinstance(other, Impedance):
@@ -230,8 +400,12 @@ class Impedance(Electricalelement):
     # static method to calculate equivalent impedances of n parallel impedances
     @staticmethod
     def parallel(*impedances): 
+        # an array element among the impedances decides the type of the result
+        for z in impedances:
+            if isinstance(z, ElectricalelementArray):
+                return( type(z).parallel( *impedances ) )
         sumofinverse = sum( [ 1 / z.value for z in impedances] )
-        return( Impedance( complex( 1 / sumofinverse ) ) )
+        return( newelement( Impedance, complex( 1 / sumofinverse ) ) )
 
 
 
@@ -241,13 +415,36 @@ class Impedance(Electricalelement):
 # -------------------------------------------------------
 class Resistance(Impedance):
     
-    # value is the resistance value in Ohm
-    def __init__(self, value = 0):
+    __slots__ = ("_tolerance", "_temperature")
+    
+    # temperature in kelvin of a Resistance made without one
+    defaulttemperature = 300.0
+    
+    # value is the resistance value in Ohm, initialised like an Impedance
+    # tol is an optional relative tolerance, dist its distribution, see class Tolerance
+    # temperature in kelvin sets the thermal noise, see noisedensity()
+    def __init__(self, value = 0, tol = None, dist = "uniform", temperature = None):
         super().__init__( value )
+        if tol is not None:
+            object.__setattr__( self, "_tolerance", Tolerance( tol, dist ) )
+        if temperature is not None:
+            if temperature < 0:
+                raise ValueError("A temperature in kelvin cannot be negative")
+            object.__setattr__( self, "_temperature", float( temperature ) )
         
     # return a machine readable representation of a Resistance
     def __repr__(self):
         return( f"Resistance({self.value})" )  
+    
+    # temperature in kelvin, defaulttemperature when none was given
+    @property
+    def temperature(self):
+        return( getattr( self, "_temperature", self.defaulttemperature ) )
+    
+    # spectral density of the thermal noise voltage 4kTR in V^2/Hz,
+    # the same at every frequency, its square root is in V/sqrt(Hz)
+    def noisedensity(self):
+        return( 4 * boltzmann * self.temperature * self.value.real )
         
      
 
@@ -256,9 +453,15 @@ class Resistance(Impedance):
 # -------------------------------------------------------
 class Capacitance(Electricalelement):
     
+    __slots__ = ("_tolerance",)
+    unit = "F"
+    
     # value is the capacitance value in Farad
-    def __init__(self, value = 0):
-        super().__init__( value, "F" )
+    # tol is an optional relative tolerance, dist its distribution, see class Tolerance
+    def __init__(self, value = 0, tol = None, dist = "uniform"):
+        super().__init__( value )
+        if tol is not None:
+            object.__setattr__( self, "_tolerance", Tolerance( tol, dist ) )
         
     # return a machine readable representation of a Capacitance
     def __repr__(self):
@@ -267,23 +470,23 @@ class Capacitance(Electricalelement):
     # negation of an Capacitance   
     # returns a Capacitance object
     def __neg__(self):
-        return( Capacitance( -self.value) )
+        return( newelement( Capacitance, -self.value) )
     
     # adding two Capacitance    
     # returns a Capacitance object
     def __add__(self, other):
-        return( Capacitance( self.value + other.value) )
+        return( newelement( Capacitance, self.value + other.value) )
     
     # subtracting two Capacitance  
     # returns a Capacitance object
     def __sub__(self, other):
-        return( Capacitance( self.value - other.value) ) 
+        return( newelement( Capacitance, self.value - other.value) ) 
         
     # multiplication of an Capacitance times number returns an Capacitance
     # multiplication of an Capacitance times another Capacitance returns a float
     def __mul__(self,other):
         if isinstance(other, ( float, int )): 
-            return( Capacitance( self.value * other) )
+            return( newelement( Capacitance, self.value * other) )
         elif isinstance(other, Capacitance):
             return( self.value * other.value )
         else:
@@ -296,7 +499,7 @@ class Capacitance(Electricalelement):
     # division of an Capacitance by another Capacitance returns a float
     def __truediv__(self,other):
         if isinstance(other, ( float, int )): 
-            return( Capacitance( self.value / other) )
+            return( newelement( Capacitance, self.value / other) )
         elif isinstance(other, Capacitance):
             return( self.value / other.value )
         else:
@@ -314,10 +517,21 @@ class Capacitance(Electricalelement):
     
     
     # return an Impedance object representing the frequency dependant impedance        
+    # an array or list of frequencies returns a single ImpedanceArray object
+    # scalar results, also numpy scalars, are kept in impedancecache
     def getimpedance(self, frequency):
-        Xc = 1 / ( 2.0 * math.pi * frequency * self.value )
-        Zc = complex( 0, -Xc )
-        return( Impedance( Zc ) )
+        if not isinstance( frequency, (int, float) ) and np.ndim( frequency ) != 0:
+            Xc = 1 / ( 2.0 * np.pi * np.asarray( frequency, dtype=float ) * self.value )
+            return( ImpedanceArray( -1j * Xc ) )
+        frequency = float( frequency ) # numpy scalars like np.int64 as well
+        key = ( type(self), self.value, frequency )
+        Z = impedancecache.lookup( key )
+        if Z is None:
+            Xc = 1 / ( 2.0 * math.pi * frequency * self.value )
+            Zc = complex( 0, -Xc )
+            Z = newelement( Impedance, Zc )
+            impedancecache.store( key, Z )
+        return( Z )
        
 
     # instance method to calculate series capacitance of this instance with n other Capacitance
@@ -329,7 +543,7 @@ class Capacitance(Electricalelement):
     @staticmethod
     def series(*capacitances): 
         sumofinverse = math.fsum( [ 1 / c.value for c in capacitances] )
-        return( Capacitance( 1 / sumofinverse ) )
+        return( newelement( Capacitance, 1 / sumofinverse ) )
 
 
 # -------------------------------------------------------        
@@ -337,9 +551,15 @@ class Capacitance(Electricalelement):
 # -------------------------------------------------------
 class Inductance(Electricalelement):
     
+    __slots__ = ("_tolerance",)
+    unit = "H"
+    
     # value is the Inductance value in Henry
-    def __init__(self, value = 0):
-        super().__init__( value, "H" )
+    # tol is an optional relative tolerance, dist its distribution, see class Tolerance
+    def __init__(self, value = 0, tol = None, dist = "uniform"):
+        super().__init__( value )
+        if tol is not None:
+            object.__setattr__( self, "_tolerance", Tolerance( tol, dist ) )
         
     # return a machine readable representation of a Inductance
     def __repr__(self):
@@ -348,23 +568,23 @@ class Inductance(Electricalelement):
     # negation of an Inductance   
     # returns a Inductance object
     def __neg__(self):
-        return( Inductance( -self.value) )
+        return( newelement( Inductance, -self.value) )
     
     # adding two Inductance    
     # returns a Inductance object
     def __add__(self, other):
-        return( Inductance( self.value + other.value) )
+        return( newelement( Inductance, self.value + other.value) )
     
     # subtracting two Inductance  
     # returns a Inductance object
     def __sub__(self, other):
-        return( Inductance( self.value - other.value) ) 
+        return( newelement( Inductance, self.value - other.value) ) 
         
     # multiplication of an Inductance times number returns an Inductance
     # multiplication of an Inductance times another Inductance returns a float
     def __mul__(self,other):
         if isinstance(other, ( float, int )): 
-            return( Inductance( self.value * other) )
+            return( newelement( Inductance, self.value * other) )
         elif isinstance(other, Inductance):
             return( self.value * other.value )
         else:
@@ -377,7 +597,7 @@ class Inductance(Electricalelement):
     # division of an Inductance by another Inductance returns a float
     def __truediv__(self,other):
         if isinstance(other, ( float, int )): 
-            return( Inductance( self.value / other) )
+            return( newelement( Inductance, self.value / other) )
         elif isinstance(other, Inductance):
             return( self.value / other.value )
         else:
@@ -395,10 +615,21 @@ class Inductance(Electricalelement):
     
     
     # return an Impedance object representing the frequency dependant impedance        
+    # an array or list of frequencies returns a single ImpedanceArray object
+    # scalar results, also numpy scalars, are kept in impedancecache
     def getimpedance(self, frequency):
-        Xl = 2.0 * math.pi * frequency * self.value 
-        Zc = complex( 0, Xl )
-        return( Impedance( Zc ) )
+        if not isinstance( frequency, (int, float) ) and np.ndim( frequency ) != 0:
+            Xl = 2.0 * np.pi * np.asarray( frequency, dtype=float ) * self.value
+            return( ImpedanceArray( 1j * Xl ) )
+        frequency = float( frequency ) # numpy scalars like np.int64 as well
+        key = ( type(self), self.value, frequency )
+        Z = impedancecache.lookup( key )
+        if Z is None:
+            Xl = 2.0 * math.pi * frequency * self.value 
+            Zc = complex( 0, Xl )
+            Z = newelement( Impedance, Zc )
+            impedancecache.store( key, Z )
+        return( Z )
        
 
     # instance method to calculate parallel Inductance of this instance with n other Inductance
@@ -410,7 +641,7 @@ class Inductance(Electricalelement):
     @staticmethod
     def parallel(*inductances): 
         sumofinverse = math.fsum( [ 1 / c.value for c in inductances] )
-        return( Inductance( 1 / sumofinverse ) )
+        return( newelement( Inductance, 1 / sumofinverse ) )
 
 
 # ----------------------------------------------------------
@@ -418,15 +649,17 @@ class Inductance(Electricalelement):
 # ----------------------------------------------------------
 class Voltage(Electricalelement):
     
-    # value is the voltage value in Volt
+    __slots__ = ()
+    unit = "V"
+    
+    # value is the voltage value in Volt, always kept as a complex number
     def __init__(self, value = 0):
         if isinstance( value, complex ):
-            super().__init__( value, "V" )
+            setvalue( self, value )
         elif isinstance( value, (int, float) ):
-            super().__init__( complex(value), "V" )
+            setvalue( self, complex(value) )
         elif isinstance(value, str):
-            floatvalue = Electricalelement.metricprefixtofloat(value)
-            super().__init__( complex(floatvalue), "V" )
+            setvalue( self, complex( Electricalelement.metricprefixtofloat(value) ) )
         else:
             raise TypeError(f"Not able to initialise Voltage using a {type(value)}")
         
@@ -437,24 +670,29 @@ class Voltage(Electricalelement):
     # negation of an Voltage   
     # returns a Voltage object
     def __neg__(self):
-        return( Voltage( -self.value ) )
+        return( newelement( Voltage, -self.value ) )
     
     # adding two Voltage    
     # returns a Voltage object
     def __add__(self, other):
-        thistype = type(self)
-        return( Voltage( self.value + other.value ) )
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
+        return( newelement( Voltage, self.value + other.value ) )
     
     # subtracting two Voltage  
     # returns a Voltage object
     def __sub__(self, other):
-        return( Voltage( self.value - other.value ) ) 
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
+        return( newelement( Voltage, self.value - other.value ) ) 
 
     # multiplication of an Voltage times number returns an Voltage
     # multiplication of an Voltage times another Voltage returns a Complex
     def __mul__(self,other):
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
         if isinstance(other, ( float, int )): 
-            return( Voltage( self.value * other) )
+            return( newelement( Voltage, self.value * other) )
         elif isinstance(other, Voltage):
             return( self.value * other.value )
         else:
@@ -466,19 +704,23 @@ class Voltage(Electricalelement):
     # division of an Voltage by number returns an Voltage
     # division of an Voltage by another Voltage returns a Complex
     def __truediv__(self,other):
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
         if isinstance(other, ( float, int )): 
-            return( Voltage( self.value / other ) )
+            return( newelement( Voltage, self.value / other ) )
         elif isinstance(other, Voltage):
             return( self.value / other.value )
         elif isinstance(other, Impedance):
-            return( Current( self.value / other.value ) )
+            return( newelement( Current, self.value / other.value ) )
         elif isinstance(other, Current):
-            return( Impedance( self.value / other.value ) )
+            return( newelement( Impedance, self.value / other.value ) )
         else:
             raise TypeError(f"Cannot divide {type(self)} by {type(other)}")
     
     # division in reverse order returns a Complex
     def __rtruediv__(self,other):
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
         if isinstance(other, ( float, int )): 
             return( other / self.value )
         elif isinstance(other, Voltage):
@@ -492,15 +734,17 @@ class Voltage(Electricalelement):
 # ----------------------------------------------------------
 class Current(Electricalelement):
     
-    # value is the current value in Volt
+    __slots__ = ()
+    unit = "A"
+    
+    # value is the current value in Volt, always kept as a complex number
     def __init__(self, value = 0):
         if isinstance( value, complex ):
-            super().__init__( value, "A" )
+            setvalue( self, value )
         elif isinstance( value, (int, float) ):
-            super().__init__( complex(value), "A" )
+            setvalue( self, complex(value) )
         elif isinstance(value, str):
-            floatvalue = Electricalelement.metricprefixtofloat(value)
-            super().__init__( complex(floatvalue), "A" )
+            setvalue( self, complex( Electricalelement.metricprefixtofloat(value) ) )
         else:
             raise TypeError(f"Not able to initialise Current using a {type(value)}")
         
@@ -511,29 +755,34 @@ class Current(Electricalelement):
     # negation of an Current   
     # returns a Current object
     def __neg__(self):
-        return( Current( -self.value ) )
+        return( newelement( Current, -self.value ) )
     
     # adding two Current    
     # returns a Current object
     def __add__(self, other):
-        thistype = type(self)
-        return( Current( self.value + other.value ) )
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
+        return( newelement( Current, self.value + other.value ) )
     
     # subtracting two Current  
     # returns a Current object
     def __sub__(self, other):
-        return( Current( self.value - other.value ) ) 
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
+        return( newelement( Current, self.value - other.value ) ) 
 
     # multiplication of an Current times number returns an Current
     # multiplication of an Current times another Current returns a Complex
     # multiplication of an Current times a Impedance returns a Voltage
     def __mul__(self,other):
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
         if isinstance(other, ( float, int )): 
-            return( Current( self.value * other) )
+            return( newelement( Current, self.value * other) )
         elif isinstance(other, Current):
             return( self.value * other.value )
         elif isinstance(other, Impedance ):
-            return( Voltage( self.value * other.value ) )
+            return( newelement( Voltage, self.value * other.value ) )
         else:
             raise TypeError(f"Cannot multiply {type(self)} with {type(other)}")
     
@@ -543,8 +792,10 @@ class Current(Electricalelement):
     # division of an Current by number returns an Current
     # division of an Current by another Current returns a Complex
     def __truediv__(self,other):
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
         if isinstance(other, ( float, int )): 
-            return( Current( self.value / other ) )
+            return( newelement( Current, self.value / other ) )
         elif isinstance(other, Current):
             return( self.value / other.value )
         else:
@@ -553,14 +804,380 @@ class Current(Electricalelement):
     # division in reverse order returns a Complex
     # division of a Voltage by a Current returns an Impedance
     def __rtruediv__(self,other):
+        if isinstance(other, ElectricalelementArray):
+            return( NotImplemented )
         if isinstance(other, ( float, int )): 
             return( other / self.value )
         elif isinstance(other, Voltage):
-            return( Impedance ( other.value / self.value ) )
+            return( newelement( Impedance, other.value / self.value ) )
         else:
             raise TypeError(f"Cannot divide {type(other)} by {type(self)}")
 
 
+# ----------------------------------------------------------
+# class for the tolerance of a component, used for Monte Carlo analysis
+# tol is relative, 0.05 for a 5% part
+# dist "uniform" spreads values evenly over nominal * (1 +- tol),
+# dist "normal" uses a gaussian with tol as 3 standard deviations
+# ----------------------------------------------------------
+class Tolerance:
+    
+    distributions = ("uniform", "normal")
+    
+    def __init__(self, tol, dist = "uniform"):
+        if dist not in Tolerance.distributions:
+            raise ValueError(f"Unknown distribution {dist}, use one of {Tolerance.distributions}")
+        if not tol >= 0:
+            raise ValueError("A tolerance cannot be negative")
+        self.tol = tol
+        self.dist = dist
+    
+    # return a machine readable representation of a Tolerance
+    def __repr__(self):
+        return( f"Tolerance({self.tol},'{self.dist}')" )
+    
+    # return an ndarray of shape size with values of nominal drawn from the
+    # distribution, rng is a numpy random Generator
+    def sample(self, nominal, size, rng):
+        if np is None:
+            raise ImportError("Tolerance.sample needs numpy")
+        if self.dist == "uniform":
+            deviation = rng.uniform( -self.tol, self.tol, size )
+        else:
+            deviation = rng.normal( 0.0, self.tol / 3, size )
+        return( nominal * ( 1 + deviation ) )
+
+
+# ----------------------------------------------------------
+# class for a bounded cache of impedances keyed on (element type, value, frequency)
+# the least recently used impedance is dropped when the cache is full
+# elements are immutable so cached Impedance objects can be shared safely
+# ----------------------------------------------------------
+class Impedancecache:
+    
+    # maxsize is the number of impedances kept, 0 disables the cache
+    def __init__(self, maxsize = 16384):
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    # return a machine readable representation of an Impedancecache
+    def __repr__(self):
+        return( f"Impedancecache(maxsize={self.maxsize})" )
+    
+    # return the cached impedance for key or None
+    def lookup(self, key):
+        if not self.maxsize:
+            return( None )
+        Z = self.entries.get( key )
+        if Z is None:
+            self.misses += 1
+        else:
+            self.entries.move_to_end( key )
+            self.hits += 1
+        return( Z )
+    
+    def store(self, key, Z):
+        if self.maxsize:
+            self.entries[key] = Z
+            if len( self.entries ) > self.maxsize:
+                self.entries.popitem( last = False )
+    
+    # change the number of impedances kept, 0 disables the cache
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        while len( self.entries ) > maxsize:
+            self.entries.popitem( last = False )
+    
+    # empty the cache and reset the statistics
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    # return the hit and miss statistics as a dict
+    def info(self):
+        lookups = self.hits + self.misses
+        return( { "hits": self.hits, "misses": self.misses, "size": len( self.entries ), \
+            "maxsize": self.maxsize, "hitrate": self.hits / lookups if lookups else 0.0 } )
+
+
+# cache used by Capacitance.getimpedance() and Inductance.getimpedance()
+impedancecache = Impedancecache()
+
+
+# ----------------------------------------------------------
+# generic class for an array of element values, all operations broadcast
+# the values are kept in a complex numpy array so a whole frequency sweep
+# is calculated in one go instead of one object per frequency
+# ----------------------------------------------------------
+class ElectricalelementArray:
+    
+    unit = ""
+    scalarclass = Electricalelement
+    
+    # numpy ufuncs mapped on the operators of these classes
+    _ufuncoperators = { "add": ("__add__", "__radd__"), "subtract": ("__sub__", "__rsub__"), \
+        "multiply": ("__mul__", "__rmul__"), "divide": ("__truediv__", "__rtruediv__") }
+    
+    # initialising using an array, list, number, string or another element
+    def __init__(self, value = 0):
+        if np is None:
+            raise ImportError(f"{type(self).__name__} needs numpy")
+        if isinstance( value, (Electricalelement, ElectricalelementArray) ):
+            value = value.value
+        elif isinstance( value, str ):
+            value = Electricalelement.metricprefixtofloat( value )
+        try:
+            self.value = np.asarray( value, dtype=complex )
+        except (TypeError, ValueError):
+            raise TypeError(f"Not able to initialise {type(self).__name__} using a {type(value)}")
+    
+    # return a machine readable representation
+    def __repr__(self):
+        return( f"{type(self).__name__}({self.value!r})" )
+    
+    # string representation
+    def __str__(self):
+        if np.all( self.value.imag == 0 ):
+            return( f"{self.value.real} {self.unit}" )
+        else:
+            return( f"{self.value} {self.unit}" )
+    
+    # numpy functions such as np.abs() and np.angle() work on the values directly
+    def __array__(self, dtype = None, copy = None):
+        return( np.asarray( self.value, dtype = dtype ) )
+    
+    # arithmetic with an ndarray is handed to the operators of the element
+    # any other ufunc, like np.abs, is applied to the values and returns an ndarray
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        operators = self._ufuncoperators.get( ufunc.__name__ )
+        if method == "__call__" and operators is not None and len(inputs) == 2 and not kwargs:
+            if inputs[0] is self:
+                result = getattr( self, operators[0] )( inputs[1] )
+            else:
+                result = getattr( self, operators[1] )( inputs[0] )
+            if result is NotImplemented:
+                raise TypeError(f"Cannot apply {ufunc.__name__} to {type(inputs[0])} and {type(inputs[1])}")
+            return( result )
+        inputs = [ x.value if isinstance(x, ElectricalelementArray) else x for x in inputs ]
+        return( getattr( ufunc, method )( *inputs, **kwargs ) )
+    
+    def __len__(self):
+        return( len( self.value ) )
+    
+    # indexing returns a scalar element, slicing returns an array element
+    def __getitem__(self, index):
+        item = self.value[index]
+        if np.ndim( item ) == 0:
+            return( self.scalarclass( complex( item ) ) )
+        return( type(self)( item ) )
+    
+    @property
+    def shape(self):
+        return( self.value.shape )
+    
+    # returns True if other is an element of the same kind, scalar or array
+    def _issamekind(self, other):
+        return( isinstance( other, (self.scalarclass, type(self)) ) )
+    
+    # returns True if other is a plain number or numpy array of numbers
+    @staticmethod
+    def _isnumber(other):
+        return( isinstance( other, (int, float, complex, np.ndarray, np.number) ) )
+    
+    # negation returns an array of the same kind
+    def __neg__(self):
+        return( type(self)( -self.value ) )
+    
+    # adding two elements of the same kind returns an array of the same kind
+    def __add__(self, other):
+        if self._issamekind(other):
+            return( type(self)( self.value + other.value ) )
+        return( NotImplemented )
+    
+    __radd__ = __add__
+    
+    # subtracting two elements of the same kind returns an array of the same kind
+    def __sub__(self, other):
+        if self._issamekind(other):
+            return( type(self)( self.value - other.value ) )
+        return( NotImplemented )
+    
+    def __rsub__(self, other):
+        if self._issamekind(other):
+            return( type(self)( other.value - self.value ) )
+        return( NotImplemented )
+    
+    # multiplication times a number returns an array of the same kind
+    # multiplication times an element of the same kind returns a complex ndarray
+    def __mul__(self, other):
+        if self._isnumber(other):
+            return( type(self)( self.value * other ) )
+        elif self._issamekind(other):
+            return( self.value * other.value )
+        return( NotImplemented )
+    
+    # multiplication in reverse order
+    def __rmul__(self, other):
+        return( self.__mul__(other) )
+    
+    # division by a number returns an array of the same kind
+    # division by an element of the same kind returns a complex ndarray
+    def __truediv__(self, other):
+        if self._isnumber(other):
+            return( type(self)( self.value / other ) )
+        elif self._issamekind(other):
+            return( self.value / other.value )
+        return( NotImplemented )
+    
+    # division in reverse order returns a complex ndarray
+    def __rtruediv__(self, other):
+        if self._isnumber(other):
+            return( other / self.value )
+        elif self._issamekind(other):
+            return( other.value / self.value )
+        return( NotImplemented )
+    
+    # instance method, return an ndarray of strings representing the values with metric prefix
+    # formatted for all values at once, same rules as Electricalelement.tometricprefix()
+    def tometricprefix(self, precision=3):
+        realstr = Electricalelement.floattometricprefixarray( self.value.real, self.unit, precision )
+        imagstr = Electricalelement.floattometricprefixarray( np.abs( self.value.imag ), self.unit, precision )
+        sign = np.where( self.value.imag < 0, ")-(", ")+(" )
+        complexstr = joinstrings( "(", realstr, sign, imagstr, ")j" )
+        return( np.where( self.value.imag == 0, realstr, complexstr ) )
+    
+    # return modulus and phase in radians as two ndarrays
+    def polar(self):
+        return( np.hypot( self.value.real, self.value.imag ), np.angle( self.value ) )
+    
+    def topolar(self, phaseprecision=3):
+        modulus, phase = self.polar()
+        phase = np.round( phase, phaseprecision )
+        return( joinstrings( modulus.astype( str ), f" {self.unit} {chr(0x2220)} ", phase.astype( str ), " radians" ) )
+    
+    def topolardeg(self, phaseprecision=3):
+        modulus, phase = self.polar()
+        phasedeg = np.round( np.degrees( phase ), phaseprecision )
+        return( joinstrings( modulus.astype( str ), f" {self.unit} {chr(0x2220)} ", phasedeg.astype( str ), "°" ) )
+
+
+# -----------------------------------------------------------------       
+# Class for an array of impedances, for instance one value per frequency
+# -----------------------------------------------------------------       
+class ImpedanceArray(ElectricalelementArray):
+    
+    unit = "Ohm"
+    scalarclass = Impedance
+    
+    # multiplication times a current returns a VoltageArray
+    def __mul__(self, other):
+        if isinstance( other, (Current, CurrentArray) ):
+            return( VoltageArray( self.value * other.value ) )
+        return( super().__mul__(other) )
+    
+    # division of a Voltage by an impedance returns a CurrentArray
+    def __rtruediv__(self, other):
+        if isinstance( other, (Voltage, VoltageArray) ):
+            return( CurrentArray( other.value / self.value ) )
+        return( super().__rtruediv__(other) )
+    
+    # instance method to calculate parallel impedance of this instance with n other impedances
+    def parallelwith(self, *impedances):
+        return( ImpedanceArray.parallel( self, *impedances ) )
+    
+    # static method to calculate equivalent impedances of n parallel impedances,
+    # scalar Impedance objects and ImpedanceArray objects can be mixed
+    @staticmethod
+    def parallel(*impedances):
+        sumofinverse = sum( [ 1 / z.value for z in impedances ] )
+        return( ImpedanceArray( 1 / sumofinverse ) )
+
+
+# ----------------------------------------------------------
+# class for an array of voltages
+# ----------------------------------------------------------
+class VoltageArray(ElectricalelementArray):
+    
+    unit = "V"
+    scalarclass = Voltage
+    
+    # division by an impedance returns a CurrentArray
+    # division by a current returns an ImpedanceArray
+    def __truediv__(self, other):
+        if isinstance( other, (Impedance, ImpedanceArray) ):
+            return( CurrentArray( self.value / other.value ) )
+        elif isinstance( other, (Current, CurrentArray) ):
+            return( ImpedanceArray( self.value / other.value ) )
+        return( super().__truediv__(other) )
+
+
+# ----------------------------------------------------------
+# class for an array of currents
+# ----------------------------------------------------------
+class CurrentArray(ElectricalelementArray):
+    
+    unit = "A"
+    scalarclass = Current
+    
+    # multiplication times an impedance returns a VoltageArray
+    def __mul__(self, other):
+        if isinstance( other, (Impedance, ImpedanceArray) ):
+            return( VoltageArray( self.value * other.value ) )
+        return( super().__mul__(other) )
+    
+    # division of a Voltage by a current returns an ImpedanceArray
+    def __rtruediv__(self, other):
+        if isinstance( other, (Voltage, VoltageArray) ):
+            return( ImpedanceArray( other.value / self.value ) )
+        return( super().__rtruediv__(other) )
+
+
+# round an array to a number of decimals like np.round, also returns a mask of the
+# values close to halfway where the result can differ from python's exact round()
+def roundarray(x, decimals):
+    scaled = x * 10.0 ** decimals
+    fraction = np.abs( scaled - np.floor( scaled ) - 0.5 )
+    ties = fraction < 1E-7 * np.maximum( 1, np.abs( scaled ) * 1E-9 )
+    return( np.round( x, decimals ), ties & np.isfinite( x ) )
+
+
+# concatenate arrays or strings elementwise into an ndarray of strings
+def joinstrings(*parts):
+    result = parts[0]
+    for part in parts[1:]:
+        result = np.char.add( result, part )
+    return( np.asarray( result ) )
+
+
+# write columns as lines of text to an open file, for instance a csv file
+# columns can be ndarrays of strings or numbers or element arrays, element
+# arrays are written with metric prefix
+# rows are joined with numpy a chunk at a time, no python objects are made per cell
+def writetable(file, columns, header = None, delimiter = ",", chunksize = 65536, precision = 3):
+    if header is not None:
+        file.write( delimiter.join( header ) + "\n" )
+    rows = min( len(column) for column in columns )
+    for start in range( 0, rows, chunksize ):
+        stop = min( start + chunksize, rows )
+        parts = []
+        for column in columns:
+            if isinstance( column, ElectricalelementArray ):
+                part = column[start:stop].tometricprefix( precision )
+            else:
+                part = np.asarray( column[start:stop] ).astype( str )
+            parts.extend( [ part, delimiter ] )
+        lines = joinstrings( *parts[:-1], "\n" )
+        file.write( "".join( lines.tolist() ) )
+
+
 # --- tests --------------------------        
+# python -m elements with circuit description files runs them with batchrunner.py
 if __name__ == "__main__":
+    import sys
+    if len( sys.argv ) > 1:
+        import batchrunner
+        sys.exit( batchrunner.main( sys.argv[1:] ) )
     import test_elements
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+#
+#  eseries.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# selection of standard E-series component values for a design
+#
+# the values of a series are enumerated over the decades of a range as
+# one sorted ndarray, combinations are never enumerated in full:
+# bounds on the products of the values are turned into index ranges with
+# np.searchsorted so only combinations within the bounds are generated
+# the remaining candidates are ranked on their frequency response,
+# evaluated for all candidates at once with compile_transfer()
+#
+# this module defines:
+#
+# class Design
+# function eseries(series, low, high)
+# function pairsinproduct(a, b, low, high)
+# function rankdesigns(fn, candidates, frequency, target, top = 10)
+# function sallenkeylowpass(f0, Q, ...)
+
+import math
+import numpy as np
+from elements import * # module containing classes for Resistance, Capacitance, ..
+from transfercompiler import *
+
+
+# mantissas of the E-series, E48 and E96 follow from 10 ** (i / n) rounded to 3 digits
+eseriesmantissas = {
+    "E6": ( 1.0, 1.5, 2.2, 3.3, 4.7, 6.8 ),
+    "E12": ( 1.0, 1.2, 1.5, 1.8, 2.2, 2.7, 3.3, 3.9, 4.7, 5.6, 6.8, 8.2 ),
+    "E24": ( 1.0, 1.1, 1.2, 1.3, 1.5, 1.6, 1.8, 2.0, 2.2, 2.4, 2.7, 3.0,
+             3.3, 3.6, 3.9, 4.3, 4.7, 5.1, 5.6, 6.2, 6.8, 7.5, 8.2, 9.1 ),
+    "E48": tuple( round( 10 ** (i / 48), 2 ) for i in range(48) ),
+    "E96": tuple( round( 10 ** (i / 96), 2 ) for i in range(96) ),
+}
+
+
+# return the sorted ndarray of values of an E-series between low and high
+# low and high can be numbers or strings with metric prefix
+def eseries(series, low, high):
+    if series not in eseriesmantissas:
+        raise ValueError(f"Unknown series {series}, use one of {list(eseriesmantissas)}")
+    if isinstance( low, str ):
+        low = Electricalelement.metricprefixtofloat( low )
+    if isinstance( high, str ):
+        high = Electricalelement.metricprefixtofloat( high )
+    values = []
+    for decade in range( math.floor( math.log10( low ) ), math.floor( math.log10( high ) ) + 1 ):
+        # through a string so 4.7 * 10**3 is exactly 4700.0
+        values.extend( float( f"{mantissa}e{decade}" ) for mantissa in eseriesmantissas[series] )
+    values = np.array( values )
+    return( values[ ( values >= low * (1 - 1E-9) ) & ( values <= high * (1 + 1E-9) ) ] )
+
+
+# return the index arrays (i, j) of all pairs with low <= a[i] * b[j] <= high
+# b must be sorted, low and high can be arrays broadcasting with a
+# every a[i] gives a contiguous range of j found with np.searchsorted
+def pairsinproduct(a, b, low, high):
+    a = np.asarray( a )
+    first = np.searchsorted( b, low / a, side = "left" )
+    last = np.searchsorted( b, high / a, side = "right" )
+    counts = np.maximum( last - first, 0 )
+    i = np.repeat( np.arange( len(a) ), counts )
+    # offsets within the range of every a[i]
+    offset = np.arange( counts.sum() ) - np.repeat( np.cumsum( counts ) - counts, counts )
+    return( i, np.repeat( first, counts ) + offset )
+
+
+# ----------------------------------------------------------
+# class for a design, a set of elements with its figures and error
+# ----------------------------------------------------------
+class Design:
+
+    def __init__(self, elements, error, **figures):
+        self.elements = elements # name -> Resistance, Capacitance, ..
+        self.error = error # rms error in dB of the response with the target
+        self.figures = figures # for instance f0 and Q
+
+    # return a machine readable representation of a Design
+    def __repr__(self):
+        elements = ", ".join( f"{name}={x.tometricprefix()}" for name, x in self.elements.items() )
+        figures = ", ".join( f"{name}={value:.4g}" for name, value in self.figures.items() )
+        return( f"Design({elements}, {figures}, error={self.error:.3g} dB)" )
+
+
+# rank candidate designs on the rms difference in dB between their response and target
+# candidates is a dict of element name -> ndarray of values, one entry per candidate
+# fn is evaluated for all candidates over frequency with compile_transfer(),
+# in chunks so the temporary arrays take about membytes
+# returns the indexes of the top best candidates and their errors
+def rankdesigns(fn, candidates, frequency, target, top = 10, membytes = 2**26):
+    compiled = compile_transfer( fn )
+    f = np.asarray( frequency, dtype=float )
+    targetdb = 20 * np.log10( np.abs( target ) )
+    count = len( next( iter( candidates.values() ) ) )
+    chunk = max( 1, membytes // ( 16 * len(f) * compiled.nodecount ) )
+    errors = np.empty( count )
+    arguments = dict( compiled.defaults )
+    for start in range( 0, count, chunk ):
+        for name, values in candidates.items():
+            arguments[name] = values[ start:start + chunk, None ]
+        responsedb = 20 * np.log10( np.abs( compiled.kernel( f, **arguments ) ) )
+        errors[ start:start + chunk ] = np.sqrt( np.mean( ( responsedb - targetdb ) ** 2, axis = 1 ) )
+    best = np.argpartition( errors, top - 1 )[:top] if count > top else np.arange( count )
+    best = best[ np.argsort( errors[best] ) ]
+    return( best, errors[best] )
+
+
+# unity gain Sallen Key low pass as in sallen_key_with_elements_numpy.py
+def sallenkeytransfer():
+    R1, R2 = Resistance("10k"), Resistance("10k")
+    C3, C4 = Capacitance("1nF"), Capacitance("1nF")
+    def Vout_divby_Vin( freq ):
+        Z1 = R1
+        Z2 = R2
+        Z3 = C3.getimpedance( freq )
+        Z4 = C4.getimpedance( freq )
+        numerator = Z3 * Z4
+        denominator = Z1 * Z2 + Z3 * (Z1 + Z2) + Z3 * Z4
+        return( numerator / denominator )
+    return( Vout_divby_Vin )
+
+
+# choose E-series values for R1, R2, C3 and C4 of a unity gain Sallen Key low pass
+# with cutoff f0 and quality factor Q, both within a relative tolerance
+# w0 = 1 / sqrt(R1 R2 C3 C4) and Q = sqrt(R1 R2 C3 C4) / (C4 (R1 + R2))
+#
+# pruning works on bounds:
+# Q <= sqrt(C3 / C4) / 2 so capacitor pairs with C3 / C4 < 4 Q**2 are skipped,
+# f0 fixes the product R1 R2 C3 C4, so for every capacitor pair and R1
+# only a narrow range of R2 remains, R1 and R2 can be swapped so R2 >= R1
+# the candidates meeting f0 and Q are ranked on their response from f0 / 10 to 10 f0
+# returns a list of the top Design objects
+def sallenkeylowpass(f0, Q, resistors = "E96", capacitors = "E12", resistance = (1E3, 1E6), \
+        capacitance = (100E-12, 1E-6), tolerance = 0.01, top = 10, fn = None):
+    r = eseries( resistors, *resistance )
+    c = eseries( capacitors, *capacitance )
+    w0 = 2 * math.pi * f0
+    product = 1 / w0**2
+    # capacitor pairs with C3 / C4 large enough to reach Q
+    i4, i3 = pairsinproduct( 1 / c, c, 4 * ( Q * (1 - tolerance) )**2, math.inf )
+    C3, C4 = c[i3], c[i4]
+    # for every capacitor pair and R1, the range of R2 meeting f0
+    # f0 and Q do not change when R1 and R2 are swapped, so only R2 >= R1 is kept
+    R1grid = np.tile( r, len(C3) )
+    Cproduct = np.repeat( C3 * C4, len(r) )
+    low = np.maximum( product / (1 + tolerance)**2 / Cproduct, R1grid**2 )
+    k1, k2 = pairsinproduct( R1grid, r, low, product / (1 - tolerance)**2 / Cproduct )
+    pair = k1 // len(r)
+    R1, R2, C3, C4 = R1grid[k1], r[k2], C3[pair], C4[pair]
+    # exact figures of the remaining candidates
+    tau = np.sqrt( R1 * R2 * C3 * C4 )
+    f0s = 1 / ( 2 * math.pi * tau )
+    Qs = tau / ( C4 * ( R1 + R2 ) )
+    keep = np.abs( Qs / Q - 1 ) <= tolerance
+    R1, R2, C3, C4, f0s, Qs = R1[keep], R2[keep], C3[keep], C4[keep], f0s[keep], Qs[keep]
+    if len( R1 ) == 0:
+        return( [] )
+    frequency = np.geomspace( f0 / 10, f0 * 10, num = 200 )
+    s = 1j * frequency / f0
+    target = 1 / ( 1 + s / Q + s**2 )
+    best, errors = rankdesigns( fn or sallenkeytransfer(), { "R1": R1, "R2": R2, "C3": C3, "C4": C4 }, \
+        frequency, target, top )
+    return( [ Design( { "R1": Resistance( float(R1[k]) ), "R2": Resistance( float(R2[k]) ), \
+        "C3": Capacitance( float(C3[k]) ), "C4": Capacitance( float(C4[k]) ) }, float(error), \
+        f0 = float(f0s[k]), Q = float(Qs[k]) ) for k, error in zip( best, errors ) ] )
+
+
+# --- tests --------------------------
+if __name__ == "__main__":
+    import test_eseries
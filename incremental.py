@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+#
+#  incremental.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# lazy expression graph of element arithmetic, evaluated incrementally
+#
+# calculations with lazy elements, like Zrl.parallelwith( ... ) or
+# R1 + Zparallel, only record a node in a graph, using the Tracer of
+# transfercompiler.py, the graph is evaluated when asked for a frequency grid
+# every node keeps its array result per frequency grid, changing the value
+# of an element only clears the nodes downstream of it, so evaluating
+# again only recomputes those nodes and reuses all others
+#
+# this module defines:
+#
+# class Lazygraph(Tracegraph)
+# class Incrementaltransfer
+# function incremental_transfer(fn, elements = None)
+
+import collections
+import numpy as np
+from elements import * # module containing classes for Resistance, Capacitance, ..
+from transfercompiler import *
+
+
+# numpy operation for every binary node
+binaryoperations = { "add": np.add, "sub": np.subtract, "mul": np.multiply, "div": np.true_divide, "pow": np.power }
+
+
+# ----------------------------------------------------------
+# class for an expression graph of lazy elements with cached results
+# ----------------------------------------------------------
+class Lazygraph(Tracegraph):
+
+    def __init__(self, maxgrids = 4):
+        super().__init__()
+        self.values = {} # element name -> value
+        self.elements = {} # element name -> its node
+        self.dependents = collections.defaultdict( list ) # node index -> indexes of the nodes using it
+        self.results = [] # ( frequency grid, { node index -> array } ), most recently used last
+        self.maxgrids = maxgrids # number of frequency grids kept
+        self.reused = 0
+        self.recomputed = 0
+
+    # return a machine readable representation of a Lazygraph
+    def __repr__(self):
+        return( f"Lazygraph({len(self.nodes)} nodes, {len(self.values)} elements)" )
+
+    # record the users of every new node so changes can be passed downstream
+    def node(self, op, args, kind):
+        count = len( self.nodes )
+        node = super().node( op, args, kind )
+        if len( self.nodes ) > count:
+            for arg in args:
+                if isinstance( arg, Tracer ):
+                    self.dependents[arg.index].append( node.index )
+        return( node )
+
+    # the frequency as a lazy node
+    @property
+    def frequency(self):
+        return( self.node( "freq", (), None ) )
+
+    # return a lazy stand-in for an element, calculations with it build nodes of this graph
+    def element(self, name, element):
+        self.values[name] = element.value
+        self.elements[name] = self.node( "param", (name,), kindof(element) )
+        return( self.elements[name] )
+
+    # change the value of an element, given as element, number or string with metric prefix
+    # only the nodes downstream of the element are cleared
+    def set(self, name, value):
+        if name not in self.values:
+            raise KeyError(f"Lazygraph has no element named {name}")
+        if isinstance( value, (Electricalelement, ElectricalelementArray) ):
+            value = value.value
+        elif isinstance( value, str ):
+            value = Electricalelement.metricprefixtofloat( value )
+        if np.array_equal( value, self.values[name] ): # values can be arrays
+            return
+        self.values[name] = value.copy() if isinstance( value, np.ndarray ) else value # changed in place is changed
+        self.invalidate( self.elements[name] )
+
+    # clear the cached results of node and everything downstream of it
+    def invalidate(self, node):
+        stale = set()
+        stack = [ node.index ]
+        while stack:
+            index = stack.pop()
+            if index not in stale:
+                stale.add( index )
+                stack.extend( self.dependents[index] )
+        for grid, results in self.results:
+            for index in stale:
+                results.pop( index, None )
+
+    # cached results of a frequency grid, the least recently used grid is dropped
+    # grids are compared by value, a copy of every grid is kept
+    def gridresults(self, f):
+        for i, (grid, results) in enumerate( self.results ):
+            if grid.shape == f.shape and np.array_equal( grid, f ):
+                self.results.append( self.results.pop( i ) )
+                return( results )
+        self.results.append( ( f.copy(), {} ) )
+        if len( self.results ) > self.maxgrids:
+            self.results.pop( 0 )
+        return( self.results[-1][1] )
+
+    # evaluate a node over an array of frequencies, returns an array class for its kind
+    # holding a read only view of the cached result
+    def evaluate(self, output, frequency):
+        f = np.asarray( frequency, dtype=float )
+        output = self.operand( output )
+        results = self.gridresults( f )
+        needed = set()
+        stack = [ output ]
+        while stack:
+            node = stack.pop()
+            if node.index not in needed:
+                needed.add( node.index )
+                stack.extend( arg for arg in node.args if isinstance(arg, Tracer) )
+        for index in sorted( needed ): # nodes are created after their arguments
+            if index in results:
+                self.reused += 1
+                continue
+            node = self.nodes[index]
+            args = [ results[arg.index] for arg in node.args if isinstance(arg, Tracer) ]
+            if node.op == "freq":
+                result = f
+            elif node.op == "param":
+                result = self.values[ node.args[0] ]
+            elif node.op == "const":
+                result = node.args[0]
+            elif node.op == "value":
+                result = args[0]
+            elif node.op == "neg":
+                result = np.negative( args[0] )
+            elif node.op == "parallel":
+                result = 1 / sum( 1 / arg for arg in args )
+            else:
+                result = binaryoperations[node.op]( args[0], args[1] )
+            results[index] = result
+            self.recomputed += 1
+        # a read only view, the cached result itself must not be changed
+        result = np.broadcast_to( np.asarray( results[output.index], dtype=complex ), f.shape )
+        if output.kind in arrayclasses:
+            return( arrayclasses[output.kind]( result ) )
+        return( result )
+
+    # reset the reused and recomputed counters
+    def resetcounters(self):
+        self.reused = 0
+        self.recomputed = 0
+
+
+# ----------------------------------------------------------
+# class for a transferfunction traced once into a Lazygraph
+# calling it evaluates incrementally, set() changes element values by name
+# ----------------------------------------------------------
+class Incrementaltransfer:
+
+    def __init__(self, graph, output):
+        self.graph = graph
+        self.output = output
+
+    # return a machine readable representation of an Incrementaltransfer
+    def __repr__(self):
+        return( f"Incrementaltransfer({', '.join(self.graph.values)})" )
+
+    def __call__(self, frequency):
+        return( self.graph.evaluate( self.output, frequency ) )
+
+    # change element values by name, for instance set( C1 = "6nF" )
+    def set(self, **values):
+        for name, value in values.items():
+            self.graph.set( name, value )
+
+    # number of nodes reused and recomputed since the last call of resetcounters()
+    def counters(self):
+        return( { "reused": self.graph.reused, "recomputed": self.graph.recomputed } )
+
+    def resetcounters(self):
+        self.graph.resetcounters()
+
+
+# trace a transferfunction fn( frequency ) using elements into an Incrementaltransfer
+# the elements are found and replaced like compile_transfer() does
+def incremental_transfer(fn, elements = None):
+    names = elementnames( fn, elements )
+    graph = Lazygraph()
+    replacements = { name: graph.element( name, x ) for name, x in names.items() }
+    frequency = graph.frequency
+    with standins( fn, replacements ):
+        result = fn( frequency )
+    output = graph.operand( result )
+    if output is None:
+        raise TypeError(f"Cannot trace a transferfunction returning a {type(result)}")
+    return( Incrementaltransfer( graph, output ) )
+
+
+# --- tests --------------------------
+if __name__ == "__main__":
+    import test_incremental
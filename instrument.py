@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+#
+#  instrument.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# opt-in instrumentation of the classes of elements.py
+#
+#   with instrumented() as stats:
+#       H = np.vectorize( Vout_divby_Vin )( f )
+#   print( stats.report() )
+#
+# entering the context replaces the constructors, operators, parse and format
+# methods, getimpedance, parallel and series combinations and the impedance
+# cache of elements.py by counting and timing wrappers, leaving it puts the
+# original methods back, so outside the context nothing is changed and
+# nothing costs time
+#
+# times are the own time of every method, without the time of the methods of
+# elements.py it calls, the cost of the wrappers themselves is measured when
+# entering and taken out, what is left of the time in the context is spent
+# outside elements.py, for instance in np.vectorize or the transferfunction
+# the wrappers are not thread safe, only instrument a single thread
+#
+# this module defines:
+#
+# class Instrumentation
+# function instrumented()
+
+import time
+import collections
+import elements # module containing classes for Resistance, Capacitance, ..
+
+
+# symbol of every operator method, reflected methods have their operands swapped
+operatorsymbols = { "__add__": "+", "__radd__": "+", "__sub__": "-", "__rsub__": "-", "__mul__": "*", \
+    "__rmul__": "*", "__truediv__": "/", "__rtruediv__": "/", "__neg__": "-" }
+
+# category of every other instrumented method
+methodcategories = { "__init__": "construction", "metricprefixtofloat": "parse", "parse_many": "parse", \
+    "floattometricprefix": "format", "floattometricprefixarray": "format", "tometricprefix": "format", \
+    "topolar": "format", "topolardeg": "format", "getimpedance": "getimpedance", "parallel": "combination", \
+    "parallelwith": "combination", "series": "combination", "serieswith": "combination", \
+    "lookup": "cache", "store": "cache" }
+
+instrumentedclasses = ( "Electricalelement", "Impedance", "Resistance", "Capacitance", "Inductance", "Voltage", \
+    "Current", "ElectricalelementArray", "ImpedanceArray", "VoltageArray", "CurrentArray", "Impedancecache" )
+
+
+# ----------------------------------------------------------
+# class collecting counts and times of the methods of elements.py
+# used as a context manager, only active inside the with block
+# ----------------------------------------------------------
+class Instrumentation:
+
+    def __init__(self):
+        self.calls = collections.Counter() # (category, name) -> number of calls
+        self.owntime = collections.Counter() # (category, name) -> seconds spent in the method itself
+        self.created = collections.Counter() # class name -> objects created
+        self.elapsed = 0.0 # seconds spent inside the with block
+        self.overhead = ( 0.0, 0.0 ) # seconds added by a wrapper outside and inside the measured time, see calibrate()
+        self.stack = [] # one [time of instrumented calls below, object] per active call
+        self.originals = [] # (owner, name, original attribute) to restore
+        self.active = False
+
+    # return a machine readable representation of an Instrumentation
+    def __repr__(self):
+        return( f"Instrumentation({sum( self.calls.values() )} calls, {self.elapsed:.3f} s)" )
+
+    def __enter__(self):
+        if self.active:
+            raise RuntimeError("Instrumentation is already active")
+        self.overhead = self.calibrate()
+        self.install()
+        self.active = True
+        self.start = time.perf_counter()
+        return( self )
+
+    def __exit__(self, *exception):
+        self.elapsed += time.perf_counter() - self.start
+        self.uninstall()
+        self.active = False
+        return( False )
+
+    # wrapper counting and timing calls of fn under category and name
+    # name is a function of the arguments for operators and constructors
+    def wrap(self, fn, category, name, constructed = None):
+        stack, calls, owntime = self.stack, self.calls, self.owntime
+        outside, inside = self.overhead
+        perf_counter = time.perf_counter
+        def wrapper(*args, **kwargs):
+            frame = [ 0.0, args[0] if args else None ]
+            stack.append( frame )
+            start = perf_counter()
+            try:
+                return( fn( *args, **kwargs ) )
+            finally:
+                elapsed = perf_counter() - start
+                stack.pop()
+                if stack:
+                    stack[-1][0] += elapsed + outside
+                key = ( category, name( args ) if callable( name ) else name )
+                calls[key] += 1
+                owntime[key] += elapsed - frame[0] - inside
+                if constructed is not None:
+                    constructed( args, stack )
+        wrapper.__wrapped__ = fn
+        wrapper.__name__ = getattr( fn, "__name__", "wrapper" )
+        return( wrapper )
+
+    # replace the methods of elements.py by wrappers
+    def install(self):
+        def replace(owner, name, attribute):
+            self.originals.append( ( owner, name, vars( owner )[name] ) )
+            setattr( owner, name, attribute )
+        for classname in instrumentedclasses:
+            cls = getattr( elements, classname )
+            for name, attribute in list( vars( cls ).items() ):
+                fn = attribute.__func__ if isinstance( attribute, staticmethod ) else attribute
+                if not callable( fn ) or isinstance( attribute, (classmethod, property) ):
+                    continue
+                if name in operatorsymbols:
+                    wrapper = self.wrap( fn, "operators", operatorname( name ) )
+                elif name == "__init__":
+                    wrapper = self.wrap( fn, "construction", f"{classname}.__init__", self.countinit )
+                elif name in methodcategories:
+                    wrapper = self.wrap( fn, methodcategories[name], f"{classname}.{name}" )
+                else:
+                    continue
+                replace( cls, name, staticmethod( wrapper ) if isinstance( attribute, staticmethod ) else wrapper )
+        # results of calculations are made by newelement(), a global of elements.py
+        replace( elements, "newelement", self.wrap( elements.newelement, "construction", \
+            lambda args: f"newelement({args[0].__name__})", self.countnew ) )
+
+    # put the original methods back
+    def uninstall(self):
+        while self.originals:
+            owner, name, attribute = self.originals.pop()
+            setattr( owner, name, attribute )
+
+    # count an object once, also when __init__ calls the __init__ of its base class
+    def countinit(self, args, stack):
+        if not ( stack and stack[-1][1] is args[0] ):
+            self.created[ type( args[0] ).__name__ ] += 1
+
+    def countnew(self, args, stack):
+        self.created[ args[0].__name__ ] += 1
+
+    # seconds a wrapper adds to the time of its caller outside and inside the
+    # measured time of the call, the best of some repeats
+    def calibrate(self, count = 2000):
+        probe = Instrumentation()
+        empty = lambda a, b: None
+        wrapped = probe.wrap( empty, "", operatorname( "__add__" ) ) # an operator also formats its name
+        outside, inside = float( "inf" ), float( "inf" )
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(count):
+                empty( 1, 2 )
+            bare = time.perf_counter() - start
+            probe.owntime.clear()
+            start = time.perf_counter()
+            for _ in range(count):
+                wrapped( 1, 2 )
+            total = time.perf_counter() - start
+            own = sum( probe.owntime.values() )
+            outside = min( outside, ( total - own ) / count )
+            inside = min( inside, ( own - bare ) / count )
+        return( max( outside, 0.0 ), max( inside, 0.0 ) )
+
+    # seconds per category, including "outside elements.py" for the rest of the time in the context
+    def categorytimes(self):
+        times = collections.Counter()
+        for (category, name), seconds in self.owntime.items():
+            times[category] += seconds
+        calls = sum( self.calls.values() )
+        times["outside elements.py"] = max( self.elapsed - sum( times.values() ) - calls * sum( self.overhead ), 0.0 )
+        return( times )
+
+    # text report of the time per category, the methods taking the most time,
+    # the objects created per class and the operator calls per type pair
+    def report(self, top = 10):
+        times = self.categorytimes()
+        total = sum( times.values() ) or 1.0
+        calls = collections.Counter()
+        for (category, name), count in self.calls.items():
+            calls[category] += count
+        lines = [ f"{sum( calls.values() )} calls in {self.elapsed:.3f} s, about {sum( times.values() ):.3f} s without instrumentation", \
+            f"{sum( self.overhead ) * 1E9:.0f} ns instrumentation overhead per call taken out", "" ]
+        lines.append( f"{'category':34}{'calls':>12}{'time':>12}{'share':>9}" )
+        lines.append( "-"*67 )
+        for category, seconds in times.most_common():
+            lines.append( f"{category:34}{calls.get( category, 0 ):>12}{seconds:>11.4f}s{seconds / total:>8.1%}" )
+        lines += [ "", f"{'method':34}{'calls':>12}{'time':>12}{'share':>9}", "-"*67 ]
+        for (category, name), seconds in self.owntime.most_common( top ):
+            lines.append( f"{name:34}{self.calls[(category, name)]:>12}{seconds:>11.4f}s{seconds / total:>8.1%}" )
+        lines += [ "", "objects created per class", "-"*67 ]
+        lines += [ f"{name:34}{count:>12}" for name, count in self.created.most_common() ]
+        lines += [ "", "operator calls per type pair", "-"*67 ]
+        lines += [ f"{name:34}{count:>12}" for name, count in self.operatorcalls().most_common( top ) ]
+        return( "\n".join( lines ) )
+
+    # number of operator calls per type pair, like "Impedance * float"
+    def operatorcalls(self):
+        return( collections.Counter( { name: count for (category, name), count in self.calls.items() \
+            if category == "operators" } ) )
+
+    # bring all counters back to zero
+    def reset(self):
+        self.calls.clear()
+        self.owntime.clear()
+        self.created.clear()
+        self.elapsed = 0.0
+
+
+# name of an operator call as written, for instance "Impedance * float" or "-Capacitance"
+def operatorname(method):
+    symbol = operatorsymbols[method]
+    if method == "__neg__":
+        return( lambda args: f"{symbol}{type( args[0] ).__name__}" )
+    if method in ("__radd__", "__rsub__", "__rmul__", "__rtruediv__"):
+        return( lambda args: f"{type( args[1] ).__name__} {symbol} {type( args[0] ).__name__}" )
+    return( lambda args: f"{type( args[0] ).__name__} {symbol} {type( args[1] ).__name__}" )
+
+
+# return a new Instrumentation to use as context manager
+def instrumented():
+    return( Instrumentation() )
+
+
+# --- tests --------------------------
+if __name__ == "__main__":
+    import test_instrument
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+#
+#  rational.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# transferfunction as a ratio of two polynomials in s = j * 2 * pi * f
+#
+# a transferfunction written with the classes of elements.py is traced
+# once like compile_transfer() does, every node of the graph is then
+# worked out as a numerator and denominator polynomial, the frequency
+# being s / (2 pi j), an impedance of a Capacitance 1 / (s C) and of an
+# Inductance s L
+# common factors s ** k are removed as they appear, poles and zeros which
+# cancel are removed at the end
+#
+# coefficients are in descending powers of s, as np.polyval and np.roots use them
+#
+# this module defines:
+#
+# class RationalTF
+# function rational_transfer(fn, elements = None)
+
+import math
+import numpy as np
+from elements import * # module containing classes for Resistance, Capacitance, ..
+from transfercompiler import *
+
+
+# ----------------------------------------------------------
+# class for a transferfunction numerator(s) / denominator(s)
+# ----------------------------------------------------------
+class RationalTF:
+
+    def __init__(self, numerator, denominator = (1.0,), kind = None):
+        self.numerator = realcoefficients( numerator )
+        self.denominator = realcoefficients( denominator )
+        self.kind = kind # Impedance, Voltage, .. or None for a ratio
+
+    # return a machine readable representation of a RationalTF
+    def __repr__(self):
+        return( f"RationalTF({self.numerator.tolist()}, {self.denominator.tolist()})" )
+
+    # string representation as a fraction of polynomials in s
+    def __str__(self):
+        numerator, denominator = polynomialstring( self.numerator ), polynomialstring( self.denominator )
+        width = max( len(numerator), len(denominator) )
+        return( f"{numerator:^{width}}\n{'-' * width}\n{denominator:^{width}}" )
+
+    # evaluate over an array of frequencies, using Horner's rule for
+    # form "horner" or the products of the distances to poles and zeros for form "zpk"
+    def __call__(self, frequency, form = "horner"):
+        s = 2j * math.pi * np.asarray( frequency, dtype=float )
+        if form == "horner":
+            result = horner( self.numerator, s ) / horner( self.denominator, s )
+        elif form == "zpk":
+            result = np.full( s.shape, self.gain, dtype=complex )
+            for zero in self.zeros:
+                result *= s - zero
+            for pole in self.poles:
+                result /= s - pole
+        else:
+            raise ValueError(f"Unknown form {form}, use 'horner' or 'zpk'")
+        if self.kind in arrayclasses:
+            return( arrayclasses[self.kind]( result ) )
+        return( result )
+
+    @property
+    def order(self):
+        return( len( self.denominator ) - 1 )
+
+    @property
+    def poles(self):
+        return( np.roots( self.denominator ) )
+
+    @property
+    def zeros(self):
+        return( np.roots( self.numerator ) )
+
+    # ratio of the highest coefficients, the factor of the pole zero product form
+    @property
+    def gain(self):
+        return( self.numerator[0] / self.denominator[0] )
+
+    # natural angular frequency and quality factor of a second order denominator
+    # a s**2 + b s + c, w0 = sqrt(c / a) and Q = sqrt(a c) / b
+    @property
+    def w0(self):
+        a, b, c = self.secondorder()
+        return( math.sqrt( c / a ) )
+
+    @property
+    def f0(self):
+        return( self.w0 / ( 2 * math.pi ) )
+
+    @property
+    def Q(self):
+        a, b, c = self.secondorder()
+        return( math.sqrt( a * c ) / b )
+
+    def secondorder(self):
+        if self.order != 2:
+            raise ValueError(f"w0 and Q need a second order denominator, this one is of order {self.order}")
+        return( [ float( np.real( x ) ) for x in self.denominator ] )
+
+
+# evaluate a polynomial with coefficients in descending powers at the points s
+def horner(coefficients, s):
+    result = np.full( s.shape, coefficients[0], dtype=complex )
+    for coefficient in coefficients[1:]:
+        result *= s
+        result += coefficient
+    return( result )
+
+
+# polynomial as a string like 1e-09 s^2 + 0.0002 s + 1
+def polynomialstring(coefficients):
+    order = len( coefficients ) - 1
+    terms = []
+    for i, coefficient in enumerate( coefficients ):
+        power = order - i
+        if coefficient != 0:
+            terms.append( f"{coefficient:.4g}" + ( "" if power == 0 else " s" if power == 1 else f" s^{power}" ) )
+    return( " + ".join( terms ) or "0" )
+
+
+# coefficients as a float ndarray when their imaginary parts are only rounding errors
+def realcoefficients(coefficients):
+    coefficients = np.atleast_1d( np.asarray( coefficients, dtype=complex ) )
+    if np.all( np.abs( coefficients.imag ) <= 1E-9 * np.max( np.abs( coefficients ) ) ):
+        return( coefficients.real.copy() )
+    return( coefficients )
+
+
+# ----------------------------------------------------------
+# rational arithmetic on (numerator, denominator) pairs of coefficient arrays
+# ----------------------------------------------------------
+
+# remove leading zeros and common factors s ** k
+def simplify(numerator, denominator):
+    numerator = np.trim_zeros( numerator, "f" )
+    denominator = np.trim_zeros( denominator, "f" )
+    if len( numerator ) == 0:
+        return( np.zeros(1, dtype=complex), np.ones(1, dtype=complex) )
+    if len( denominator ) == 0:
+        raise ZeroDivisionError("Transferfunction has a zero denominator")
+    common = min( len(numerator) - len( np.trim_zeros( numerator, "b" ) ), len(denominator) - len( np.trim_zeros( denominator, "b" ) ) )
+    if common:
+        numerator, denominator = numerator[:-common], denominator[:-common]
+    return( numerator, denominator )
+
+
+def rationaladd(a, b, sign = 1):
+    if len( a[1] ) == len( b[1] ) and np.array_equal( a[1], b[1] ): # same denominator
+        return( simplify( np.polyadd( a[0], sign * b[0] ), a[1] ) )
+    return( simplify( np.polyadd( np.polymul( a[0], b[1] ), sign * np.polymul( b[0], a[1] ) ), np.polymul( a[1], b[1] ) ) )
+
+
+def rationalmul(a, b):
+    if len( a[1] ) == len( b[0] ) and np.array_equal( a[1], b[0] ): # a[1] cancels against b[0]
+        return( simplify( a[0], b[1] ) )
+    if len( b[1] ) == len( a[0] ) and np.array_equal( b[1], a[0] ):
+        return( simplify( b[0], a[1] ) )
+    return( simplify( np.polymul( a[0], b[0] ), np.polymul( a[1], b[1] ) ) )
+
+
+def rationaldiv(a, b):
+    return( rationalmul( a, ( b[1], b[0] ) ) )
+
+
+# remove poles and zeros closer together than tolerance, relative to their size
+def cancel(numerator, denominator, tolerance = 1E-6):
+    zeros, poles = list( np.roots( numerator ) ), list( np.roots( denominator ) )
+    if not zeros or not poles:
+        return( numerator, denominator )
+    cancelled = False
+    for zero in list( zeros ):
+        distances = [ abs( zero - pole ) for pole in poles ]
+        k = int( np.argmin( distances ) )
+        if distances[k] <= tolerance * max( abs(zero), abs(poles[k]), 1E-300 ):
+            zeros.remove( zero )
+            poles.pop( k )
+            cancelled = True
+    if not cancelled:
+        return( numerator, denominator )
+    gain = numerator[0] / denominator[0]
+    return( gain * np.poly( zeros ) if zeros else np.array( [gain] ), np.poly( poles ) if poles else np.ones(1) )
+
+
+# work out every node needed for output as a rational function of s
+def rationalnodes(graph, output, values):
+    needed = set()
+    stack = [ output ]
+    while stack:
+        node = stack.pop()
+        if node.index not in needed:
+            needed.add( node.index )
+            stack.extend( arg for arg in node.args if isinstance(arg, Tracer) )
+    one = np.ones(1, dtype=complex)
+    results = {}
+    for index in sorted( needed ):
+        node = graph.nodes[index]
+        args = [ results[arg.index] for arg in node.args if isinstance(arg, Tracer) ]
+        if node.op == "freq": # f = s / (2 pi j)
+            result = ( np.array( [ 1 / ( 2j * math.pi ), 0 ] ), one )
+        elif node.op == "param":
+            result = ( np.array( [ values[ node.args[0] ] ], dtype=complex ), one )
+        elif node.op == "const":
+            result = ( np.array( [ node.args[0] ], dtype=complex ), one )
+        elif node.op == "value":
+            result = args[0]
+        elif node.op == "neg":
+            result = ( -args[0][0], args[0][1] )
+        elif node.op == "add":
+            result = rationaladd( args[0], args[1] )
+        elif node.op == "sub":
+            result = rationaladd( args[0], args[1], -1 )
+        elif node.op == "mul":
+            result = rationalmul( args[0], args[1] )
+        elif node.op == "div":
+            result = rationaldiv( args[0], args[1] )
+        elif node.op == "pow":
+            exponent = args[1][0][0].real
+            if len( args[1][0] ) != 1 or len( args[1][1] ) != 1 or exponent != int( exponent ):
+                raise TypeError("Only constant integer powers can be written as a rational function")
+            base = args[0] if exponent >= 0 else ( args[0][1], args[0][0] )
+            result = ( one, one )
+            for _ in range( abs( int( exponent ) ) ):
+                result = rationalmul( result, base )
+        elif node.op == "parallel":
+            result = ( one * 0, one )
+            for arg in args:
+                result = rationaladd( result, ( arg[1], arg[0] ) )
+            result = ( result[1], result[0] )
+        else:
+            raise TypeError(f"Cannot write {node.op} as a rational function")
+        results[index] = result
+    return( results[output.index] )
+
+
+# trace a transferfunction fn( frequency ) using elements into a RationalTF
+# the elements are found like compile_transfer() does, their values at the time of
+# the call are worked into the coefficients
+def rational_transfer(fn, elements = None, tolerance = 1E-6):
+    graph, output, values, kinds = tracetransfer( fn, elements )
+    numerator, denominator = cancel( *rationalnodes( graph, output, values ), tolerance )
+    # scale so the lowest order coefficient of the denominator, or else its highest, is 1
+    scale = np.trim_zeros( denominator, "b" )[-1]
+    return( RationalTF( numerator / scale, denominator / scale, output.kind ) )
+
+
+# --- tests --------------------------
+if __name__ == "__main__":
+    import test_rational
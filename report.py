@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+#
+#  report.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# headless Bode plots and tables of transferfunctions, for batch runs
+#
+# matplotlib is only imported when a plot is made, and then without pyplot:
+# a Figure drawn by the Agg backend is written to a file, so nothing waits
+# for a window and no global backend is changed
+# a dense sweep is decimated to the resolution of the plot before drawing,
+# per pixel column of the frequency axis only the points with the smallest
+# and largest magnitude and phase are kept, so peaks and notches stay visible
+#
+# batchreport() writes the reports of many circuits in worker processes,
+# a transferfunction to report is a CompiledTransfer, see compile_transfer(),
+# or any function of an array of frequencies defined at module level,
+# so it can be sent to a worker process
+#
+# this module defines:
+#
+# class Reportjob
+# function decimate(frequency, values, points = 2000)
+# function bodetable(file, frequency, values, decimals = 4)
+# function bodeplot(path, frequency, values, title = "", points = 2000)
+# function makereport(job, directory, plot = True, table = True, points = 2000)
+# function batchreport(jobs, directory, workers = None, plot = True, table = True, points = 2000)
+
+import os
+import functools
+import concurrent.futures
+import numpy as np
+from elements import * # module containing classes for Resistance, Capacitance, ..
+
+
+# ----------------------------------------------------------
+# class for the report of one transferfunction
+# transfer is evaluated for an ndarray of frequencies, values are
+# passed on by name, for instance element values of a CompiledTransfer
+# ----------------------------------------------------------
+class Reportjob:
+
+    def __init__(self, name, transfer, frequency, **values):
+        self.name = name # name of the files written
+        self.transfer = transfer
+        self.frequency = frequency # ndarray or Frequencyrange of sweep.py
+        self.values = values
+
+    # return a machine readable representation of a Reportjob
+    def __repr__(self):
+        return( f"Reportjob({self.name!r}, {len(self.frequency)} frequencies)" )
+
+    # complex ndarray of the transferfunction at every frequency
+    def evaluate(self):
+        f = np.asarray( self.frequency[:], dtype=float )
+        return( f, np.broadcast_to( np.asarray( self.transfer( f, **self.values ), dtype=complex ), f.shape ) )
+
+
+# positions of the points to draw for a plot points pixels wide, frequencies on a logarithmic scale
+# per pixel column the points of smallest and largest magnitude and phase are kept,
+# and the first and last point, a sweep of at most 4 * points frequencies is kept as it is
+def decimate(frequency, values, points = 2000):
+    frequency = np.asarray( frequency, dtype=float )
+    values = np.asarray( values, dtype=complex )
+    n = len( frequency )
+    if n <= 4 * points:
+        return( np.arange( n ) )
+    order = np.argsort( frequency, kind="stable" )
+    logf = np.log10( frequency[order] )
+    span = logf[-1] - logf[0] or 1.0
+    column = np.minimum( ( ( logf - logf[0] ) / span * points ).astype( int ), points - 1 )
+    # columns are contiguous runs in frequency order
+    starts = np.flatnonzero( np.r_[ True, column[1:] != column[:-1] ] )
+    run = np.repeat( np.arange( len( starts ) ), np.diff( np.r_[ starts, n ] ) )
+    keep = [ np.array( [ 0, n - 1 ] ) ]
+    for series in ( np.abs( values[order] ), np.angle( values[order] ) ):
+        for reduce in ( np.minimum, np.maximum ):
+            extreme = reduce.reduceat( series, starts )
+            hits = np.flatnonzero( series == extreme[run] )
+            keep.append( hits[ np.r_[ True, run[hits][1:] != run[hits][:-1] ] ] ) # first hit per column
+    return( order[ np.unique( np.concatenate( keep ) ) ] )
+
+
+# write frequency, magnitude in dB and phase in degrees as csv lines to an open file
+def bodetable(file, frequency, values, decimals = 4):
+    values = np.asarray( values, dtype=complex )
+    with np.errstate( divide="ignore" ):
+        db = 20 * np.log10( np.abs( values ) )
+    writetable( file, [ np.asarray( frequency, dtype=float ), np.round( db, decimals ), \
+        np.round( np.degrees( np.angle( values ) ), decimals ) ], header = [ "frequency (Hz)", "magnitude (dB)", "phase (degrees)" ] )
+
+
+# draw magnitude in dB and phase in degrees over a logarithmic frequency axis into the
+# file path, the format follows from its extension, for instance .png, .svg or .pdf
+# matplotlib is imported here, a dense sweep is decimated to points pixel columns first
+def bodeplot(path, frequency, values, title = "", points = 2000):
+    from matplotlib.figure import Figure # no pyplot, so no window and no interactive backend
+    frequency = np.asarray( frequency, dtype=float )
+    values = np.asarray( values, dtype=complex )
+    keep = decimate( frequency, values, points )
+    f, h = frequency[keep], values[keep]
+    with np.errstate( divide="ignore" ):
+        db = 20 * np.log10( np.abs( h ) )
+    figure = Figure( figsize = ( points / 200, 7 ), dpi = 200 )
+    magnitude, phase = figure.subplots( 2, 1, sharex = True )
+    magnitude.semilogx( f, db, linewidth = 1 )
+    magnitude.set_ylabel( "magnitude (dB)" )
+    magnitude.grid( True, which = "both" )
+    magnitude.set_title( title )
+    phase.semilogx( f, np.degrees( np.angle( h ) ), linewidth = 1 )
+    phase.set_xlabel( "frequency (Hz)" )
+    phase.set_ylabel( "phase (degrees)" )
+    phase.grid( True, which = "both" )
+    figure.savefig( path )
+    return( len( keep ) )
+
+
+# evaluate job and write its table name.csv and plot name.png in directory
+# returns a dict with the paths written and the number of points plotted
+def makereport(job, directory, plot = True, table = True, points = 2000):
+    f, values = job.evaluate()
+    written = { "name": job.name, "frequencies": len( f ) }
+    if table:
+        written["table"] = os.path.join( directory, f"{job.name}.csv" )
+        with open( written["table"], "w" ) as file:
+            bodetable( file, f, values )
+    if plot:
+        written["plot"] = os.path.join( directory, f"{job.name}.png" )
+        written["plotted"] = bodeplot( written["plot"], f, values, job.name, points )
+    return( written )
+
+
+# write the reports of a list of Reportjob in directory, workers > 1 uses a process pool
+# returns the results of makereport() in the order of jobs
+def batchreport(jobs, directory, workers = None, plot = True, table = True, points = 2000):
+    os.makedirs( directory, exist_ok = True )
+    report = functools.partial( makereport, directory = directory, plot = plot, table = table, points = points )
+    if workers is not None and workers > 1 and len( jobs ) > 1:
+        with concurrent.futures.ProcessPoolExecutor( max_workers = workers ) as pool:
+            return( list( pool.map( report, jobs ) ) )
+    return( [ report( job ) for job in jobs ] )
+
+
+# --- tests --------------------------
+if __name__ == "__main__":
+    import test_report
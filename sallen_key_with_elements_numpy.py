@@ -24,9 +24,16 @@
 #  using classes contained in elements.py
 #  and Numpy + Matplotlib
 # ******************************************
+#
+# usage:
+#   python sallen_key_with_elements_numpy.py                  print the values and show the plot
+#   python sallen_key_with_elements_numpy.py --noplot         only print the values
+#   python sallen_key_with_elements_numpy.py --report DIR     write the plot and table to DIR without showing anything
+# matplotlib is only imported when a plot is made, the question before
+# the plot is only asked when running in a terminal
+import sys
 import math
 import cmath
-import matplotlib.pyplot as plt
 import numpy as np
 from elements import * # module containing classes for Resistance, Capacitance, ..
 
@@ -71,9 +78,9 @@ def Vout_divby_Vin( freq ):
 # prepare a list with frequency values to be evenly spaced on a logaritmic scale
 f = np.round( np.geomspace(500, 200000, num=30), 0)
 
-# apply the transferfunction to the frequencies using numpy.vectorize
-Vec_Vout_divby_Vin = np.vectorize( Vout_divby_Vin )
-H = Vec_Vout_divby_Vin( f )
+# apply the transferfunction to all frequencies at once
+# getimpedance() returns an ImpedanceArray when given a numpy array of frequencies
+H = Vout_divby_Vin( f )
 
 # real and imag values to polar
 Hmagnitude = np.abs( H )
@@ -96,9 +103,24 @@ print("-"*60)
 for freq, mag, phase in zip(f, Hmagnitude_dB, Hphasedeg):
     print( f"{freq:>15}Hz |  {mag:>15.2f} dB |  {phase:>15.1f}° |" )
 
-input("Hit ENTER key for plot")
+# write the plot and table to files using report.py, for batch runs
+if "--report" in sys.argv:
+    import os
+    from report import bodeplot, bodetable
+    directory = sys.argv[ sys.argv.index("--report") + 1 ]
+    os.makedirs( directory, exist_ok = True )
+    with open( os.path.join( directory, "sallen_key.csv" ), "w" ) as file:
+        bodetable( file, f, np.asarray( H ) )
+    bodeplot( os.path.join( directory, "sallen_key.png" ), f, np.asarray( H ), "Sallen Key low pass filter" )
+    sys.exit()
+if "--noplot" in sys.argv:
+    sys.exit()
+
+if sys.stdin.isatty():
+    input("Hit ENTER key for plot")
 
 # plot the values using matplotlib
+import matplotlib.pyplot as plt
 plt.figure(figsize=(15, 10), num="Sallen Key low pass filter")
 plt.subplot(2, 1, 1)
 plt.xscale("log")
@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+#
+#  spice.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# importer for a practical subset of SPICE netlists, for instance .cir files
+#
+#   Sallen Key low pass                  the first line is the title
+#   .param R=10k C=1n
+#   V1 in 0 DC 0 AC 1
+#   R1 in a {R}
+#   X1 a out lowpass C={2*C}
+#   .subckt lowpass in out C=1n          parameters with a default, also after params:
+#   R1 in out 1k
+#   C1 out 0 {C}
+#   .ends
+#   .ac dec 10 1 1meg
+#   .end
+#
+# cards R, C, L, V, I and E (voltage controlled voltage source), .param,
+# .subckt with .ends expanded for every X instance, and .ac for the frequencies
+# other dot cards are kept in a list of ignored cards
+# names, nodes and parameters are not case sensitive, they are kept in lower case
+# a line starting with * is a comment, ; starts a comment in a line, + continues a card
+#
+# values use the SPICE suffixes, meg for 1E6 and m for 1E-3, any letters
+# after the suffix such as a unit are ignored, they are converted to the
+# metric prefixes of metricprefixtofloat() which parses them
+# expressions in {} or '' may use parameters, + - * / **, parentheses and
+# the functions sqrt, exp, log, log10, abs, min, max, sin, cos and pi
+#
+# the file is read line by line and every card is expanded into components when
+# it is read, only cards using a parameter or subcircuit defined further on wait
+# for the end, spicecomponents() yields the components without keeping them
+# parsed netlists are cached by a hash of the content of the file, in memory
+# and optionally as json files in a directory
+#
+# this module defines:
+#
+# class Netlist
+# class Parsecache, with the instance parsecache used by readnetlist()
+# function spicecards(lines, title = True)
+# function spicevalue(word, scope = None)
+# function spicecomponents(lines, title = True, netlist = None)
+# function parsenetlist(lines, title = True)
+# function readnetlist(path, cache = parsecache, title = True)
+
+import os
+import re
+import ast
+import math
+import copy
+import json
+import functools
+import hashlib
+import operator
+import tempfile
+import collections
+import numpy as np
+from elements import * # module containing classes for Resistance, Capacitance, ..
+from circuit import *
+
+
+# number with a SPICE suffix and letters after it, for instance 4.7k, 10meg, 1uF or 100pF
+spicenumberpattern = re.compile( r"([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)(meg|[tgkmunpf])?[a-z]*", re.IGNORECASE )
+# the same inside an expression, not part of a name like log10 or r2
+expressionnumberpattern = re.compile( r"(?<![\w.])" + spicenumberpattern.pattern, re.IGNORECASE )
+spiceprefixes = { "t": "T", "g": "G", "meg": "M", "k": "k", "m": "m", "u": "u", "n": "n", "p": "p", "f": "f" }
+
+# words of a card, an expression in {} or '' is a single word
+spicewordpattern = re.compile( r"\{[^}]*\}|'[^']*'|[^\s,()]+" )
+
+# operators and functions allowed in expressions
+expressionoperators = { ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, \
+    ast.Div: operator.truediv, ast.Pow: operator.pow, ast.USub: operator.neg, ast.UAdd: operator.pos }
+expressionfunctions = { "sqrt": math.sqrt, "exp": math.exp, "log": math.log, "log10": math.log10, \
+    "abs": abs, "min": min, "max": max, "sin": math.sin, "cos": math.cos }
+
+# element class for the first letter of a card
+spiceclasses = { "r": Resistance, "c": Capacitance, "l": Inductance, "v": Voltage, "i": Current }
+
+
+# ----------------------------------------------------------
+# class for an imported netlist, components after expanding all subcircuits
+# components are ( name, kind, nodes, value ), kind being the first letter of the
+# card, for an e card the nodes are the two output nodes followed by the control nodes
+# ----------------------------------------------------------
+class Netlist:
+
+    def __init__(self, title = ""):
+        self.title = title
+        self.components = []
+        self.params = {} # global parameter name -> value
+        self.subcircuits = {} # name -> Subcircuit
+        self.frequency = None # frequencies of an .ac card
+        self.ignored = [] # dot cards not imported, as text
+
+    # return a machine readable representation of a Netlist
+    def __repr__(self):
+        return( f"Netlist({self.title!r}, {len(self.components)} components, {len(self.connections())} nodes)" )
+
+    # a copy which can be changed without changing this Netlist, components are tuples and shared
+    def copy(self):
+        netlist = Netlist( self.title )
+        netlist.components = list( self.components )
+        netlist.params = dict( self.params )
+        netlist.subcircuits = copy.deepcopy( self.subcircuits )
+        netlist.frequency = None if self.frequency is None else self.frequency.copy()
+        netlist.ignored = list( self.ignored )
+        return( netlist )
+
+    # the Netlist as a dict of lists, strings and numbers for json, complex values as [ real, imag ]
+    def todata(self):
+        def number(value):
+            return( [ value.real, value.imag ] if isinstance( value, complex ) else value )
+        return( { "title": self.title, \
+            "components": [ [ name, kind, list( nodes ), number( value ) ] for name, kind, nodes, value in self.components ], \
+            "params": self.params, \
+            "subcircuits": { name: [ sub.ports, sub.defaults, sub.cards ] for name, sub in self.subcircuits.items() }, \
+            "frequency": None if self.frequency is None else self.frequency.tolist(), \
+            "ignored": self.ignored } )
+
+    # a Netlist from the result of todata()
+    @staticmethod
+    def fromdata(data):
+        def number(value):
+            return( complex( *value ) if isinstance( value, list ) else float( value ) )
+        netlist = Netlist( str( data["title"] ) )
+        netlist.components = [ ( str( name ), str( kind ), tuple( map( str, nodes ) ), number( value ) ) \
+            for name, kind, nodes, value in data["components"] ]
+        netlist.params = { str( name ): float( value ) for name, value in data["params"].items() }
+        for name, ( ports, defaults, cards ) in data["subcircuits"].items():
+            netlist.subcircuits[name] = Subcircuit( name, list( ports ), dict( defaults ) )
+            netlist.subcircuits[name].cards = [ ( int( number ), list( words ) ) for number, words in cards ]
+        netlist.frequency = None if data["frequency"] is None else np.array( data["frequency"], dtype=float )
+        netlist.ignored = [ str( card ) for card in data["ignored"] ]
+        return( netlist )
+
+    # the element objects by component name, an e card has its gain as value
+    def elements(self):
+        return( { name: spiceclasses[kind]( value ) if kind in spiceclasses else value \
+            for name, kind, nodes, value in self.components } )
+
+    # node name -> names of the components connected to it
+    def connections(self):
+        connections = collections.defaultdict( list )
+        for name, kind, nodes, value in self.components:
+            for node in dict.fromkeys( nodes ):
+                connections[node].append( name )
+        return( dict( connections ) )
+
+    # the netlist as a Circuit of circuit.py, ground is node 0
+    def circuit(self):
+        circuit = Circuit( ground = "0" )
+        for name, kind, nodes, value in self.components:
+            if kind == "e":
+                circuit.addvcvs( name, *nodes, value )
+            else:
+                circuit.add( name, spiceclasses[kind]( value ), *nodes )
+        return( circuit )
+
+
+# ----------------------------------------------------------
+# class for a .subckt definition, its cards are expanded for every instance
+# ----------------------------------------------------------
+class Subcircuit:
+
+    def __init__(self, name, ports, defaults):
+        self.name = name
+        self.ports = ports
+        self.defaults = defaults # parameter name -> expression
+        self.cards = [] # ( line number, words )
+
+    # return a machine readable representation of a Subcircuit
+    def __repr__(self):
+        return( f"Subcircuit({self.name!r}, {self.ports}, {len(self.cards)} cards)" )
+
+
+# ----------------------------------------------------------
+# class for a cache of parsed netlists keyed by a hash of the file content
+# the most recently used netlists are kept in memory, with a directory
+# they are also written to disk as json files, shared between runs
+# json only holds plain values, so a file in the directory never runs code
+# every lookup returns a copy, changing it does not change the cache
+# ----------------------------------------------------------
+class Parsecache:
+
+    def __init__(self, maxsize = 32, directory = None):
+        self.entries = collections.OrderedDict() # key -> Netlist, most recently used last
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs( directory, exist_ok = True )
+
+    # return a machine readable representation of a Parsecache
+    def __repr__(self):
+        return( f"Parsecache(maxsize={self.maxsize}, directory={self.directory!r})" )
+
+    def path(self, key):
+        return( os.path.join( self.directory, f"{key}.json" ) )
+
+    # a copy of the Netlist for key, None when it is not cached
+    def lookup(self, key):
+        netlist = self.entries.get( key )
+        if netlist is None and self.directory is not None:
+            try:
+                with open( self.path( key ) ) as file:
+                    netlist = Netlist.fromdata( json.load( file ) )
+                self.remember( key, netlist )
+            except (OSError, ValueError, KeyError, TypeError): # missing, not complete or not a netlist
+                netlist = None
+        if netlist is None:
+            self.misses += 1
+            return( None )
+        self.entries.move_to_end( key )
+        self.hits += 1
+        return( netlist.copy() )
+
+    # keep a copy of netlist under key
+    def store(self, key, netlist):
+        self.remember( key, netlist.copy() )
+        if self.directory is not None: # written under a temporary name and renamed when complete
+            descriptor, temporary = tempfile.mkstemp( dir = self.directory, suffix = ".tmp" )
+            try:
+                with os.fdopen( descriptor, "w" ) as file:
+                    json.dump( netlist.todata(), file )
+                os.replace( temporary, self.path( key ) )
+            except BaseException:
+                if os.path.exists( temporary ):
+                    os.remove( temporary )
+                raise
+
+    def remember(self, key, netlist):
+        self.entries[key] = netlist
+        self.entries.move_to_end( key )
+        while len( self.entries ) > self.maxsize:
+            self.entries.popitem( last = False )
+
+    # forget all netlists kept in memory, the files on disk are kept
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return( { "hits": self.hits, "misses": self.misses, "size": len( self.entries ), "maxsize": self.maxsize } )
+
+
+parsecache = Parsecache()
+
+
+# yield the cards of the lines of a netlist as ( line number, words ), one at a time
+# comments are removed and + lines are joined to the card before them,
+# with title = True the first line is the title and yielded as ( 1, [ "*title", text ] )
+# the lines are read one by one, so a file object is never read in completely
+def spicecards(lines, title = True):
+    card, start = None, 0
+    for number, line in enumerate( lines, 1 ):
+        if number == 1 and title:
+            yield ( 1, [ "*title", line.strip() ] )
+            continue
+        line = line.split( ";", 1 )[0].strip()
+        if not line or line.startswith( "*" ):
+            continue
+        words = spicewordpattern.findall( re.sub( r"\s*=\s*", "=", line ) )
+        if line.startswith( "+" ):
+            if card is None:
+                raise ValueError(f"line {number}: continuation without a card")
+            card.extend( words[1:] if words[0] == "+" else [ words[0][1:] ] + words[1:] )
+            continue
+        if card is not None:
+            yield ( start, card )
+        card, start = words, number
+    if card is not None:
+        yield ( start, card )
+
+
+# value of a word, a number with SPICE suffix, a parameter name or an expression
+# in {} or '', parameters are looked up in scope, a dict of name -> value
+def spicevalue(word, scope = None):
+    scope = scope or {}
+    match = spicenumberpattern.fullmatch( word )
+    if match is not None:
+        mantissa, prefix = match.groups()
+        return( Electricalelement.metricprefixtofloat( mantissa + spiceprefixes.get( ( prefix or "" ).lower(), "" ) ) )
+    if word[0] in "{'":
+        word = word[1:-1]
+    # numbers with suffix become plain numbers, then the expression is evaluated
+    expression = expressionnumberpattern.sub( lambda match: repr( spicevalue( match.group(0) ) ), word )
+    try:
+        return( evaluate( parseexpression( expression.strip() ), scope ) )
+    except SyntaxError:
+        raise ValueError(f"'{word}' is not a valid value or expression") from None
+
+
+# expression tree of an expression, the same expressions return for every instance of a subcircuit
+@functools.lru_cache( maxsize = 1024 )
+def parseexpression(expression):
+    return( ast.parse( expression, mode = "eval" ).body )
+
+
+# evaluate an expression tree of numbers, parameters, operators and functions
+def evaluate(node, scope):
+    if isinstance( node, ast.Constant ) and isinstance( node.value, (int, float) ):
+        return( node.value )
+    if isinstance( node, ast.Name ):
+        name = node.id.lower()
+        if name in scope:
+            return( scope[name] )
+        if name == "pi":
+            return( math.pi )
+        raise NameError(f"unknown parameter {node.id}")
+    if isinstance( node, ast.BinOp ) and type( node.op ) in expressionoperators:
+        return( expressionoperators[ type( node.op ) ]( evaluate( node.left, scope ), evaluate( node.right, scope ) ) )
+    if isinstance( node, ast.UnaryOp ) and type( node.op ) in expressionoperators:
+        return( expressionoperators[ type( node.op ) ]( evaluate( node.operand, scope ) ) )
+    if isinstance( node, ast.Call ) and isinstance( node.func, ast.Name ) and node.func.id.lower() in expressionfunctions:
+        return( expressionfunctions[ node.func.id.lower() ]( *[ evaluate( arg, scope ) for arg in node.args ] ) )
+    raise ValueError(f"'{ast.unparse( node )}' is not allowed in an expression")
+
+
+# split words like [ "R=1k", "C=1n" ] in a dict of parameter name -> expression
+def assignments(words):
+    params = {}
+    for word in words:
+        if word.lower() == "params:":
+            continue
+        name, equals, expression = word.partition( "=" )
+        if not equals:
+            raise ValueError(f"'{word}' is not a parameter assignment")
+        params[name.lower()] = expression
+    return( params )
+
+
+# evaluate the parameter assignments of params in scope, in the order they
+# can be evaluated, so a parameter may be used before its assignment
+def evaluateparams(params, scope):
+    scope = dict( scope )
+    waiting = dict( params )
+    while waiting:
+        done = {}
+        for name, expression in waiting.items():
+            try:
+                done[name] = spicevalue( expression, scope )
+            except NameError:
+                continue
+            scope[name] = done[name]
+        if not done:
+            name, expression = next( iter( waiting.items() ) )
+            spicevalue( expression, scope ) # raises the NameError
+        for name in done:
+            del waiting[name]
+    return( scope )
+
+
+# frequencies of an .ac card, for instance [ ".ac", "dec", "10", "1", "1meg" ]
+def acfrequencies(words, scope):
+    if len( words ) != 5:
+        raise ValueError(".ac needs dec, oct or lin with points, start and stop frequency")
+    variation, points, start, stop = words[1].lower(), *( spicevalue( word, scope ) for word in words[2:] )
+    if variation == "lin":
+        return( np.linspace( start, stop, num = int( points ) ) )
+    if variation not in ("dec", "oct"):
+        raise ValueError(f"unknown variation {words[1]} of .ac")
+    per = math.log10( stop / start ) if variation == "dec" else math.log2( stop / start )
+    return( np.geomspace( start, stop, num = int( round( per * points ) ) + 1 ) )
+
+
+# yield the components of a card in the scope of an instance as ( name, kind, nodes, value )
+# prefix is the instance path, for instance "x1.", nodes maps port names to outside nodes
+# a parameter or subcircuit which is not defined raises NameError
+def expandcard(netlist, words, scope, prefix = "", nodes = {}, depth = 0):
+    kind = words[0][0].lower()
+    name = prefix + words[0].lower()
+    def node(word):
+        word = word.lower()
+        if word == "0" or word == "gnd":
+            return( "0" )
+        return( nodes.get( word ) or prefix + word )
+    if kind in ("r", "c", "l"):
+        if len( words ) < 4:
+            raise ValueError("an element needs two nodes and a value")
+        yield ( name, kind, ( node( words[1] ), node( words[2] ) ), spicevalue( words[3], scope ) )
+    elif kind in ("v", "i"):
+        if len( words ) < 3:
+            raise ValueError("a source needs two nodes")
+        yield ( name, kind, ( node( words[1] ), node( words[2] ) ), sourcevalue( words[3:], scope ) )
+    elif kind == "e":
+        if len( words ) < 6:
+            raise ValueError("a VCVS needs two nodes, two control nodes and a gain")
+        yield ( name, kind, tuple( node( word ) for word in words[1:5] ), spicevalue( words[5], scope ) )
+    elif kind == "x":
+        positional = [ word for word in words[1:] if "=" not in word and word.lower() != "params:" ]
+        if not positional:
+            raise ValueError("an instance needs nodes and a subcircuit")
+        subcircuit = netlist.subcircuits.get( positional[-1].lower() )
+        if subcircuit is None:
+            raise NameError(f"unknown subcircuit {positional[-1]}")
+        if len( positional ) - 1 != len( subcircuit.ports ):
+            raise ValueError(f"{subcircuit.name} has {len(subcircuit.ports)} ports, {len(positional) - 1} nodes are given")
+        if depth > 50:
+            raise ValueError("subcircuits are nested too deep, is one calling itself?")
+        # parameters of the instance are evaluated where it is used and override the
+        # defaults of the subcircuit, the defaults see the global parameters
+        given = assignments( [ word for word in words[1:] if "=" in word ] )
+        values = { name: spicevalue( expression, scope ) for name, expression in given.items() }
+        inner = evaluateparams( { name: expression for name, expression in subcircuit.defaults.items() \
+            if name not in values }, { **netlist.params, **values } )
+        ports = { port: node( word ) for port, word in zip( subcircuit.ports, positional[:-1] ) }
+        for number, card in subcircuit.cards:
+            yield from expandcard( netlist, card, inner, name + ".", ports, depth + 1 )
+    else:
+        raise ValueError(f"unknown card {words[0]}")
+
+
+# AC value of a V or I card from the words after its nodes, for instance
+# [ "1" ], [ "DC", "0", "AC", "1" ] or [ "AC", "1", "90" ], the AC magnitude and
+# phase in degrees if given, otherwise the DC value
+def sourcevalue(words, scope):
+    dc, ac = 0.0, None
+    i = 0
+    while i < len( words ):
+        word = words[i].lower()
+        if word == "dc" and i + 1 < len( words ):
+            dc = spicevalue( words[i + 1], scope )
+            i += 2
+        elif word == "ac":
+            magnitude = spicevalue( words[i + 1], scope ) if i + 1 < len( words ) else 1.0
+            phase = 0.0
+            if i + 2 < len( words ) and spicenumberpattern.fullmatch( words[i + 2] ):
+                phase = spicevalue( words[i + 2], scope )
+                i += 1
+            ac = magnitude * complex( math.cos( math.radians( phase ) ), math.sin( math.radians( phase ) ) ) if phase else magnitude
+            i += 2
+        elif i == 0 and ( spicenumberpattern.fullmatch( word ) or word[0] in "{'" ):
+            dc = spicevalue( words[i], scope )
+            i += 1
+        else: # transient functions like SIN(...) or PULSE(...) and their arguments
+            i += 1
+    return( ac if ac is not None else dc )
+
+
+# yield the components of the lines of a netlist one card at a time, lines can be an open file
+# title, parameters, subcircuits, frequencies and ignored cards are set in netlist
+# a card is expanded when it is read, with the parameters and subcircuits defined before it,
+# only cards using a parameter or subcircuit defined further on wait until the end
+def spicecomponents(lines, title = True, netlist = None):
+    netlist = netlist if netlist is not None else Netlist()
+    waitingparams = {} # global parameters using a parameter not yet defined
+    waiting = [] # ( line number, words ) of cards using a parameter or subcircuit not yet defined
+    ac = None
+    subcircuit = None
+    for number, words in spicecards( lines, title ):
+        keyword = words[0].lower()
+        try:
+            if keyword == "*title":
+                netlist.title = words[1]
+            elif keyword == ".end":
+                break
+            elif keyword == ".subckt":
+                if subcircuit is not None:
+                    raise ValueError("a .subckt inside a .subckt is not supported")
+                ports = [ word.lower() for word in words[2:] if "=" not in word and word.lower() != "params:" ]
+                subcircuit = Subcircuit( words[1].lower(), ports, assignments( [ word for word in words[2:] if "=" in word ] ) )
+            elif keyword == ".ends":
+                if subcircuit is None:
+                    raise ValueError(".ends without .subckt")
+                netlist.subcircuits[subcircuit.name] = subcircuit
+                subcircuit = None
+            elif keyword == ".param":
+                if subcircuit is not None:
+                    subcircuit.defaults.update( assignments( words[1:] ) )
+                else:
+                    for name, expression in assignments( words[1:] ).items():
+                        try:
+                            netlist.params[name] = spicevalue( expression, netlist.params )
+                        except NameError:
+                            waitingparams[name] = expression
+            elif keyword == ".ac":
+                ac = ( number, words )
+            elif keyword.startswith( "." ):
+                netlist.ignored.append( " ".join( words ) )
+            elif subcircuit is not None:
+                subcircuit.cards.append( ( number, words ) )
+            else:
+                try:
+                    yield from list( expandcard( netlist, words, netlist.params ) ) # nothing of a failed card
+                except NameError:
+                    waiting.append( ( number, words ) )
+        except (ValueError, ArithmeticError) as error: # ZeroDivisionError and OverflowError of expressions
+            raise ValueError(f"line {number}: {error}") from None
+    if subcircuit is not None:
+        raise ValueError(f".subckt {subcircuit.name} has no .ends")
+    try:
+        netlist.params = evaluateparams( waitingparams, netlist.params )
+    except (NameError, ValueError, ArithmeticError) as error:
+        raise ValueError(f".param: {error}") from None
+    for number, words in waiting + ( [ ac ] if ac else [] ):
+        try:
+            if words[0].lower() == ".ac":
+                netlist.frequency = acfrequencies( words, netlist.params )
+            else:
+                yield from list( expandcard( netlist, words, netlist.params ) )
+        except (NameError, ValueError, ArithmeticError) as error:
+            raise ValueError(f"line {number}: {error}") from None
+
+
+# parse the lines of a netlist into a Netlist, lines can be an open file, read a card at a time
+def parsenetlist(lines, title = True):
+    netlist = Netlist()
+    netlist.components = list( spicecomponents( lines, title, netlist ) )
+    return( netlist )
+
+
+# sha256 of the content of a file, read in blocks
+def filehash(path, blocksize = 2**20):
+    digest = hashlib.sha256()
+    with open( path, "rb" ) as file:
+        for block in iter( lambda: file.read( blocksize ), b"" ):
+            digest.update( block )
+    return( digest.hexdigest() )
+
+
+# read a netlist file into a Netlist, a file with the same content is parsed only
+# once and then taken from cache, cache = None always parses
+def readnetlist(path, cache = parsecache, title = True):
+    key = None
+    if cache is not None:
+        key = f"{filehash( path )}-{int( title )}"
+        netlist = cache.lookup( key )
+        if netlist is not None:
+            return( netlist )
+    with open( path ) as file:
+        netlist = parsenetlist( file, title )
+    if cache is not None:
+        cache.store( key, netlist )
+    return( netlist )
+
+
+# --- tests --------------------------
+if __name__ == "__main__":
+    import test_spice
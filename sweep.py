@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+#
+#  sweep.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# parametric sweep of a transferfunction written with the classes of elements.py
+# over several named axes at once, for instance frequency x R1 x C3 x temperature
+#
+# the transferfunction is compiled once with compile_transfer(), every axis
+# is given its own dimension so numpy broadcasts the compiled function over
+# the whole grid, the largest axis is cut in chunks so the temporary
+# arrays stay within a memory budget
+#
+# the result is a Sweepcube, an ndarray with a name and values for every axis
+#
+# adaptivesweep() samples a single frequency axis non-uniformly, refining
+# only where the response is curved
+#
+# sweepchunks() and streamsweep() evaluate a frequency axis too long to keep
+# in memory chunk by chunk, streamsweep() writes every chunk into an array on
+# disk, so memory use does not grow with the number of frequencies
+#
+# this module defines:
+#
+# class Sweepcube
+# class Frequencyrange
+# function sweep(fn, frequency, elements = None, membytes = 2**26, **axes)
+# function adaptivesweep(fn, low, high, dbtolerance = 0.1, degtolerance = 1.0, ...)
+# function sweepchunks(fn, frequency, chunksize = 2**16, elements = None, compile = True)
+# function streamsweep(fn, frequency, out, chunksize = 2**16, elements = None, compile = True, progress = None)
+
+import math
+import numpy as np
+from elements import * # module containing classes for Resistance, Capacitance, ..
+from transfercompiler import *
+
+
+# ----------------------------------------------------------
+# class for the labelled result of a sweep
+# values is an ndarray with one dimension per axis,
+# axes is a dict of axis name -> ndarray of the values along that axis
+# ----------------------------------------------------------
+class Sweepcube:
+
+    def __init__(self, values, axes):
+        self.values = values
+        self.axes = axes
+
+    # return a machine readable representation of a Sweepcube
+    def __repr__(self):
+        axes = ", ".join( f"{name}: {len(values)}" for name, values in self.axes.items() )
+        return( f"Sweepcube({axes})" )
+
+    def __array__(self, dtype = None, copy = None):
+        return( np.asarray( self.values, dtype=dtype ) )
+
+    @property
+    def shape(self):
+        return( self.values.shape )
+
+    # position of a named axis in the dimensions of values
+    def axisindex(self, name):
+        if name not in self.axes:
+            raise KeyError(f"Sweepcube has no axis named {name}, axes are {list(self.axes)}")
+        return( list(self.axes).index( name ) )
+
+    # select by position along named axes, an integer drops the axis,
+    # a slice or array of positions keeps it, the result is a view where numpy allows
+    def isel(self, **positions):
+        index = [ slice(None) ] * self.values.ndim
+        axes = dict( self.axes )
+        for name, position in positions.items():
+            index[ self.axisindex( name ) ] = position
+            if isinstance( position, (int, np.integer) ):
+                del axes[name]
+            else:
+                axes[name] = self.axes[name][position]
+        return( Sweepcube( self.values[ tuple(index) ], axes ) )
+
+    # select by value along named axes, the nearest value on the axis is taken
+    def sel(self, **values):
+        positions = {}
+        for name, value in values.items():
+            if isinstance( value, (str, Electricalelement) ):
+                value = axisvalues( [value] )[0]
+            positions[name] = int( np.argmin( np.abs( self.axes[name] - value ) ) )
+        return( self.isel( **positions ) )
+
+    # apply a numpy function to values keeping the axes
+    def apply(self, function):
+        return( Sweepcube( function( self.values ), dict( self.axes ) ) )
+
+    def magnitude(self):
+        return( self.apply( np.abs ) )
+
+    def db(self):
+        return( self.apply( lambda values: 20 * np.log10( np.abs( values ) ) ) )
+
+    def phase(self):
+        return( self.apply( np.angle ) )
+
+    # reduce along a named axis with a numpy function taking an axis argument,
+    # for instance cube.magnitude().reduce( np.max, "temperature" )
+    def reduce(self, function, name):
+        axes = dict( self.axes )
+        del axes[name]
+        return( Sweepcube( function( self.values, axis = self.axisindex( name ) ), axes ) )
+
+    # frequency where the magnitude first drops level dB below its value at the
+    # first frequency, for every combination of the other axes
+    # interpolated on a logarithmic frequency scale, nan where it is not reached
+    def cutoff(self, level = -3.0, name = "frequency"):
+        k = self.axisindex( name )
+        db = np.moveaxis( 20 * np.log10( np.abs( self.values ) ), k, -1 )
+        target = db[..., :1] + level
+        below = db < target
+        found = below.any( axis = -1 )
+        i = np.where( found, np.argmax( below, axis = -1 ), 1 )
+        i = np.maximum( i, 1 )[..., None]
+        logf = np.log10( self.axes[name] )
+        db0, db1 = np.take_along_axis( db, i - 1, -1 ), np.take_along_axis( db, i, -1 )
+        fraction = ( target - db0 ) / ( db1 - db0 )
+        logcutoff = logf[i - 1] + fraction * ( logf[i] - logf[i - 1] )
+        axes = dict( self.axes )
+        del axes[name]
+        return( Sweepcube( np.where( found, 10 ** logcutoff[..., 0], math.nan ), axes ) )
+
+
+# ----------------------------------------------------------
+# class for num frequencies from low to high on a logarithmic or linear scale
+# without keeping them in memory, slicing works out only the frequencies asked for
+# ----------------------------------------------------------
+class Frequencyrange:
+
+    def __init__(self, low, high, num, scale = "log"):
+        if scale not in ("log", "linear"):
+            raise ValueError(f"Unknown scale {scale}, use 'log' or 'linear'")
+        self.low, self.high, self.num, self.scale = float( low ), float( high ), int( num ), scale
+
+    # return a machine readable representation of a Frequencyrange
+    def __repr__(self):
+        return( f"Frequencyrange({self.low}, {self.high}, {self.num}, scale='{self.scale}')" )
+
+    def __len__(self):
+        return( self.num )
+
+    # frequencies of a slice as a float ndarray, like np.geomspace or np.linspace would give them
+    def __getitem__(self, index):
+        if not isinstance( index, slice ):
+            raise TypeError("Frequencyrange only supports slicing")
+        positions = range( self.num )[index]
+        i = np.arange( positions.start, positions.stop, positions.step, dtype=float )
+        fraction = i / max( self.num - 1, 1 )
+        if self.scale == "log":
+            return( self.low * ( self.high / self.low ) ** fraction )
+        return( self.low + ( self.high - self.low ) * fraction )
+
+
+# convert axis values to a float ndarray, strings with metric prefix and elements are allowed
+def axisvalues(values):
+    if isinstance( values, ElectricalelementArray ):
+        return( values.value )
+    values = list( values ) if not isinstance( values, np.ndarray ) else values
+    if isinstance( values, np.ndarray ) and values.dtype.kind in "biufc":
+        return( values )
+    # elements with a real value, like a Resistance, give a float, only strings are parsed
+    converted = [ ( x.value.real if x.value.imag == 0 else x.value ) if isinstance( x, Electricalelement ) else x for x in values ]
+    strings = [ x for x in converted if isinstance( x, str ) ]
+    if strings:
+        parsed = iter( Electricalelement.parse_many( strings ) )
+        converted = [ next( parsed ) if isinstance( x, str ) else x for x in converted ]
+    return( np.asarray( converted ) )
+
+
+# evaluate the transferfunction fn over the grid of frequency and the named axes
+# axes are element names or further arguments of fn, see compile_transfer()
+# the largest axis is evaluated in chunks so the temporaries take about membytes
+def sweep(fn, frequency, elements = None, membytes = 2**26, **axes):
+    compiled = compile_transfer( fn, elements )
+    for name in axes:
+        if name not in compiled.defaults:
+            raise TypeError(f"Transferfunction has no element or argument named {name}")
+    labels = { "frequency": np.atleast_1d( np.asarray( frequency, dtype=float ) ) }
+    labels.update( { name: np.atleast_1d( axisvalues( values ) ) for name, values in axes.items() } )
+    shape = tuple( len(values) for values in labels.values() )
+    ndim = len( shape )
+    # every axis gets its own dimension so numpy broadcasts over the grid
+    grid = {}
+    for k, (name, values) in enumerate( labels.items() ):
+        grid[name] = values.reshape( [ -1 if i == k else 1 for i in range(ndim) ] )
+    cube = np.empty( shape, dtype=complex )
+    largest = int( np.argmax( shape ) )
+    rest = math.prod( shape ) // shape[largest]
+    chunk = max( 1, membytes // ( 16 * rest * compiled.nodecount ) )
+    arguments = dict( compiled.defaults )
+    for start in range( 0, shape[largest], chunk ):
+        part = [ slice(None) ] * ndim
+        part[largest] = slice( start, start + chunk )
+        chunkgrid = { name: values[ tuple(part) ] if values.shape[largest] > 1 else values for name, values in grid.items() }
+        f = chunkgrid.pop( "frequency" )
+        arguments.update( chunkgrid )
+        cube[ tuple(part) ] = compiled.kernel( f, **arguments )
+    return( Sweepcube( cube, labels ) )
+
+
+# sweep the transferfunction fn from low to high on a non-uniform grid
+# refined where the response is curved, for instance around resonances
+# starting with initial points spaced evenly on a logarithmic scale, the midpoint of
+# every interval is evaluated and compared with the linear interpolation of its ends,
+# in dB for the magnitude and degrees for the phase, intervals off by more than the
+# tolerance are bisected again, all intervals of one pass are evaluated in one call
+# stops when every interval is within tolerance or maxpoints is reached
+# fn is compiled with compile_transfer() and elements, with compile = False any function of an
+# array of frequencies returning an array can be swept
+# returns a Sweepcube with a single frequency axis holding all evaluated points
+def adaptivesweep(fn, low, high, dbtolerance = 0.1, degtolerance = 1.0, initial = 17, \
+        maxpoints = 4000, elements = None, compile = True):
+    evaluate = compile_transfer( fn, elements ) if compile else fn
+    def response(x):
+        return( np.broadcast_to( np.asarray( evaluate( 10 ** x ), dtype=complex ), x.shape ) )
+    x = np.linspace( math.log10( low ), math.log10( high ), initial )
+    h = response( x )
+    xs, hs = [ x ], [ h ]
+    count = initial
+    # intervals still to be checked, by their ends
+    xl, xr, hl, hr = x[:-1], x[1:], h[:-1], h[1:]
+    minwidth = 1E-9 * ( x[-1] - x[0] )
+    while len( xl ) > 0 and count < maxpoints:
+        if count + len( xl ) > maxpoints: # spend what is left on the widest intervals
+            widest = np.argsort( xl - xr )[ :maxpoints - count ]
+            xl, xr, hl, hr = xl[widest], xr[widest], hl[widest], hr[widest]
+        xm = ( xl + xr ) / 2
+        hm = response( xm )
+        xs.append( xm )
+        hs.append( hm )
+        count += len( xm )
+        with np.errstate( divide="ignore", invalid="ignore" ):
+            dbl, dbm, dbr = [ 20 * np.log10( np.abs( value ) ) for value in (hl, hm, hr) ]
+            dberror = np.abs( dbm - ( dbl + dbr ) / 2 )
+            # phases relative to the left end so wrapping at 180 degrees does not matter
+            degerror = np.degrees( np.abs( np.angle( hm / hl ) - np.angle( hr / hl ) / 2 ) )
+        refine = ~( ( dberror <= dbtolerance ) & ( degerror <= degtolerance ) ) & ( xr - xl > minwidth )
+        xl, xr, hl, hr = np.concatenate( ( xl[refine], xm[refine] ) ), np.concatenate( ( xm[refine], xr[refine] ) ), \
+            np.concatenate( ( hl[refine], hm[refine] ) ), np.concatenate( ( hm[refine], hr[refine] ) )
+    x, h = np.concatenate( xs ), np.concatenate( hs )
+    order = np.argsort( x )
+    return( Sweepcube( h[order], { "frequency": 10 ** x[order] } ) )
+
+# evaluate the transferfunction fn over frequency in chunks of chunksize frequencies
+# frequency is an ndarray, for instance a np.memmap, or a Frequencyrange, only one
+# chunk of it is read at a time
+# yields a Sweepcube with a frequency axis per chunk
+# fn is compiled with compile_transfer(), with compile = False any function of an
+# array of frequencies returning an array is evaluated
+def sweepchunks(fn, frequency, chunksize = 2**16, elements = None, compile = True):
+    evaluate = compile_transfer( fn, elements ) if compile else fn
+    for start in range( 0, len( frequency ), chunksize ):
+        f = np.asarray( frequency[start:start + chunksize], dtype=float )
+        values = np.broadcast_to( np.asarray( evaluate( f ), dtype=complex ), f.shape )
+        yield Sweepcube( values, { "frequency": f } )
+
+
+# evaluate the transferfunction fn over frequency chunk by chunk into out, either
+# the path of a .npy file which is made, or an array of len( frequency ) complex
+# values such as a preallocated np.memmap
+# progress( done, total ) is called after every chunk with the number of frequencies done
+# returns out, for a path the .npy file opened as a read only memory map
+def streamsweep(fn, frequency, out, chunksize = 2**16, elements = None, compile = True, progress = None):
+    total = len( frequency )
+    path = None
+    if isinstance( out, str ):
+        path = out
+        out = np.lib.format.open_memmap( path, mode = "w+", dtype = complex, shape = (total,) )
+    elif out.shape != (total,):
+        raise ValueError(f"out has shape {out.shape}, a sweep of {total} frequencies needs ({total},)")
+    done = 0
+    for chunk in sweepchunks( fn, frequency, chunksize, elements, compile ):
+        out[done:done + len( chunk.values )] = chunk.values
+        done += len( chunk.values )
+        if progress is not None:
+            progress( done, total )
+    if isinstance( out, np.memmap ):
+        out.flush()
+    if path is not None:
+        del out
+        return( np.load( path, mmap_mode = "r" ) )
+    return( out )
+
+# --- tests --------------------------
+if __name__ == "__main__":
+    import test_sweep
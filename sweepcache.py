@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+#
+#  sweepcache.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# persistent cache of sweep results in a directory on disk
+#
+# a result is keyed by a hash of the compiled transferfunction, its source
+# and constants, so two functions doing the same calculation share results,
+# the values of the elements and further arguments, strings parsed by
+# metricprefixtofloat(), and the frequency grid
+# every result is a .npy file named after its key, a hit opens it as a read
+# only memory map without calculating anything
+#
+# files are written under a temporary name and renamed when complete, a
+# rename is atomic so processes sharing the directory never see half a file
+# the least recently used files are removed when the directory holds more
+# than maxbytes or maxentries, a hit marks a file as used by its modification time
+#
+# this module defines:
+#
+# class Sweepcache
+
+import os
+import time
+import hashlib
+import tempfile
+import numpy as np
+from elements import * # module containing classes for Resistance, Capacitance, ..
+from transfercompiler import *
+from sweep import *
+
+
+# ----------------------------------------------------------
+# class for a directory of cached sweep results
+# ----------------------------------------------------------
+class Sweepcache:
+
+    def __init__(self, directory, maxbytes = 2**30, maxentries = None):
+        self.directory = directory
+        self.maxbytes = maxbytes
+        self.maxentries = maxentries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs( directory, exist_ok = True )
+
+    # return a machine readable representation of a Sweepcache
+    def __repr__(self):
+        return( f"Sweepcache({self.directory!r}, maxbytes={self.maxbytes}, maxentries={self.maxentries})" )
+
+    def path(self, key):
+        return( os.path.join( self.directory, f"{key}.npy" ) )
+
+    # hash of the compiled transferfunction, the values of its elements and arguments and the frequency grid
+    def key(self, compiled, frequency, values = None):
+        arguments = dict( compiled.defaults )
+        for name, value in ( values or {} ).items():
+            if isinstance( value, (Electricalelement, ElectricalelementArray) ):
+                value = value.value
+            elif isinstance( value, str ):
+                value = Electricalelement.metricprefixtofloat( value )
+            arguments[name] = value
+        digest = hashlib.sha256()
+        digest.update( compiled.source.replace( compiled.kernelname, "kernel", 1 ).encode() ) # not the name of fn
+        digest.update( repr( sorted( compiled.constants.items() ) ).encode() )
+        for name in sorted( arguments ):
+            value = arguments[name]
+            digest.update( name.encode() )
+            if isinstance( value, np.ndarray ):
+                digest.update( repr( ( value.dtype.str, value.shape ) ).encode() )
+                digest.update( np.ascontiguousarray( value ).tobytes() )
+            else:
+                digest.update( repr( complex( value ) ).encode() )
+        if isinstance( frequency, Frequencyrange ):
+            digest.update( repr( frequency ).encode() )
+        else: # hashed in chunks, a memory mapped grid is not read in at once
+            frequency = np.asarray( frequency, dtype=float ).ravel()
+            digest.update( repr( frequency.shape ).encode() )
+            for start in range( 0, len( frequency ), 2**20 ):
+                digest.update( np.ascontiguousarray( frequency[start:start + 2**20] ).tobytes() )
+        return( digest.hexdigest() )
+
+    # the result for key as a read only memory map, None when it is not in the cache
+    # a memory map stays valid when another process removes the file afterwards
+    def lookup(self, key):
+        path = self.path( key )
+        try:
+            result = np.load( path, mmap_mode = "r" )
+        except (OSError, ValueError): # removed by another process or not complete
+            self.misses += 1
+            return( None )
+        try:
+            os.utime( path ) # most recently used
+        except OSError: # removed in the meantime or a read only directory, the result is still good
+            pass
+        self.hits += 1
+        return( result )
+
+    # write values under key, returns the values as an ndarray
+    def store(self, key, values):
+        def write(path):
+            array = np.asarray( values, dtype=complex )
+            with open( path, "wb" ) as file: # np.save() would add .npy to a path
+                np.save( file, array )
+            return( array )
+        return( self.commit( key, write ) )
+
+    # write( path ) makes the file under a temporary name and returns its result, the file is
+    # renamed to the file of key when complete, the result is returned as written and not
+    # loaded again from the file, which another process may already have evicted
+    def commit(self, key, write):
+        descriptor, temporary = tempfile.mkstemp( dir = self.directory, suffix = ".tmp" )
+        os.close( descriptor )
+        try:
+            result = write( temporary )
+            with open( temporary, "rb+" ) as file:
+                os.fsync( file.fileno() )
+            os.replace( temporary, self.path( key ) )
+        except BaseException:
+            if os.path.exists( temporary ):
+                os.remove( temporary )
+            raise
+        self.evict( keep = self.path( key ) )
+        return( result )
+
+    # sweep the transferfunction fn over frequency like streamsweep(), element values
+    # and arguments can be given by name, a result in the cache is returned without
+    # calculating, otherwise it is streamed into the cache chunk by chunk and returned
+    # as a read only memory map of the file written
+    # fn can also be a CompiledTransfer, which can be sent to worker processes
+    def sweep(self, fn, frequency, elements = None, chunksize = 2**16, **values):
+        compiled = fn if isinstance( fn, CompiledTransfer ) else compile_transfer( fn, elements )
+        key = self.key( compiled, frequency, values )
+        result = self.lookup( key )
+        if result is None:
+            def write(path):
+                return( streamsweep( lambda f: compiled( f, **values ), frequency, path, chunksize, compile = False ) )
+            result = self.commit( key, write )
+        return( result )
+
+    # remove the least recently used results until the limits are met, and
+    # temporary files left by a process that stopped an hour ago or more
+    # the file keep is not removed, even when it alone is larger than maxbytes
+    def evict(self, keep = None):
+        entries = []
+        now = time.time()
+        for entry in os.scandir( self.directory ):
+            try:
+                status = entry.stat()
+            except FileNotFoundError: # removed by another process
+                continue
+            if entry.name.endswith( ".tmp" ):
+                if now - status.st_mtime > 3600:
+                    removefile( entry.path )
+            elif entry.name.endswith( ".npy" ) and entry.path != keep:
+                entries.append( ( status.st_mtime, status.st_size, entry.path ) )
+        entries.sort()
+        size = sum( entry[1] for entry in entries )
+        kept = 0
+        if keep is not None and os.path.exists( keep ):
+            kept = 1
+            size += os.path.getsize( keep )
+        while entries and ( size > self.maxbytes or self.maxentries is not None and len( entries ) + kept > self.maxentries ):
+            mtime, filesize, path = entries.pop( 0 )
+            removefile( path )
+            size -= filesize
+
+    # remove all results
+    def clear(self):
+        for entry in os.scandir( self.directory ):
+            if entry.name.endswith( (".npy", ".tmp") ):
+                removefile( entry.path )
+        self.hits = 0
+        self.misses = 0
+
+    # hits, misses, number of results and bytes on disk
+    def info(self):
+        sizes = [ entry.stat().st_size for entry in os.scandir( self.directory ) if entry.name.endswith( ".npy" ) ]
+        return( { "hits": self.hits, "misses": self.misses, "entries": len( sizes ), "bytes": sum( sizes ), \
+            "maxbytes": self.maxbytes, "maxentries": self.maxentries } )
+
+
+# remove a file which another process may have removed already
+def removefile(path):
+    try:
+        os.remove( path )
+    except FileNotFoundError:
+        pass
+
+
+# --- tests --------------------------
+if __name__ == "__main__":
+    import test_sweepcache
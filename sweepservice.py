@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+#
+#  sweepservice.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# local sweep service, HTTP with JSON on 127.0.0.1 or on a Unix socket
+#
+# usage:
+#   python sweepservice.py --port 8765 --workers 4
+#   python sweepservice.py --socket /tmp/sweeps.sock
+#
+# POST /sweep with a JSON request, the result is JSON with the frequencies and
+# the real and imaginary parts of the values:
+#
+#   { "element": "C", "value": "1n", "frequency": "log 1k 1M 100" }
+#       impedance of a Resistance (R), Capacitance (C) or Inductance (L)
+#   { "circuit": "Vin in 0 1\nR1 in out 1k\n...", "frequency": "log 500 200k 30", "output": [ "out" ] }
+#       voltages of the output nodes of a circuit description as read by
+#       batchrunner.py, frequency and output lines in it can be left out
+#
+# frequency is written like a frequency line of batchrunner.py or is a list of numbers
+# GET /metrics returns counters, latencies and queue depths as JSON
+#
+# identical requests arriving while one is being evaluated wait for the same
+# result instead of evaluating again, finished results are kept in an LRU
+# small impedance requests are collected for a short window and requests for
+# the same element are evaluated in one call over their joined frequencies
+# circuits and large sweeps are solved in a pool of worker processes so the
+# event loop keeps answering, nothing is sent beyond the local machine
+#
+# this module defines:
+#
+# class Sweepservice
+# function request(payload, host = "127.0.0.1", port = 8765, path = None, method = "POST", target = "/sweep")
+# function main(arguments)
+
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import collections
+import concurrent.futures
+import numpy as np
+from elements import * # module containing classes for Resistance, Capacitance, ..
+from circuit import *
+from batchrunner import readcircuit, frequencyspec
+
+# element classes of impedance requests
+impedanceclasses = { "R": Resistance, "C": Capacitance, "L": Inductance }
+
+httpreasons = { 200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error" }
+
+
+# ----------------------------------------------------------
+# class for the service, evaluate() answers a request without HTTP,
+# start() serves it over HTTP on a TCP port or a Unix socket
+# ----------------------------------------------------------
+class Sweepservice:
+
+    def __init__(self, workers = None, cachesize = 256, batchwindow = 0.002, batchpoints = 10000, offloadpoints = 200000):
+        self.workers = workers # worker processes, None for the number of processors
+        self.cachesize = cachesize # results kept in the LRU
+        self.batchwindow = batchwindow # seconds small impedance requests are collected
+        self.batchpoints = batchpoints # largest impedance request which is batched
+        self.offloadpoints = offloadpoints # impedance requests from this size are sent to the pool
+        self.cache = collections.OrderedDict() # key -> result, most recently used last
+        self.inflight = {} # key -> future of a result being evaluated
+        self.pending = [] # ( element class, value, frequencies, future ) of the batch being collected
+        self.flush = None # task evaluating the pending batch after batchwindow
+        self.pool = None # process pool, made on first use
+        self.server = None
+        self.counters = collections.Counter()
+        self.latencies = collections.deque( maxlen = 10000 ) # seconds of the most recent requests
+        self.offloaded = 0 # requests in the process pool now
+        self.maxqueue = 0
+
+    # return a machine readable representation of a Sweepservice
+    def __repr__(self):
+        return( f"Sweepservice(workers={self.workers}, cachesize={self.cachesize}, batchwindow={self.batchwindow})" )
+
+    # listen on host and port, or on the Unix socket path, port 0 picks a free port
+    # returns the port or path listened on
+    async def start(self, host = "127.0.0.1", port = 8765, path = None):
+        if path is not None:
+            self.server = await asyncio.start_unix_server( self.handle, path = path )
+            return( path )
+        self.server = await asyncio.start_server( self.handle, host, port )
+        return( self.server.sockets[0].getsockname()[1] )
+
+    # stop listening and stop the worker processes
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    # answer one HTTP request on a connection
+    async def handle(self, reader, writer):
+        try:
+            requestline = ( await reader.readline() ).decode( "latin-1" ).split()
+            headers = {}
+            while True:
+                line = ( await reader.readline() ).decode( "latin-1" ).strip()
+                if not line:
+                    break
+                name, _, value = line.partition( ":" )
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly( int( headers.get( "content-length", 0 ) ) )
+            status, answer = await self.route( requestline, body )
+        except (ValueError, IndexError, asyncio.IncompleteReadError) as error:
+            status, answer = 400, { "error": f"malformed HTTP request: {error}" }
+        except Exception as error: # any other error of an evaluation still gets an answer
+            self.counters["errors"] += 1
+            status, answer = 500, { "error": f"{type(error).__name__}: {error}" }
+        data = json.dumps( answer ).encode()
+        writer.write( f"HTTP/1.1 {status} {httpreasons[status]}\r\nContent-Type: application/json\r\n" \
+            f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode( "latin-1" ) + data )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    # status and JSON answer of a request line and body
+    async def route(self, requestline, body):
+        method, target = requestline[0], requestline[1]
+        if target == "/metrics":
+            return( ( 200, self.metrics() ) if method == "GET" else ( 405, { "error": "use GET" } ) )
+        if target != "/sweep":
+            return( 404, { "error": f"unknown path {target}" } )
+        if method != "POST":
+            return( 405, { "error": "use POST" } )
+        try:
+            return( 200, await self.evaluate( json.loads( body ) ) )
+        except (ValueError, TypeError, KeyError) as error: # json.JSONDecodeError is a ValueError
+            self.counters["errors"] += 1
+            return( 400, { "error": f"{type(error).__name__}: {error}" } )
+
+    # result of a request, from the LRU, from an identical request being evaluated, or evaluated now
+    async def evaluate(self, payload):
+        start = time.perf_counter()
+        self.counters["requests"] += 1
+        key = hashlib.sha256( json.dumps( payload, sort_keys = True ).encode() ).hexdigest()
+        try:
+            if key in self.cache:
+                self.counters["cachehits"] += 1
+                self.cache.move_to_end( key )
+                return( self.cache[key] )
+            if key in self.inflight:
+                self.counters["coalesced"] += 1
+                return( await asyncio.shield( self.inflight[key] ) )
+            future = asyncio.get_running_loop().create_future()
+            self.inflight[key] = future
+            try:
+                result = await self.calculate( payload )
+            except BaseException as error:
+                future.set_exception( error )
+                future.exception() # retrieved, waiting requests get it raised
+                raise
+            finally:
+                del self.inflight[key]
+            future.set_result( result )
+            self.cache[key] = result
+            while len( self.cache ) > self.cachesize:
+                self.cache.popitem( last = False )
+            return( result )
+        finally:
+            self.latencies.append( time.perf_counter() - start )
+
+    # evaluate a request which is not cached or in flight
+    async def calculate(self, payload):
+        if not isinstance( payload, dict ):
+            raise TypeError("a request is a JSON object")
+        self.counters["evaluations"] += 1
+        if "circuit" in payload:
+            frequency, outputs = payload.get( "frequency" ), payload.get( "output" )
+            if frequency is not None:
+                frequency = frequencies( frequency ).tolist()
+            if isinstance( outputs, str ):
+                outputs = [ outputs ]
+            f, voltages = await self.offload( solvecircuit, str( payload["circuit"] ), frequency, outputs )
+            return( { "frequency": f.tolist(), "voltages": { node: complexlist( v ) for node, v in voltages.items() } } )
+        cls = impedanceclasses.get( str( payload.get( "element", "" ) ).upper() )
+        if cls is None:
+            raise ValueError("a request needs a circuit or an element R, C or L")
+        element = cls( payload["value"] )
+        f = frequencies( payload["frequency"] )
+        if len(f) >= self.offloadpoints:
+            Z = await self.offload( impedances, cls, element.value, f )
+        elif len(f) <= self.batchpoints:
+            Z = await self.batched( cls, element.value, f )
+        else:
+            Z = impedances( cls, element.value, f )
+        return( { "frequency": f.tolist(), "impedance": complexlist( Z ) } )
+
+    # run fn in the process pool, counted in the queue depth
+    async def offload(self, fn, *args):
+        if self.pool is None:
+            self.pool = concurrent.futures.ProcessPoolExecutor( max_workers = self.workers )
+        self.offloaded += 1
+        self.counters["offloaded"] += 1
+        self.maxqueue = max( self.maxqueue, self.queuedepth() )
+        pool = self.pool
+        try:
+            return( await asyncio.get_running_loop().run_in_executor( pool, fn, *args ) )
+        except concurrent.futures.BrokenExecutor: # BrokenProcessPool
+            if self.pool is pool: # a worker died, the next request starts a new pool
+                self.pool = None
+                pool.shutdown( wait = False )
+            raise
+        finally:
+            self.offloaded -= 1
+
+    # impedances of a small request, collected with the others arriving within batchwindow
+    async def batched(self, cls, value, f):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append( ( cls, value, f, future ) )
+        self.maxqueue = max( self.maxqueue, self.queuedepth() )
+        if self.flush is None:
+            self.flush = asyncio.get_running_loop().call_later( self.batchwindow, self.evaluatebatch )
+        return( await future )
+
+    # evaluate the pending requests, one evaluation per element over the joined frequencies
+    def evaluatebatch(self):
+        pending, self.pending, self.flush = self.pending, [], None
+        groups = collections.defaultdict( list )
+        for request in pending:
+            groups[ request[:2] ].append( request )
+        self.counters["batches"] += 1
+        self.counters["batchedrequests"] += len( pending )
+        for (cls, value), requests in groups.items():
+            try:
+                Z = impedances( cls, value, np.concatenate( [ f for _, _, f, _ in requests ] ) )
+            except Exception as error: # every request of the group gets the error, none is left waiting
+                for _, _, _, future in requests:
+                    if not future.done(): # cancelled when the client went away
+                        future.set_exception( error )
+                continue
+            self.counters["batchevaluations"] += 1
+            start = 0
+            for _, _, f, future in requests:
+                if not future.done():
+                    future.set_result( Z[start:start + len(f)] )
+                start += len(f)
+
+    # requests waiting in the batch or the process pool
+    def queuedepth(self):
+        return( len( self.pending ) + self.offloaded )
+
+    # counters, latencies in ms of the most recent requests and queue depths
+    def metrics(self):
+        latencies = np.array( self.latencies ) * 1E3
+        percentiles = dict.fromkeys( ("p50", "p90", "p99", "max") )
+        if len( latencies ):
+            percentiles = { "p50": float( np.percentile( latencies, 50 ) ), "p90": float( np.percentile( latencies, 90 ) ), \
+                "p99": float( np.percentile( latencies, 99 ) ), "max": float( latencies.max() ) }
+        return( { "counters": dict( self.counters ), "latencyms": percentiles, "queuedepth": self.queuedepth(), \
+            "maxqueuedepth": self.maxqueue, "inflight": len( self.inflight ), "cached": len( self.cache ) } )
+
+
+# frequencies of a request, a frequency line like "log 500 200k 30" or a list of numbers
+def frequencies(spec):
+    if isinstance( spec, str ):
+        return( frequencyspec( spec.split() ) )
+    f = np.asarray( spec, dtype=float )
+    if f.ndim != 1:
+        raise ValueError("frequency is a frequency line or a list of numbers")
+    return( f )
+
+
+# impedances of an element of class cls with value at the frequencies f as complex ndarray
+def impedances(cls, value, f):
+    if cls is Resistance:
+        return( np.full( len(f), value, dtype=complex ) )
+    return( newelement( cls, value ).getimpedance( f ).value )
+
+
+# frequencies and voltages of the output nodes of a circuit description, run in a worker process
+# frequency and outputs given replace those of the description, which may then leave them out
+def solvecircuit(description, frequency = None, outputs = None):
+    lines = description.splitlines()
+    if frequency is not None:
+        lines = [ line for line in lines if line.split( "#", 1 )[0].split()[:1] != ["frequency"] ]
+        lines.append( "frequency list " + " ".join( map( repr, frequency ) ) )
+    if outputs:
+        lines.append( "output " + " ".join( outputs ) )
+    circuit, f, nodes = readcircuit( lines )
+    solution = circuit.acsweep( f )
+    return( f, { node: solution.voltage( node ).value for node in dict.fromkeys( outputs or nodes ) } )
+
+
+# complex values as a dict of lists of the real and imaginary parts, for JSON
+def complexlist(values):
+    values = np.asarray( values, dtype=complex )
+    return( { "real": values.real.tolist(), "imag": values.imag.tolist() } )
+
+
+# send a request to a running service and return the status and JSON answer,
+# for tools and tests, payload None sends no body
+async def request(payload, host = "127.0.0.1", port = 8765, path = None, method = "POST", target = "/sweep"):
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection( path )
+    else:
+        reader, writer = await asyncio.open_connection( host, port )
+    body = b"" if payload is None else json.dumps( payload ).encode()
+    writer.write( f"{method} {target} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n" \
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode( "latin-1" ) + body )
+    await writer.drain()
+    status = int( ( await reader.readline() ).split()[1] )
+    length = 0
+    while True:
+        line = ( await reader.readline() ).decode( "latin-1" ).strip()
+        if not line:
+            break
+        name, _, value = line.partition( ":" )
+        if name.strip().lower() == "content-length":
+            length = int( value )
+    answer = json.loads( await reader.readexactly( length ) )
+    writer.close()
+    await writer.wait_closed()
+    return( status, answer )
+
+
+# run the service until interrupted, arguments without the program name
+def main(arguments):
+    parser = argparse.ArgumentParser( prog = "python sweepservice.py", description = "local sweep service, HTTP with JSON" )
+    parser.add_argument( "--host", default = "127.0.0.1", help = "address to listen on, the local machine by default" )
+    parser.add_argument( "--port", type = int, default = 8765, help = "port to listen on" )
+    parser.add_argument( "--socket", metavar = "PATH", help = "listen on a Unix socket instead of a port" )
+    parser.add_argument( "--workers", type = int, default = None, help = "number of worker processes" )
+    parser.add_argument( "--cachesize", type = int, default = 256, help = "number of results kept" )
+    options = parser.parse_args( arguments )
+
+    async def serve():
+        service = Sweepservice( workers = options.workers, cachesize = options.cachesize )
+        where = await service.start( options.host, options.port, options.socket )
+        print(f"serving sweeps on {where}, POST /sweep, GET /metrics")
+        try:
+            await service.server.serve_forever()
+        finally:
+            await service.close()
+    try:
+        asyncio.run( serve() )
+    except KeyboardInterrupt:
+        pass
+    return( 0 )
+
+
+if __name__ == "__main__":
+    sys.exit( main( sys.argv[1:] ) )
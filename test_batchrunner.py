@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+#
+#  test_batchrunner.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module batchrunner.py
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import numpy as np
+
+# import module to test
+from elements import *
+from circuit import *
+from batchrunner import *
+
+sallenkey = """# Sallen Key low pass
+Vin  in  0   1
+R1   in  a   {R1}
+R2   a   b   10k
+C3   a   out {C3}
+C4   b   0   1n
+E1   out 0   b  0  1   # ideal opamp as a VCVS
+frequency log 500 200k 300
+output out
+"""
+
+if __name__ != "__mp_main__": # worker processes only need the definitions above
+    print("Test of module batchrunner.py\n")
+    print("*"*40)
+    print("\n    C I R C U I T   D E S C R I P T I O N S\n")
+
+    print("Reading a circuit description")
+    print("-"*30)
+    circuit, frequency, outputs = readcircuit( sallenkey.format( R1 = "10k", C3 = "1n" ).splitlines() )
+    print("readcircuit( lines ) ->", circuit, len( frequency ), "frequencies, outputs", outputs)
+    print("frequencyspec( [ 'lin', '0', '1k', '5' ] ) ->", frequencyspec( [ "lin", "0", "1k", "5" ] ))
+    print("frequencyspec( [ 'list', '1k', '2k2', '4M7' ] ) ->", frequencyspec( [ "list", "1k", "2k2", "4M7" ] ))
+    for lines in ( [ "R1 in 0 1x" ], [ "Q1 in 0 1k" ], [ "R1 in 0 1k", "output in" ] ):
+        try:
+            readcircuit( lines )
+        except ValueError as error:
+            print(f"readcircuit( {lines} ) -> ValueError: {error}")
+
+    print("\n    B A T C H\n")
+
+    directory = tempfile.mkdtemp()
+    paths = []
+    for R1 in ( "4k7", "5k6", "6k8", "8k2", "10k", "12k", "15k", "18k" ):
+        for C3 in ( "680p", "820p", "1n", "1n2", "1n5" ):
+            paths.append( os.path.join( directory, f"sallenkey_{R1}_{C3}.net" ) )
+            with open( paths[-1], "w" ) as file:
+                file.write( sallenkey.format( R1 = R1, C3 = C3 ) )
+    with open( os.path.join( directory, "broken.net" ), "w" ) as file:
+        file.write( "R1 in 0 10k\nfrequency log 1 10\noutput in\n" )
+    with open( os.path.join( directory, "short.net" ), "w" ) as file:
+        file.write( "Vin in 0 1\nR1 in out 0\nC1 out 0 1n\nfrequency log 1 1k 3\noutput out\n" )
+    output = os.path.join( directory, "results" )
+
+    print("40 Sallen Key variants and two broken files in 4 worker processes")
+    print("-"*30)
+    broken = [ os.path.join( directory, name ) for name in ( "broken.net", "short.net" ) ]
+    status = main( paths + broken + [ "--output", output, "--workers", "4", "--quiet" ] )
+    print("exit status with broken files ->", status)
+    print("results written ->", len( os.listdir( output ) ))
+    table = np.loadtxt( os.path.join( output, "sallenkey_10k_1n.csv" ), delimiter = ",", skiprows = 1 )
+    H = circuit.acsweep( frequency ).voltage("out").value
+    print("V(out) in dB of sallenkey_10k_1n.csv same as Circuit.acsweep() ->", \
+        np.allclose( table[:, 1], 20 * np.log10( np.abs( H ) ), atol = 1E-4 ))
+
+    print("\nColumnar npz results with python -m elements")
+    print("-"*30)
+    run = subprocess.run( [ sys.executable, "-m", "elements", *paths[:3], "--output", output, "--format", "npz", "--workers", "2" ], \
+        capture_output = True, text = True )
+    print(run.stdout.strip().splitlines()[-1])
+    with np.load( os.path.join( output, "sallenkey_4k7_680p.npz" ) ) as result:
+        print("arrays in sallenkey_4k7_680p.npz ->", sorted( result.files ), result["V(out)"].dtype)
+
+    print("\nFiles with the same name in different directories")
+    print("-"*30)
+    for variant in ( "a", "b" ):
+        os.makedirs( os.path.join( directory, variant ) )
+        with open( os.path.join( directory, variant, "filter.net" ), "w" ) as file:
+            file.write( sallenkey.format( R1 = "10k" if variant == "a" else "4k7", C3 = "1n" ) )
+    same = [ os.path.join( directory, variant, "filter.net" ) for variant in ( "a", "b" ) ]
+    print("outputnames( [ 'a/filter.net', 'b/filter.net' ] ) ->", outputnames( same ))
+    status = main( same + [ "--output", output, "--workers", "2", "--quiet" ] )
+    for variant in ( "a", "b" ):
+        table = np.loadtxt( os.path.join( output, variant, "filter.csv" ), delimiter = ",", skiprows = 1 )
+        print(f"largest V(out) in {variant}/filter.csv -> {table[:, 1].max():.3f} dB")
+    try:
+        outputnames( [ same[0], same[0].replace( ".net", ".cir" ) ] )
+    except ValueError as error:
+        print("a/filter.net and a/filter.cir -> ValueError:", str( error ).replace( directory, "DIR" ))
+    shutil.rmtree( directory )
+
+    print("\n ****** END ********************************************")
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+#
+#  test_circuit.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the classes defined in the module circuit.py
+
+import math
+import time
+import numpy as np
+
+# import module to test
+from elements import *
+from circuit import *
+print("Test of module circuit.py\n")
+print("*"*40)
+print("\n    R L C\n")
+
+print("Defining the RLC circuit of RLC_with_elements.py")
+print("-"*30)
+R1 = Resistance("100k")
+R2 = Resistance(1)
+L1 = Inductance("500uH")
+C1 = Capacitance("5nF")
+rlc = Circuit()
+rlc.add( "V1", Voltage(1), "in", "0" )
+rlc.add( "R1", R1, "in", "out" )
+rlc.add( "C1", C1, "out", "0" )
+rlc.add( "R2", R2, "out", "mid" )
+rlc.add( "L1", L1, "mid", "0" )
+print("rlc ->", rlc)
+f = np.arange(90000, 110000, 150)
+solution = rlc.acsweep( f )
+print("solution = rlc.acsweep( f ) -> solution:", solution)
+H = solution.voltage("out") / solution.voltage("in")
+print("H = solution.voltage('out') / solution.voltage('in')")
+
+def transferfunction( f ):
+    Zrl = R2 + L1.getimpedance( f )
+    Zparallel = Zrl.parallelwith( C1.getimpedance( f ) )
+    return( Zparallel / ( R1 + Zparallel ) )
+
+print("largest difference with the formula ->", np.max( np.abs( H - transferfunction( f ) ) ))
+print("current through L1 at", f[0], "Hz ->", solution.current("L1")[0])
+print("same as V(mid) / ZL1 ->", solution.voltage("mid")[0] / L1.getimpedance( f[0] ))
+print("current through V1 equals minus the current through R1 ->", \
+    np.allclose( solution.current("V1").value, -solution.current("R1").value ))
+try:
+    Circuit().add( "R9", Resistance(0), "in", "out" )
+except ValueError as error:
+    print("Circuit().add( 'R9', Resistance(0), 'in', 'out' ) -> ValueError:", error)
+
+print("\n    S A L L E N   K E Y\n")
+
+print("Sallen Key low pass with an ideal opamp as a VCVS")
+print("-"*30)
+sallenkey = Circuit()
+sallenkey.add( "Vin", Voltage(1), "in", "0" )
+sallenkey.add( "R1", Resistance("10k"), "in", "a" )
+sallenkey.add( "R2", Resistance("10k"), "a", "b" )
+sallenkey.add( "C3", Capacitance("1nF"), "a", "out" )
+sallenkey.add( "C4", Capacitance("1nF"), "b", "0" )
+sallenkey.addvcvs( "E1", "out", "0", "b", "0", 1.0 )
+f = np.geomspace(500, 200000, num=30)
+H = sallenkey.acsweep( f ).voltage("out").value
+Z3 = Capacitance("1nF").getimpedance( f )
+Z4 = Capacitance("1nF").getimpedance( f )
+Z1 = Z2 = Resistance("10k")
+Hformula = Z3 * Z4 / ( Z1 * Z2 + Z3 * (Z1 + Z2) + Z3 * Z4 )
+print("largest difference with the formula ->", np.max( np.abs( H - Hformula ) ))
+
+print("\n    L A D D E R\n")
+
+print("RC ladder of 2000 sections driven by a current source")
+print("-"*30)
+ladder = Circuit()
+ladder.add( "I1", Current("1mA"), "0", "n0" )
+for i in range(2000):
+    ladder.add( f"R{i}", Resistance("100"), f"n{i}", f"n{i+1}" )
+    ladder.add( f"C{i}", Capacitance("10n"), f"n{i+1}", "0" )
+print("ladder ->", ladder)
+f = np.geomspace(10, 1E6, num=200)
+start = time.perf_counter()
+solution = ladder.acsweep( f )
+print(f"sweep of 200 frequencies took {time.perf_counter() - start:.3f} s")
+print("input impedance at 10 Hz ->", ( solution.voltage("n0") / Current("1mA") )[0].tometricprefix())
+
+print("\n    S E N S I T I V I T Y\n")
+
+# copy of circuit with the value of one component multiplied by factor
+def changed( circuit, name, factor ):
+    result = Circuit( circuit.ground )
+    for n, element, node1, node2, control in circuit.components:
+        if n == name:
+            element = type( element )( element.value * factor if type( element ) in ( Voltage, Current ) \
+                else element.value.real * factor ) if isinstance( element, Electricalelement ) else element * factor
+        if control:
+            result.addvcvs( n, node1, node2, *control, element )
+        else:
+            result.add( n, element, node1, node2 )
+    return( result )
+
+# dH/dp by central differences, one pair of sweeps per component
+def differences( circuit, f, node, name, value, h = 1E-5 ):
+    up = changed( circuit, name, 1 + h ).acsweep( f ).voltage( node ).value
+    down = changed( circuit, name, 1 - h ).acsweep( f ).voltage( node ).value
+    return( ( up - down ) / ( 2 * h * value ) )
+
+print("Sensitivity of V(out) of the Sallen Key to every component")
+print("-"*30)
+f = np.geomspace(500, 200000, num=30)
+sensitivity = sallenkey.sensitivity( f, "out" )
+print("sallenkey.sensitivity( f, 'out' ) ->", sensitivity)
+print("same H as the sweep ->", np.allclose( sensitivity.H, sallenkey.acsweep( f ).voltage("out").value ))
+for name in sensitivity.names:
+    value = sensitivity.values[ sensitivity.names[name] ]
+    error = np.max( np.abs( sensitivity.dH( name ) - differences( sallenkey, f, "out", name, value ) ) \
+        / np.max( np.abs( sensitivity.dH( name ) ) + 1E-300 ) )
+    print(f"{name:4} relative at {f[15]:.0f} Hz -> {sensitivity.relative( name )[15]:.4f}, same as finite differences {error < 1E-6}")
+print("d|H|/dR1 at", f[15].round(), "Hz ->", sensitivity.magnitude("R1")[15], "per ohm")
+print("dphase/dC3 at", f[15].round(), "Hz ->", sensitivity.phase("C3")[15], "radians per farad")
+print("ranking() ->", sensitivity.ranking())
+
+print("\nRLC, inductance, voltage and current sources")
+print("-"*30)
+sources = changed( rlc, None, 1 ).add( "I1", Current("1mA"), "0", "mid" )
+f = np.arange(90000, 110000, 1500)
+sensitivity = sources.sensitivity( f, "out" )
+for name in ( "L1", "V1", "I1", "R2" ):
+    value = sensitivity.values[ sensitivity.names[name] ]
+    print(f"{name} dH/dp same as finite differences ->", \
+        np.allclose( sensitivity.dH( name ), differences( sources, f, "out", name, value ), rtol = 1E-5, atol = 1E-12 ))
+
+print("\nLadder of 4001 components solved sparse")
+print("-"*30)
+f = np.geomspace(10, 1E6, num=200)
+start = time.perf_counter()
+sensitivity = ladder.sensitivity( f, "n2000" )
+elapsed = time.perf_counter() - start
+start = time.perf_counter()
+ladder.acsweep( f )
+sweep = time.perf_counter() - start
+print(f"sensitivity to all {len(sensitivity.names)} components {elapsed:.3f} s, {elapsed / sweep:.1f} sweeps " \
+    f"instead of {len(sensitivity.names) + 1} sweeps perturbing each one")
+for name in ( "R0", "C1999", "I1" ):
+    value = sensitivity.values[ sensitivity.names[name] ]
+    print(f"{name} dH/dp same as finite differences ->", \
+        np.allclose( sensitivity.dH( name ), differences( ladder, f, "n2000", name, value ), rtol = 1E-4, atol = 1E-14 ))
+print("same as solved dense ->", np.allclose( changed( ladder, "R0", 1 ).sensitivity( f[:5], "n20", method = "dense" ).derivative, \
+    ladder.sensitivity( f[:5], "n20", method = "sparse" ).derivative ))
+
+print("\n    N O I S E\n")
+
+print("Thermal noise of a divider with one resistance cooled to 77 K")
+print("-"*30)
+divider = Circuit()
+divider.add( "V1", Voltage(1), "in", "0" )
+divider.add( "R1", Resistance("10k"), "in", "out" )
+divider.add( "R2", Resistance("10k", temperature = 77), "out", "0" )
+noise = divider.noise( [ 1E3, 10E3 ], "out" )
+# both noise currents see R1 // R2, the source is a short circuit
+expected = ( 5E3 ) ** 2 * ( 4 * boltzmann * 300 / 10E3 + 4 * boltzmann * 77 / 10E3 )
+print("divider.noise( [ 1E3, 10E3 ], 'out' ) ->", noise)
+print("density same as (R1 // R2)^2 (4kT1/R1 + 4kT2/R2) ->", np.allclose( noise.density, expected ))
+print("voltagedensity() in V/sqrt(Hz) ->", noise.voltagedensity())
+
+print("\nRC low pass integrated over all frequencies gives kT/C")
+print("-"*30)
+rc = Circuit()
+rc.add( "V1", Voltage(1), "in", "0" )
+rc.add( "R1", Resistance("10k"), "in", "out" )
+rc.add( "C1", Capacitance("1n"), "out", "0" )
+f = np.geomspace(1E-2, 1E12, num=100000)
+for method in ( "dense", "modal" ):
+    noise = rc.noise( f, "out", method = method )
+    print(f"method = '{method}' rms() ->", Electricalelement.floattometricprefix( noise.rms(), "V" ), \
+        "same as sqrt(kT/C) ->", np.isclose( noise.rms(), math.sqrt( boltzmann * 300 / 1E-9 ), rtol = 1E-4 ))
+print("rms( high = 15.9k ), up to the corner frequency ->", Electricalelement.floattometricprefix( noise.rms( high = 15.9E3 ), "V" ))
+
+print("\nSallen Key with a double pole, modal is checked against a direct solve")
+print("-"*30)
+f = np.geomspace(10, 1E6, num=1000)
+noise = sallenkey.noise( f, "out", method = "modal" )
+print("method used, 'sparse' when modal is not accurate ->", noise.method)
+print("same as dense ->", np.allclose( noise.density, sallenkey.noise( f, "out" ).density ))
+print("contributions() ->", { name: Electricalelement.floattometricprefix( v, "V" ) for name, v in noise.contributions().items() })
+
+print("\nLadder of 300 resistances at 100000 frequencies")
+print("-"*30)
+network = Circuit()
+network.add( "V1", Voltage(1), "n0", "0" )
+for i in range(300):
+    network.add( f"R{i}", Resistance("1k"), f"n{i}", f"n{i+1}" )
+    network.add( f"C{i}", Capacitance("1n"), f"n{i+1}", "0" )
+f = np.geomspace(10, 1E7, num=100000)
+start = time.perf_counter()
+noise = network.noise( f, "n300" )
+print(f"network.noise( f, 'n300' ) -> {noise}, method '{noise.method}', {time.perf_counter() - start:.2f} s")
+print("same as sparse at 20 frequencies ->", np.allclose( network.noise( f[::5000], "n300", method = "sparse" ).density, \
+    noise.density[::5000], rtol = 1E-8 ))
+print("rms() ->", Electricalelement.floattometricprefix( noise.rms(), "V" ), \
+    "rms( 10, 20E3 ) ->", Electricalelement.floattometricprefix( noise.rms( 10, 20E3 ), "V" ))
+print("largest contributions ->", list( noise.contributions() )[:3])
+
+print("\n    T R A N S I E N T\n")
+
+print("Step response of the Sallen Key low pass")
+print("-"*30)
+# second order step response with w0 = 1 / ( R C ) and Q = 0.5, a double pole
+w0 = 1 / ( 10E3 * 1E-9 )
+def stepresponse( t ):
+    return( 1 - ( 1 + w0 * t ) * np.exp( -w0 * t ) )
+for method in ( "trapezoidal", "euler" ):
+    response = sallenkey.transient( 100E-6, 0.1E-6, method = method )
+    print(f"method = '{method}', {len(response.time)} points, largest difference with the formula ->", \
+        np.max( np.abs( response.voltage("out") - stepresponse( response.time ) ) ))
+response = sallenkey.transient( 100E-6, 1E-6, adaptive = True, rtol = 1E-4, atol = 1E-7 )
+steps = np.diff( response.time )
+print(f"adaptive = True, {len(response.time)} points, largest difference with the formula ->", \
+    np.max( np.abs( response.voltage("out") - stepresponse( response.time ) ) ))
+print(f"smallest and largest step -> {steps.min():.3g} s, {steps.max():.3g} s")
+
+print("\nRLC circuit driven by a pulse given as samples")
+print("-"*30)
+# pulse of 1 V from 10 to 30 us with 0.1 us edges, sources keep their value without a waveform
+pulse = ( [ 0, 10E-6, 10.1E-6, 30E-6, 30.1E-6 ], [ 0, 0, 1, 1, 0 ] )
+response = rlc.transient( 100E-6, 0.05E-6, waveforms = { "V1": pulse } )
+print("rlc.transient( 100E-6, 0.05E-6, waveforms = { 'V1': pulse } ) ->", response)
+print("largest output ->", f"{response.voltage('out').max():.4f} V")
+print("current through L1 at the end ->", f"{response.current('L1')[-1]:.3e} A")
+print("current through V1 equals minus the current through R1 ->", \
+    np.allclose( response.current("V1"), -response.current("R1") ))
+print("current through R1 equals the currents through C1 and R2 at every step ->", \
+    np.allclose( response.current("R1"), response.current("C1") + response.current("R2"), rtol = 0, atol = 1E-12 ))
+chunks = list( rlc.transientchunks( 100E-6, 0.05E-6, waveforms = { "V1": pulse }, chunksize = 1 ) )
+print("current through C1 in chunks of one time step same as in one run ->", \
+    np.allclose( np.concatenate( [ chunk.current("C1") for chunk in chunks ] ), response.current("C1"), rtol = 0, atol = 1E-12 ))
+dc = rlc.transient( 1E-6, 0.05E-6, initial = "dc" )
+print("initial = 'dc' starts at the operating point ->", f"V(out) = {dc.voltage('out')[0]:.4f} V, I(L1) = {dc.current('L1')[0]:.4e} A")
+
+print("\nStreaming a long run in chunks")
+print("-"*30)
+start = time.perf_counter()
+points, largest = 0, 0.0
+for chunk in sallenkey.transientchunks( 20E-3, 0.1E-6 ):
+    points += len( chunk.time )
+    largest = max( largest, chunk.voltage("out").max() )
+print(f"{points} time steps in chunks of 65536 took {time.perf_counter() - start:.2f} s, largest output {largest:.6f} V")
+
+print("\n ****** END ********************************************")
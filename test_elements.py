@@ -68,6 +68,14 @@ print("r3 / 3 -> ", (r3 / 3))
 print("(r3 / 3).tometricprefix() -> ", (r3 / 3).tometricprefix())
 print("(r3 / 3).tometricprefix(precision = 6) -> ", (r3 / 3).tometricprefix(precision = 6))
 
+print("\nThermal noise of a Resistance, 4kTR")
+print("-"*30)
+r4 = Resistance('10k', temperature = 77)
+print("r4 = Resistance('10k', temperature = 77) -> r4.temperature :", r4.temperature)
+print("r2.temperature, the default -> ", r2.temperature)
+print("r2.noisedensity() in V^2/Hz -> ", r2.noisedensity())
+print("sqrt( r4.noisedensity() ) in V/sqrt(Hz) -> ", Electricalelement.floattometricprefix( math.sqrt( r4.noisedensity() ), "V" ))
+
 print("\n    I M P E D A N C E\n")
 
 print("Define Impedance objects")
@@ -271,4 +279,114 @@ print("i1 = v1 / ( r1 + c1.getimpedance( f ) ) -> i1:", i1)
 print("type( i1 ) -> ", type( i1 ) )
 print("i1.topolardeg()", i1.topolardeg())
 
+print("\n    I M P E D A N C E   A R R A Y S \n")    
+
+
+print("Getting the impedance for an array of frequencies")
+print("-"*30)
+import numpy as np
+f = np.array( [ 50.0, 1E3, 20E3 ] )
+print("f = np.array( [ 50.0, 1E3, 20E3 ] ) -> f:", f)
+c1 = Capacitance('100n')
+print("c1 = Capacitance('100n') -> c1:", c1)
+zc = c1.getimpedance( f )
+print("zc = c1.getimpedance( f ) -> zc:", zc)
+print("type( zc ) -> ", type( zc ) )
+print("zc[1] -> ", zc[1])
+print("zc.tometricprefix() -> ", zc.tometricprefix())
+print("zc.topolardeg() -> ", zc.topolardeg())
+print("np.abs( zc ) -> ", np.abs( zc ))
+
+print("\nCalculations using ImpedanceArray, Impedance and Voltage objects")
+print("-"*30)
+r1 = Resistance('1k')
+print("r1 = Resistance('1k') -> r1:", r1)
+ztotal = r1 + zc
+print("ztotal = r1 + zc -> ztotal:", ztotal)
+print("r1.parallelwith( zc ) -> ", r1.parallelwith( zc ))
+print("zc / ztotal this should give a complex ndarray -> ", zc / ztotal)
+i1 = Voltage('10V') / ztotal
+print("i1 = Voltage('10V') / ztotal -> i1:", i1)
+print("type( i1 ) -> ", type( i1 ) )
+print("i1 * zc -> ", i1 * zc)
+scalar = [ ( r1 + c1.getimpedance( freq ) ).value for freq in f ]
+print("same as scalar calculation ->", np.allclose( ztotal.value, scalar ))
+
+print("\n    M E T R I C   P R E F I X \n")    
+
+
+print("Converting strings with metric prefix to float")
+print("-"*30)
+for expression in ( "10k", "5k6", "470nF", "0.1kOhm", "10mOhm", "1nFarad", "2.2 µH", "1.5k2", "10kxyz" ):
+    print(f"Electricalelement.metricprefixtofloat('{expression}') -> ", Electricalelement.metricprefixtofloat( expression ))
+
+print("\nConverting a column of strings in one call")
+print("-"*30)
+bom = [ "10k", "4k7", "100nF", "10k", 220, "bad", "1µ2" ]
+print("bom = ", bom)
+print("Electricalelement.parse_many( bom ) -> ", Electricalelement.parse_many( bom ))
+
+print("\nFormatting arrays of values with metric prefix")
+print("-"*30)
+values = np.array( [ 4.7E-9, 0.0331, 1200.0, 5.6E6, 2E15 ] )
+print("values = ", values)
+print("Electricalelement.floattometricprefixarray( values, 'F' ) -> ", Electricalelement.floattometricprefixarray( values, 'F' ))
+print("same as floattometricprefix() -> ", \
+    list( Electricalelement.floattometricprefixarray( values, 'F' ) ) == [ Electricalelement.floattometricprefix( x, 'F' ) for x in values ])
+tiny = np.array( [ 5E-324, -1E-310, 1E-300 ] ) # subnormals and a normal value near them
+print("Electricalelement.floattometricprefixarray( tiny, 'Ohm' ) -> ", Electricalelement.floattometricprefixarray( tiny, 'Ohm' ))
+print("same as floattometricprefix() -> ", \
+    list( Electricalelement.floattometricprefixarray( tiny, 'Ohm' ) ) == [ Electricalelement.floattometricprefix( x, 'Ohm' ) for x in tiny ])
+
+print("\nWriting a table of arrays as csv")
+print("-"*30)
+import sys
+f = np.array( [ 50.0, 1E3, 20E3 ] )
+zc = Capacitance('100n').getimpedance( f )
+print("writetable( sys.stdout, [ f, zc, zc.topolardeg() ], header = [ 'f', 'Z', 'polar' ] ) ->")
+writetable( sys.stdout, [ f, zc, zc.topolardeg() ], header = [ 'f', 'Z', 'polar' ] )
+
+print("\n    V A L U E   S E M A N T I C S \n")    
+
+
+print("Elements with the same unit and value are equal and hashable")
+print("-"*30)
+print("Resistance('10k') == Resistance(10000) -> ", Resistance('10k') == Resistance(10000))
+print("Resistance('10k') == Impedance(10000) -> ", Resistance('10k') == Impedance(10000))
+print("Resistance('10k') == Capacitance(10000) -> ", Resistance('10k') == Capacitance(10000))
+print("len( { Capacitance('1n'), Capacitance('1nF'), Capacitance('2n') } ) -> ", \
+    len( { Capacitance('1n'), Capacitance('1nF'), Capacitance('2n') } ))
+r1 = Resistance('10k')
+try:
+    r1.value = 5
+except AttributeError as error:
+    print("r1.value = 5 -> AttributeError:", error)
+print("Electricalelement(5, 'V') keeps its unit -> ", repr( Electricalelement(5, 'V') ))
+
+print("\nElements survive pickle and copy")
+print("-"*30)
+import copy
+import pickle
+for element in ( Electricalelement(5, 'V'), Impedance(10+5j), Resistance('10k', tol=0.05, temperature=77), \
+        Capacitance('1u', tol=0.1, dist='normal'), Inductance('1m', tol=0.02), Voltage(5), Current('1m') ):
+    loaded = pickle.loads( pickle.dumps( element ) )
+    print(f"{element!r:36} pickle -> {loaded!r:36} same {loaded == element and type(loaded) is type(element)}, " \
+        f"tolerance {loaded.tolerance!r}, copy is the value itself " \
+        f"{copy.copy( element ) is element and copy.deepcopy( element ) is element}")
+print("temperature after pickle -> ", pickle.loads( pickle.dumps( Resistance('10k', temperature=77) ) ).temperature)
+
+print("\nImpedances of scalar frequencies are cached")
+print("-"*30)
+impedancecache.clear()
+c1 = Capacitance('100n')
+for repeat in range(3):
+    for freq in ( 50.0, 1E3, 20E3 ):
+        c1.getimpedance( freq )
+print("impedancecache.info() after 3 sweeps of 3 frequencies -> ", impedancecache.info())
+print("c1.getimpedance( 1E3 ) is c1.getimpedance( 1E3 ) -> ", c1.getimpedance( 1E3 ) is c1.getimpedance( 1E3 ))
+print("c1.getimpedance( np.int64(1000) ) is c1.getimpedance( 1E3 ) -> ", c1.getimpedance( np.int64(1000) ) is c1.getimpedance( 1E3 ))
+impedancecache.resize( 0 )
+print("impedancecache.resize( 0 ) disables the cache -> ", c1.getimpedance( 1E3 ) is c1.getimpedance( 1E3 ), impedancecache.info())
+impedancecache.resize( 16384 )
+
 print("\n ****** END ********************************************")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+#
+#  test_eseries.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module eseries.py
+
+import time
+import math
+import numpy as np
+
+# import module to test
+from elements import *
+from eseries import *
+print("Test of module eseries.py\n")
+print("*"*40)
+print("\n    E - S E R I E S\n")
+
+print("Values of a series over a range")
+print("-"*30)
+print("eseries( 'E12', '1k', '10k' ) ->", eseries( 'E12', '1k', '10k' ))
+print("len( eseries( 'E96', 1E3, 1E6 ) ) ->", len( eseries( 'E96', 1E3, 1E6 ) ))
+print("eseries( 'E24', '3n', '5n' ) ->", eseries( 'E24', '3n', '5n' ))
+
+print("\nPairs with a product within bounds")
+print("-"*30)
+a = eseries( 'E12', 1, 100 )
+i, j = pairsinproduct( a, a, 95, 105 )
+print("pairsinproduct( a, a, 95, 105 ) ->", [ (float(a[x]), float(a[y])) for x, y in zip( i, j ) ])
+brute = [ (float(x), float(y)) for x in a for y in a if 95 <= x * y <= 105 ]
+print("same as trying all pairs ->", brute == [ (float(a[x]), float(a[y])) for x, y in zip( i, j ) ])
+
+print("\n    S A L L E N   K E Y\n")
+
+print("Best E96 / E12 designs for f0 = 10 kHz, Q = 0.707")
+print("-"*30)
+start = time.perf_counter()
+designs = sallenkeylowpass( 10E3, 0.707, top = 5 )
+toptimize = time.perf_counter() - start
+for design in designs:
+    print(design)
+print(f"took {toptimize:.3f} s")
+
+best = designs[0].elements
+R1, R2, C3, C4 = best["R1"], best["R2"], best["C3"], best["C4"]
+def Vout_divby_Vin( freq ):
+    Z1 = R1
+    Z2 = R2
+    Z3 = C3.getimpedance( freq )
+    Z4 = C4.getimpedance( freq )
+    numerator = Z3 * Z4
+    denominator = Z1 * Z2 + Z3 * (Z1 + Z2) + Z3 * Z4
+    return( numerator / denominator )
+print("magnitude of the best design at 10 kHz with the scalar classes ->", abs( Vout_divby_Vin( 10E3 ) ))
+
+print("\nPruning keeps the best design of a full search")
+print("-"*30)
+r = eseries( 'E12', 1E3, 1E5 )
+c = eseries( 'E6', 1E-9, 1E-7 )
+R1s, R2s, C3s, C4s = [ x.ravel() for x in np.meshgrid( r, r, c, c, indexing = "ij" ) ]
+tau = np.sqrt( R1s * R2s * C3s * C4s )
+f0s, Qs = 1 / ( 2 * math.pi * tau ), tau / ( C4s * ( R1s + R2s ) )
+meets = ( np.abs( f0s / 3E3 - 1 ) <= 0.02 ) & ( np.abs( Qs / 0.6 - 1 ) <= 0.02 ) & ( R1s <= R2s )
+print(f"full search over {len(R1s)} combinations, {meets.sum()} meet f0 and Q")
+designs = sallenkeylowpass( 3E3, 0.6, resistors = "E12", capacitors = "E6", resistance = (1E3, 1E5), \
+    capacitance = (1E-9, 1E-7), tolerance = 0.02, top = int( meets.sum() ) + 1 )
+print("sallenkeylowpass finds the same number of designs ->", len( designs ) == meets.sum())
+print("best design ->", designs[0])
+
+print("\nComparing with trying all combinations with the scalar classes")
+print("-"*30)
+combinations = len( eseries( 'E96', 1E3, 1E6 ) )**2 * len( eseries( 'E12', 100E-12, 1E-6 ) )**2
+start = time.perf_counter()
+for k in range(200):
+    Vout_divby_Vin( 10E3 * 0.5 )
+    Vout_divby_Vin( 10E3 )
+    Vout_divby_Vin( 10E3 * 2 )
+tscalar = ( time.perf_counter() - start ) / 200 * combinations
+print(f"{combinations} combinations at 3 frequencies (estimated): {tscalar / 3600:.1f} hours, sallenkeylowpass: {toptimize:.3f} s")
+
+print("\n ****** END ********************************************")
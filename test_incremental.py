@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+#
+#  test_incremental.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module incremental.py
+
+import time
+import numpy as np
+
+# import module to test
+from elements import *
+from incremental import *
+print("Test of module incremental.py\n")
+print("*"*40)
+print("\n    L A Z Y   E L E M E N T S\n")
+
+print("Building the RLC transferfunction with lazy elements")
+print("-"*30)
+graph = Lazygraph()
+R1 = graph.element( "R1", Resistance("100k") )
+R2 = graph.element( "R2", Resistance(1) )
+L1 = graph.element( "L1", Inductance("500uH") )
+C1 = graph.element( "C1", Capacitance("5nF") )
+f = graph.frequency
+Zrl = R2 + L1.getimpedance( f )
+Zparallel = Zrl.parallelwith( C1.getimpedance( f ) )
+H = Zparallel / ( R1 + Zparallel )
+print("H = Zparallel / ( R1 + Zparallel ) -> H:", H)
+print("graph ->", graph)
+frequencies = np.arange(90000, 110000, 150)
+print("graph.evaluate( Zparallel, frequencies[:2] ) ->", graph.evaluate( Zparallel, frequencies[:2] ))
+
+print("\n    I N C R E M E N T A L   E V A L U A T I O N\n")
+
+R1 = Resistance("100k")
+R2 = Resistance(1)
+L1 = Inductance("500uH")
+C1 = Capacitance("5nF")
+
+def transferfunction( f ):
+    Zrl = R2 + L1.getimpedance( f )
+    Zparallel = Zrl.parallelwith( C1.getimpedance( f ) )
+    return( Zparallel / ( R1 + Zparallel ) )
+
+print("Tracing the transferfunction of RLC_with_elements.py")
+print("-"*30)
+H = incremental_transfer( transferfunction )
+print("H = incremental_transfer( transferfunction ) -> H:", H)
+H( frequencies )
+print("first evaluation ->", H.counters())
+H.resetcounters()
+H( frequencies )
+print("same grid again ->", H.counters())
+H.resetcounters()
+H.set( C1 = "6nF" )
+result = H( frequencies )
+print("after H.set( C1 = '6nF' ) ->", H.counters())
+H.resetcounters()
+H.set( R1 = "47k" )
+result = H( frequencies )
+print("after H.set( R1 = '47k' ) ->", H.counters())
+C1 = Capacitance("6nF")
+R1 = Resistance("47k")
+print("same as the scalar classes ->", np.allclose( result, [ transferfunction( freq ) for freq in frequencies ] ))
+H.resetcounters()
+H( frequencies[:10] )
+print("another grid is evaluated in full ->", H.counters())
+values = np.full( len( frequencies ), 47E3 ) # a value per frequency
+H.set( R1 = values )
+result = np.array( H( frequencies ) )
+H.resetcounters()
+H.set( R1 = values.copy() )
+H( frequencies )
+print("R1 as an array of values, setting an equal array again ->", H.counters())
+values[0] = 39E3 # changed in place and set again
+H.set( R1 = values )
+print("an array changed in place and set again is recomputed ->", not np.isclose( H( frequencies )[0], result[0] ))
+H.set( R1 = "47k" )
+
+print("\nTuning one component on a large grid")
+print("-"*30)
+grid = np.geomspace(1E3, 1E6, num=2000000)
+H( grid )
+start = time.perf_counter()
+for value in ( "33k", "39k", "47k", "56k", "68k" ):
+    H.set( R1 = value )
+    H( grid )
+tincremental = ( time.perf_counter() - start ) / 5
+start = time.perf_counter()
+for value in ( "33k", "39k", "47k", "56k", "68k" ):
+    R1 = Resistance( value )
+    Zparallel = ( R2 + L1.getimpedance( grid ) ).parallelwith( C1.getimpedance( grid ) )
+    Zparallel / ( R1 + Zparallel )
+tfull = ( time.perf_counter() - start ) / 5
+print(f"changing R1, full recompute: {tfull:.3f} s, incremental: {tincremental:.3f} s")
+
+print("\n ****** END ********************************************")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+#
+#  test_instrument.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module instrument.py
+
+import time
+import numpy as np
+
+# import module to test
+import elements
+from elements import *
+from instrument import *
+print("Test of module instrument.py\n")
+print("*"*40)
+print("\n    S A L L E N   K E Y\n")
+
+R1 = Resistance("10k")
+R2 = Resistance("10k")
+C3 = Capacitance("1nF")
+C4 = Capacitance("1nF")
+
+def Vout_divby_Vin( freq ):
+    Z1 = R1
+    Z2 = R2
+    Z3 = C3.getimpedance( freq )
+    Z4 = C4.getimpedance( freq )
+    numerator = Z3 * Z4
+    denominator = Z1 * Z2 + Z3 * (Z1 + Z2) + Z3 * Z4
+    return( numerator / denominator )
+
+print("np.vectorize sweep of the Sallen Key low pass")
+print("-"*30)
+f = np.geomspace(500, 200000, num=20000)
+start = time.perf_counter()
+H = np.vectorize( Vout_divby_Vin )( f )
+tplain = time.perf_counter() - start
+with instrumented() as stats:
+    Hinstrumented = np.vectorize( Vout_divby_Vin )( f )
+print("with instrumented() as stats: ... -> stats:", stats)
+print(stats.report())
+print("\nsame result as without instrumentation ->", np.array_equal( H, Hinstrumented ))
+print("objects created per class ->", dict( stats.created ))
+print("stats.operatorcalls()['Impedance * Impedance'] ->", stats.operatorcalls()["Impedance * Impedance"])
+
+print("\nConstructing from strings")
+print("-"*30)
+values = [ f"{i % 1000}k{i % 10}" for i in range(20000) ]
+with instrumented() as stats:
+    resistances = [ Resistance( value ) for value in values ]
+    labels = [ r.tometricprefix() for r in resistances[:2000] ]
+times = stats.categorytimes()
+total = sum( times.values() )
+for category in ( "construction", "parse", "format" ):
+    print(f"share of {category} -> {times[category] / total:.1%}")
+print("stats.created['Resistance'] ->", stats.created["Resistance"])
+
+print("\nNothing changes outside the context")
+print("-"*30)
+print("methods are the originals again ->", \
+    Impedance.__mul__.__name__ == "__mul__" and not hasattr( Impedance.__mul__, "__wrapped__" ) \
+    and not hasattr( elements.newelement, "__wrapped__" ))
+start = time.perf_counter()
+np.vectorize( Vout_divby_Vin )( f )
+print(f"sweep before instrumenting: {tplain:.3f} s, after: {time.perf_counter() - start:.3f} s")
+try:
+    with stats:
+        with stats:
+            pass
+except RuntimeError as error:
+    print("nesting the same Instrumentation ->", error)
+
+print("\n ****** END ********************************************")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+#
+#  test_montecarlo.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module montecarlo.py
+
+import time
+import tracemalloc
+import numpy as np
+
+# import module to test
+from elements import *
+from montecarlo import *
+
+R1 = Resistance("10k", tol=0.01, dist="normal")
+R2 = Resistance("10k", tol=0.01, dist="normal")
+C3 = Capacitance("1nF", tol=0.1)
+C4 = Capacitance("1nF", tol=0.1)
+
+def Vout_divby_Vin( freq ):
+    Z1 = R1
+    Z2 = R2
+    Z3 = C3.getimpedance( freq )
+    Z4 = C4.getimpedance( freq )
+    numerator = Z3 * Z4
+    denominator = Z1 * Z2 + Z3 * (Z1 + Z2) + Z3 * Z4
+    return( numerator / denominator )
+
+# worker processes started with spawn import this file again as __mp_main__
+if __name__ != "__mp_main__":
+    print("Test of module montecarlo.py\n")
+    print("*"*40)
+    print("\n    T O L E R A N C E S\n")
+
+    print("Components declared with a tolerance")
+    print("-"*30)
+    print("R1 = Resistance('10k', tol=0.01, dist='normal') -> R1.tolerance:", R1.tolerance)
+    print("C3 = Capacitance('1nF', tol=0.1) -> C3.tolerance:", C3.tolerance)
+    print("the tolerance does not change the value -> R1 == Resistance('10k'):", R1 == Resistance("10k"))
+    rng = np.random.default_rng(1)
+    values = C3.tolerance.sample( C3.value, 100000, rng )
+    print("uniform samples of C3 stay within 10% ->", values.min() >= 0.9E-9 and values.max() <= 1.1E-9)
+    values = R1.tolerance.sample( R1.value.real, 100000, rng )
+    print("normal samples of R1 have a standard deviation of tol / 3 ->", round( float( values.std() ) / 10000 * 3, 3 ))
+
+    print("\n    S A L L E N   K E Y\n")
+
+    print("10000 samples of the Sallen Key low pass")
+    print("-"*30)
+    f = np.geomspace(500, 200000, num=200)
+    start = time.perf_counter()
+    result = montecarlo( Vout_divby_Vin, f, samples = 10000 )
+    tmontecarlo = time.perf_counter() - start
+    print("result = montecarlo( Vout_divby_Vin, f, samples = 10000 ) -> result:", result)
+    envelope = result.magnitudeenvelope
+    index = np.searchsorted( f, 15915 )
+    print(f"magnitude at {f[index]:.0f} Hz, percentiles 1, 50, 99 ->", [ round( float( envelope[p][index] ), 4 ) for p in result.percentiles ])
+    phase = result.phaseenvelope
+    print(f"phase in degrees at {f[index]:.0f} Hz ->", [ round( float( np.degrees( phase[p][index] ) ), 2 ) for p in result.percentiles ])
+    nominal = np.abs( Vout_divby_Vin( f ) )
+    print("median follows the nominal response ->", np.max( np.abs( envelope[50] - nominal ) ) < 0.01)
+
+    print("\nYield of a specification")
+    print("-"*30)
+    below = f < 5000
+    passed = result.yieldof( lambda magnitude, phase: magnitude[:, index] > 0.5 )
+    print("fraction of samples with more than -6 dB at 15.9 kHz ->", passed)
+    passed = result.yieldof( lambda magnitude, phase: ( magnitude[:, below] > 0.9 ).all( axis=1 ) )
+    print("fraction of samples within 0.9 dB of the passband below 5 kHz ->", passed)
+
+    print("\nSame samples whatever the number of worker processes")
+    print("-"*30)
+    single = montecarlo( Vout_divby_Vin, f, samples = 4000, chunksize = 1000 )
+    pooled = montecarlo( Vout_divby_Vin, f, samples = 4000, chunksize = 1000, workers = 2 )
+    print("workers = 2 gives the same magnitudes ->", np.array_equal( single.magnitude, pooled.magnitude ))
+    other = montecarlo( Vout_divby_Vin, f, samples = 4000, chunksize = 1000, seed = 1 )
+    print("another seed gives other samples ->", not np.array_equal( single.magnitude, other.magnitude ))
+
+    print("\nStatistics of more samples than are kept")
+    print("-"*30)
+    condition = lambda magnitude, phase: magnitude[:, index] > 0.5
+    statistics = montecarlostatistics( Vout_divby_Vin, f, samples = 4000, chunksize = 1000, condition = condition, workers = 2 )
+    print("montecarlostatistics( Vout_divby_Vin, f, samples = 4000, chunksize = 1000, ... ) ->", statistics)
+    kept = { "mean": single.magnitude.mean( axis=0 ), "std": single.magnitude.std( axis=0 ), \
+        "min": single.magnitude.min( axis=0 ), "max": single.magnitude.max( axis=0 ) }
+    print("same mean, std, min and max of the magnitude as montecarlo() ->", \
+        all( np.allclose( statistics.magnitudestatistics[name], kept[name], rtol = 1E-12 ) for name in kept ))
+    print("same yield ->", statistics.yieldof() == single.yieldof( condition ))
+    print("chunks of montecarlochunks() are the samples of montecarlo() ->", np.array_equal( np.concatenate( \
+        [ chunk.phase for chunk in montecarlochunks( Vout_divby_Vin, f, samples = 4000, chunksize = 1000 ) ] ), single.phase ))
+    tracemalloc.start()
+    start = time.perf_counter()
+    statistics = montecarlostatistics( Vout_divby_Vin, f, samples = 10**5, condition = condition )
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"10**5 samples in {time.perf_counter() - start:.2f} s, peak {peak / 2**20:.0f} MiB, " \
+        f"montecarlo() would keep {2 * 8 * 10**5 * len(f) / 2**20:.0f} MiB")
+    std = statistics.magnitudestatistics["std"][index]
+    print(f"magnitude at {f[index]:.0f} Hz, mean {statistics.magnitudestatistics['mean'][index]:.4f}, std {std:.4f}, yield {statistics.yieldof():.4f}")
+
+    print("\nComparing with a loop over scalar elements")
+    print("-"*30)
+    def scalarsample( rng ):
+        global R1, R2, C3, C4
+        saved = R1, R2, C3, C4
+        R1, R2 = [ Resistance( x.tolerance.sample( x.value.real, None, rng ) ) for x in (R1, R2) ]
+        C3, C4 = [ Capacitance( x.tolerance.sample( x.value, None, rng ) ) for x in (C3, C4) ]
+        H = [ abs( Vout_divby_Vin( freq ) ) for freq in f ]
+        R1, R2, C3, C4 = saved
+        return( H )
+    start = time.perf_counter()
+    rng = np.random.default_rng(0)
+    for i in range(100):
+        scalarsample( rng )
+    tscalar = ( time.perf_counter() - start ) * 100
+    print(f"10000 samples, scalar loop (estimated from 100): {tscalar:.1f} s, montecarlo: {tmontecarlo:.3f} s")
+    print(f"speedup -> {tscalar / tmontecarlo:.0f}x")
+
+    print("\n ****** END ********************************************")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+#
+#  test_rational.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module rational.py
+
+import time
+import numpy as np
+
+# import module to test
+from elements import *
+from rational import *
+print("Test of module rational.py\n")
+print("*"*40)
+print("\n    S A L L E N   K E Y\n")
+
+R1 = Resistance("10k")
+R2 = Resistance("10k")
+C3 = Capacitance("1nF")
+C4 = Capacitance("1nF")
+
+def Vout_divby_Vin( freq ):
+    Z1 = R1
+    Z2 = R2
+    Z3 = C3.getimpedance( freq )
+    Z4 = C4.getimpedance( freq )
+    numerator = Z3 * Z4
+    denominator = Z1 * Z2 + Z3 * (Z1 + Z2) + Z3 * Z4
+    return( numerator / denominator )
+
+print("Writing the transferfunction as a ratio of polynomials in s")
+print("-"*30)
+H = rational_transfer( Vout_divby_Vin )
+print("H = rational_transfer( Vout_divby_Vin ) -> H:", repr(H))
+print(H)
+print("H.poles ->", H.poles)
+print("H.zeros ->", H.zeros)
+print("H.f0 ->", Electricalelement.floattometricprefix( H.f0, "Hz" ), " H.Q ->", round( H.Q, 6 ))
+print("same as 1 / ( 2 pi sqrt( R1 R2 C3 C4 ) ) ->", \
+    np.isclose( H.f0, 1 / ( 2 * np.pi * np.sqrt( R1.value.real * R2.value.real * C3.value * C4.value ) ) ))
+
+print("\nEvaluating over an array of frequencies")
+print("-"*30)
+f = np.geomspace(500, 200000, num=1000)
+scalar = [ Vout_divby_Vin( freq ) for freq in f ]
+print("largest difference with the scalar classes, Horner ->", np.max( np.abs( H( f ) - scalar ) ))
+print("largest difference with the scalar classes, poles and zeros ->", np.max( np.abs( H( f, "zpk" ) - scalar ) ))
+f = np.geomspace(1, 1E6, num=1000000)
+start = time.perf_counter()
+H( f )
+thorner = time.perf_counter() - start
+print(f"1000000 points -> {thorner * 1E6 / 1000:.1f} us per 1000 points")
+
+print("\n    R L C\n")
+
+R1 = Resistance("100k")
+R2 = Resistance(1)
+L1 = Inductance("500uH")
+C1 = Capacitance("5nF")
+
+def transferfunction( f ):
+    Zrl = R2 + L1.getimpedance( f )
+    Zparallel = Zrl.parallelwith( C1.getimpedance( f ) )
+    return( Zparallel / ( R1 + Zparallel ) )
+
+print("Common factors cancel, the RLC circuit is of second order")
+print("-"*30)
+H = rational_transfer( transferfunction )
+print("H = rational_transfer( transferfunction ) -> H.order:", H.order)
+print(H)
+print("H.f0 ->", Electricalelement.floattometricprefix( H.f0, "Hz" ), " H.Q ->", round( H.Q, 3 ))
+f = np.arange(90000, 110000, 150)
+print("largest difference with the scalar classes ->", np.max( np.abs( H( f ) - [ transferfunction( freq ) for freq in f ] ) ))
+
+print("\nAn impedance keeps its kind")
+print("-"*30)
+Z = rational_transfer( lambda f: Impedance.parallel( R2 + L1.getimpedance( f ), C1.getimpedance( f ) ) )
+print("Z ->", repr(Z))
+print("Z.zeros ->", Z.zeros)
+print("Z( [ 1E3, 1E5 ] ) ->", Z( [ 1E3, 1E5 ] ))
+
+print("\n ****** END ********************************************")
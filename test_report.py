@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+#
+#  test_report.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module report.py
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+import importlib.util
+import numpy as np
+
+# import module to test
+from elements import *
+from transfercompiler import *
+from sweep import Frequencyrange
+from report import *
+
+R1 = Resistance("100k")
+R2 = Resistance(1)
+L1 = Inductance("500uH")
+C1 = Capacitance("5nF")
+
+def transferfunction( f ):
+    Zrl = R2 + L1.getimpedance( f )
+    Zparallel = Zrl.parallelwith( C1.getimpedance( f ) )
+    return( Zparallel / ( R1 + Zparallel ) )
+
+if __name__ != "__mp_main__": # worker processes only need the definitions above
+    print("Test of module report.py\n")
+    print("*"*40)
+    print("\n    D E C I M A T I O N\n")
+
+    H = compile_transfer( transferfunction )
+    f = np.geomspace(1E3, 1E7, num=10**6)
+    values = H( f )
+    print("Sweep of 10**6 frequencies for a plot 2000 pixels wide")
+    print("-"*30)
+    start = time.perf_counter()
+    keep = decimate( f, values, 2000 )
+    print(f"decimate( f, values, 2000 ) -> {len(keep)} points in {time.perf_counter() - start:.3f} s")
+    print("peak is kept ->", np.max( np.abs( values[keep] ) ) == np.max( np.abs( values ) ))
+    print("first and last frequency are kept ->", keep[0] == 0 and keep[-1] == len(f) - 1)
+    print("frequencies stay in order ->", bool( np.all( np.diff( keep ) > 0 ) ))
+    print("a short sweep is kept as it is ->", len( decimate( f[:5000], values[:5000], 2000 ) ) == 5000)
+
+    print("\n    B A T C H   R E P O R T\n")
+
+    directory = tempfile.mkdtemp()
+    print("Reports of 8 RLC circuits in 4 worker processes")
+    print("-"*30)
+    jobs = [ Reportjob( f"RLC_R2_{R}", H, Frequencyrange( 1E4, 1E6, 10**5 ), R2 = R ) for R in ( 0.1, 0.22, 0.47, 1, 2.2, 4.7, 10, 22 ) ]
+    print("jobs[0] ->", jobs[0])
+    plot = importlib.util.find_spec( "matplotlib" ) is not None
+    if not plot:
+        print("matplotlib is not installed, only tables are written")
+    start = time.perf_counter()
+    results = batchreport( jobs, directory, workers = 4, plot = plot )
+    print(f"batchreport( jobs, directory, workers = 4 ) took {time.perf_counter() - start:.2f} s")
+    print("results[0] ->", { key: os.path.basename( value ) if isinstance( value, str ) else value for key, value in results[0].items() })
+    print("files written ->", len( os.listdir( directory ) ))
+    with open( results[3]["table"] ) as file:
+        lines = file.readlines()
+    print("table header ->", lines[0].strip())
+    print("table lines ->", len( lines ))
+    peak = max( lines[1:], key = lambda line: float( line.split(",")[1] ) )
+    print("peak in the table of R2 = 1 Ohm ->", peak.strip())
+    jobs = [ Reportjob( f"RLC_C1_{C}", H, Frequencyrange( 1E4, 1E6, 10**3 ), C1 = Capacitance( C ) ) for C in ( "1u", "5n" ) ]
+    results = batchreport( jobs, directory, workers = 2, plot = False )
+    print("elements as values in worker processes, batchreport( jobs, directory, workers = 2 ) ->", \
+        [ os.path.basename( result["table"] ) for result in results ])
+
+    print("\n    E X A M P L E S   I N   B A T C H\n")
+
+    print("Running the example scripts without plotting")
+    print("-"*30)
+    def runtime( *arguments ):
+        start = time.perf_counter()
+        subprocess.run( [ sys.executable, *arguments ], stdout = subprocess.DEVNULL, stdin = subprocess.DEVNULL, check = True )
+        return( time.perf_counter() - start )
+    timport = min( runtime( "-c", "import elements" ) for _ in range(3) )
+    print(f"python -c 'import elements' -> {timport:.3f} s")
+    for script in ( "RLC_with_elements.py", "sallen_key_with_elements_numpy.py" ):
+        print(f"python {script} --noplot -> {min( runtime( script, '--noplot' ) for _ in range(3) ):.3f} s")
+    if plot:
+        runtime( "sallen_key_with_elements_numpy.py", "--report", directory )
+        print("sallen_key_with_elements_numpy.py --report writes ->", sorted( name for name in os.listdir( directory ) if name.startswith( "sallen" ) ))
+    shutil.rmtree( directory )
+
+    print("\n ****** END ********************************************")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+#
+#  test_spice.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module spice.py
+
+import os
+import time
+import shutil
+import tempfile
+import tracemalloc
+import numpy as np
+
+# import module to test
+from elements import *
+from circuit import *
+from spice import *
+
+sallenkey = """Sallen Key low pass with a buffer subcircuit
+* ideal opamp as a voltage follower
+.param R=10k C=1nF
+Vin in 0 DC 0 AC 1
+R1 in a {R}
+R2 a b 10kOhm
+C3 a out '2*C'       ; feedback capacitor
+X1 b out follower
+C4 b 0
++ {C}
+.subckt follower in out
+E1 out 0 in 0 1
+.ends
+.ac dec 20 500 200k
+.tran 1u 1m
+.end
+R9 in 0 1
+"""
+
+ladder = """RC ladder of sections
+.param Rs=1k
+V1 in 0 AC 1
+{cards}
+.subckt section left right Cs=1n
+R1 left right {{Rs}}
+C1 right 0 {{Cs}}
+.ends
+"""
+
+print("Test of module spice.py\n")
+print("*"*40)
+print("\n    V A L U E S\n")
+
+for word in ( "4.7k", "10meg", "1M", "1MEG", "1uF", "100pF", "2.2", "1e3", "-5m" ):
+    print(f"spicevalue( {word!r} ) ->", spicevalue( word ))
+print("spicevalue( '{2*R+1k}', { 'r': 10E3 } ) ->", spicevalue( "{2*R+1k}", { "r": 10E3 } ))
+print("spicevalue( \"'sqrt(L/C)'\", ... ) ->", spicevalue( "'sqrt(L/C)'", { "l": 1E-3, "c": 1E-9 } ))
+for word, scope in ( ( "{__import__('os')}", {} ), ( "{Q}", {} ) ):
+    try:
+        spicevalue( word, scope )
+    except (ValueError, NameError) as error:
+        print(f"spicevalue( {word!r} ) -> {type(error).__name__}: {error}")
+
+print("\n    N E T L I S T\n")
+
+print("Cards with comments and continuation lines")
+print("-"*30)
+for number, words in spicecards( sallenkey.splitlines()[:10] ):
+    print(number, words)
+
+print("\nParsed netlist")
+print("-"*30)
+netlist = parsenetlist( sallenkey.splitlines() )
+print("parsenetlist( lines ) ->", netlist)
+for component in netlist.components:
+    print(component)
+print("params ->", netlist.params)
+print("subcircuits ->", netlist.subcircuits)
+print("ignored ->", netlist.ignored)
+print("frequencies of .ac ->", len( netlist.frequency ), netlist.frequency[0], netlist.frequency[-1])
+print("connections() ->", netlist.connections())
+print("elements() ->", netlist.elements())
+
+print("\nSame as the Sallen Key built by hand")
+print("-"*30)
+handmade = Circuit()
+handmade.add( "Vin", Voltage( 1 ), "in", "0" )
+handmade.add( "R1", Resistance( "10k" ), "in", "a" )
+handmade.add( "R2", Resistance( "10k" ), "a", "b" )
+handmade.add( "C3", Capacitance( "2n" ), "a", "out" )
+handmade.add( "C4", Capacitance( "1n" ), "b", "0" )
+handmade.addvcvs( "E1", "out", "0", "b", "0", 1 )
+imported = netlist.circuit().acsweep( netlist.frequency ).voltage( "out" ).value
+expected = handmade.acsweep( netlist.frequency ).voltage( "out" ).value
+print("V(out) of netlist.circuit() same as Circuit built by hand ->", np.allclose( imported, expected ))
+
+print("\nErrors with the line number")
+print("-"*30)
+for lines in ( [ "title", "R1 in 0" ], [ "title", "X1 a b missing" ], [ "title", ".subckt s a b", "R1 a b 1k" ], \
+        [ "title", "R1 in 0 {R}" ], [ "title", "Q1 c b e model" ], [ "title", "R1 a 0 {exp(1000)}" ], \
+        [ "title", "R1 a 0 {exp(X)}", ".param X=1000" ], [ "title", ".param Y={X**X}", ".param X=1000" ] ):
+    try:
+        parsenetlist( lines )
+    except ValueError as error:
+        print(f"parsenetlist( {lines} ) -> ValueError: {error}")
+
+print("\n    S U B C I R C U I T S   A N D   C A C H E\n")
+
+directory = tempfile.mkdtemp()
+sections = 20000
+path = os.path.join( directory, "ladder.cir" )
+with open( path, "w" ) as file:
+    file.write( ladder.format( cards = "\n".join( f"X{i} n{i} n{i + 1} section" + ( " Cs=2n" if i % 2 else "" ) \
+        for i in range( sections ) ).replace( "n0 ", "in ", 1 ) ) )
+print(f"ladder of {sections} sections, {os.path.getsize( path ) / 2**20:.2f} MiB")
+print("-"*30)
+cache = Parsecache( directory = os.path.join( directory, "cache" ) )
+start = time.perf_counter()
+netlist = readnetlist( path, cache )
+print(f"readnetlist() -> {netlist}, {( time.perf_counter() - start ) * 1E3:.0f} ms")
+print("components of section 1 ->", [ component for component in netlist.components if component[0].startswith( "x1." ) ])
+netlist.components.clear() # the caller changes its copy
+start = time.perf_counter()
+again = readnetlist( path, cache )
+print(f"second readnetlist() from cache -> {again}, {( time.perf_counter() - start ) * 1E3:.1f} ms, a copy {again is not netlist}")
+cache.clear()
+start = time.perf_counter()
+netlist = readnetlist( path, cache )
+print(f"after clear() from the json file in the cache directory -> {netlist}, {( time.perf_counter() - start ) * 1E3:.1f} ms")
+print("same components ->", again.components == netlist.components)
+print("cache.info() ->", cache.info())
+with open( path, "a" ) as file:
+    file.write( "R9 in 0 1k\n" )
+print("changed file parsed again ->", readnetlist( path, cache ), cache.info())
+cache.clear()
+for entry in os.scandir( cache.directory ): # a damaged file is a miss
+    with open( entry.path, "w" ) as file:
+        file.write( "{ not json" )
+print("damaged cache file parsed again ->", readnetlist( path, cache ), cache.info())
+print("files in the cache directory ->", sorted( os.path.splitext( name )[1] for name in os.listdir( cache.directory ) ))
+
+print("\n    S T R E A M I N G\n")
+
+cards = 200000
+path = os.path.join( directory, "large.cir" )
+with open( path, "w" ) as file:
+    file.write( "chain of resistors\n.param R=1k\nV1 n0 0 AC 1\n" )
+    for i in range( cards ):
+        file.write( f"R{i} n{i} n{i + 1} {{R*{1 + i % 10}}}\n" )
+print(f"{cards} R cards, {os.path.getsize( path ) / 2**20:.2f} MiB")
+print("-"*30)
+tracemalloc.start()
+with open( path ) as file:
+    count = sum( 1 for component in spicecomponents( file ) )
+peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+print(f"spicecomponents() -> {count} components, peak {peak / 2**20:.2f} MiB, bounded {peak < 4 * 2**20}")
+tracemalloc.start()
+netlist = readnetlist( path, cache = None )
+size, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+print(f"readnetlist() -> {netlist}, kept {size / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB, " \
+    f"peak at most 10 % above what is kept {peak < 1.1 * size}")
+shutil.rmtree( directory )
+
+print("\n ****** END ********************************************")
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+#
+#  test_sweep.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module sweep.py
+
+import os
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+
+# import module to test
+from elements import *
+from sweep import *
+from circuit import *
+print("Test of module sweep.py\n")
+print("*"*40)
+print("\n    S A L L E N   K E Y\n")
+
+R1 = Resistance("10k")
+R2 = Resistance("10k")
+C3 = Capacitance("1nF")
+C4 = Capacitance("1nF")
+
+# resistors with a temperature coefficient of 100 ppm per degree
+def Vout_divby_Vin( freq, temperature = 25.0 ):
+    drift = 1 + 100E-6 * ( temperature - 25.0 )
+    Z1 = R1 * drift
+    Z2 = R2 * drift
+    Z3 = C3.getimpedance( freq )
+    Z4 = C4.getimpedance( freq )
+    numerator = Z3 * Z4
+    denominator = Z1 * Z2 + Z3 * (Z1 + Z2) + Z3 * Z4
+    return( numerator / denominator )
+
+print("Sweeping frequency x R1 x C3 x temperature in one call")
+print("-"*30)
+f = np.geomspace(100, 1E6, num=400)
+R1values = [ "4k7", "5k6", "6k8", "8k2", "10k", "12k" ]
+C3values = Electricalelement.parse_many( [ "470p", "680p", "1n", "1n5", "2n2" ] )
+temperatures = np.linspace(-40, 125, 34)
+start = time.perf_counter()
+cube = sweep( Vout_divby_Vin, f, R1 = R1values, C3 = C3values, temperature = temperatures )
+tsweep = time.perf_counter() - start
+print("cube = sweep( Vout_divby_Vin, f, R1 = R1values, C3 = C3values, temperature = temperatures ) -> cube:", cube)
+print("cube.shape ->", cube.shape)
+print("cube.axes['R1'] ->", cube.axes['R1'])
+
+print("\nSlicing by position and by value")
+print("-"*30)
+print("cube.isel( temperature = 0 ) ->", cube.isel( temperature = 0 ))
+point = cube.sel( R1 = "10k", C3 = "1n", temperature = 25 )
+print("cube.sel( R1 = '10k', C3 = '1n', temperature = 25 ) ->", point)
+print("same as the scalar classes ->", np.allclose( point.values, [ Vout_divby_Vin( freq ) for freq in f ] ))
+mixed = sweep( Vout_divby_Vin, f[:10], R1 = [ "1k", "10k", Resistance("100k") ] )
+print("R1 = [ '1k', '10k', Resistance('100k') ] -> axis", mixed.axes["R1"], \
+    "sel( R1 = '100k' ) has no nan ->", not np.isnan( mixed.sel( R1 = "100k" ).values ).any())
+
+print("\nReductions")
+print("-"*30)
+cutoff = cube.cutoff( -3.0 )
+print("cutoff = cube.cutoff( -3.0 ) -> cutoff:", cutoff)
+print("-3 dB point for R1 = 10k, C3 = 1n at 25 degrees ->", \
+    Electricalelement.floattometricprefix( float( cutoff.sel( R1 = "10k", C3 = "1n", temperature = 25 ).values ), "Hz" ))
+drift = cutoff.reduce( np.max, "temperature" ).values / cutoff.reduce( np.min, "temperature" ).values
+print("largest change of the cutoff over temperature ->", f"{( drift.max() - 1 ) * 100:.2f} %")
+peaking = cube.db().reduce( np.max, "frequency" )
+print("largest gain peaking over all combinations ->", f"{peaking.values.max():.2f} dB")
+
+print("\nSame result in small chunks")
+print("-"*30)
+chunked = sweep( Vout_divby_Vin, f, R1 = R1values, C3 = C3values, temperature = temperatures, membytes = 2**16 )
+print("membytes = 2**16 gives the same cube ->", np.array_equal( chunked.values, cube.values ))
+
+print("\nComparing with nested loops over getimpedance")
+print("-"*30)
+start = time.perf_counter()
+for R in R1values[:2]:
+    for C in C3values[:2]:
+        for T in temperatures:
+            R1, C3 = Resistance( R ), Capacitance( float(C) )
+            H = [ Vout_divby_Vin( freq, T ) for freq in f ]
+tloops = ( time.perf_counter() - start ) * cube.values.size / ( 4 * len(temperatures) * len(f) )
+print(f"{cube.values.size} points, nested loops (estimated): {tloops:.1f} s, sweep: {tsweep:.3f} s")
+print(f"speedup -> {tloops / tsweep:.0f}x")
+
+print("\n    A D A P T I V E   S W E E P\n")
+
+R1 = Resistance("100k")
+R2 = Resistance(1)
+L1 = Inductance("500uH")
+C1 = Capacitance("5nF")
+
+def transferfunction( f ):
+    Zrl = R2 + L1.getimpedance( f )
+    Zparallel = Zrl.parallelwith( C1.getimpedance( f ) )
+    return( Zparallel / ( R1 + Zparallel ) )
+
+# largest difference in dB between a sweep interpolated on a log scale and a dense reference
+H = compile_transfer( transferfunction )
+reference = np.geomspace(90000, 110000, num=200001)
+referencedb = 20 * np.log10( np.abs( H( reference ) ) )
+def dberror( frequency, values ):
+    interpolated = np.interp( np.log10( reference ), np.log10( frequency ), 20 * np.log10( np.abs( values ) ) )
+    return( np.max( np.abs( interpolated - referencedb ) ) )
+
+print("RLC resonance of RLC_with_elements.py from 90 to 110 kHz")
+print("-"*30)
+adaptive = adaptivesweep( transferfunction, 90000, 110000, dbtolerance = 0.1 )
+f = adaptive.axes["frequency"]
+print("adaptive = adaptivesweep( transferfunction, 90000, 110000, dbtolerance = 0.1 ) -> adaptive:", adaptive)
+print("smallest and largest step ->", f"{np.diff( f ).min():.1f} Hz, {np.diff( f ).max():.1f} Hz")
+print("peak ->", f"{f[ np.argmax( np.abs( adaptive.values ) ) ]:.0f} Hz,", \
+    f"{np.max( adaptive.db().values ):.3f} dB, reference {referencedb.max():.3f} dB")
+print(f"largest error of {len(f)} adaptive points -> {dberror( f, adaptive.values ):.4f} dB")
+explicit = adaptivesweep( transferfunction, 90000, 110000, dbtolerance = 0.1, elements = { "R1": R1, "R2": R2, "L1": L1, "C1": C1 } )
+print("elements given by name, same points ->", np.array_equal( explicit.axes["frequency"], f ))
+uniform = np.arange(90000, 110000, 150)
+print(f"largest error of {len(uniform)} points in 150 Hz steps -> {dberror( uniform, H( uniform ) ):.4f} dB")
+for points in (500, 1000, 2000):
+    uniform = np.geomspace(90000, 110000, num=points)
+    print(f"largest error of {points} uniform points -> {dberror( uniform, H( uniform ) ):.4f} dB")
+
+print("\nSweeping a circuit solution without compiling")
+print("-"*30)
+rlc = Circuit()
+rlc.add( "V1", Voltage(1), "in", "0" )
+rlc.add( "R1", R1, "in", "out" )
+rlc.add( "C1", C1, "out", "0" )
+rlc.add( "R2", Resistance("0.1"), "out", "mid" )
+rlc.add( "L1", L1, "mid", "0" )
+adaptive = adaptivesweep( lambda f: rlc.acsweep( f ).voltage("out"), 1E3, 1E6, compile = False )
+print("R2 = 0.1 Ohm, 1 kHz to 1 MHz ->", adaptive)
+print("peak ->", f"{adaptive.axes['frequency'][ np.argmax( np.abs( adaptive.values ) ) ]:.0f} Hz")
+print("1 / ( 2 pi sqrt( L1 C1 ) ) ->", f"{1 / ( 2 * np.pi * np.sqrt( L1.value * C1.value ) ):.0f} Hz")
+
+print("\n    S T R E A M I N G   S W E E P\n")
+
+print("Frequencies worked out per chunk")
+print("-"*30)
+frequencies = Frequencyrange( 1E3, 1E6, 10**7 )
+print("frequencies = Frequencyrange( 1E3, 1E6, 10**7 ) ->", frequencies)
+print("same as np.geomspace ->", np.allclose( frequencies[:1000], np.geomspace(1E3, 1E6, num=10**7)[:1000] ))
+for chunk in sweepchunks( transferfunction, frequencies[:300000], chunksize = 100000 ):
+    print("sweepchunks( transferfunction, frequencies[:300000], chunksize = 100000 ) ->", chunk)
+
+print("\nWriting a sweep of 10**7 frequencies to a .npy file")
+print("-"*30)
+reported = []
+def progress( done, total ):
+    if done * 4 // total > len( reported ):
+        reported.append( done )
+        print(f"    {done} of {total} frequencies")
+directory = tempfile.mkdtemp()
+path = os.path.join( directory, "rlc.npy" )
+tracemalloc.start()
+start = time.perf_counter()
+result = streamsweep( transferfunction, frequencies, path, chunksize = 2**16, progress = progress )
+tstream = time.perf_counter() - start
+peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+print("streamsweep( transferfunction, frequencies, path, progress = progress ) ->", type( result ).__name__, result.shape)
+print(f"took {tstream:.2f} s, {os.path.getsize( path ) / 2**20:.0f} MiB on disk, peak memory {peak / 2**20:.1f} MiB")
+print("last value same as compile_transfer ->", np.allclose( result[-1], H( np.array( [1E6] ) )[0] ))
+
+print("\nPeak memory does not depend on the number of frequencies")
+print("-"*30)
+for num in ( 10**5, 10**6 ):
+    out = np.lib.format.open_memmap( os.path.join( directory, "out.npy" ), mode = "w+", dtype = complex, shape = (num,) )
+    tracemalloc.start()
+    streamsweep( transferfunction, Frequencyrange( 1E3, 1E6, num ), out, chunksize = 2**14 )
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{num} frequencies into a preallocated np.memmap -> peak memory {peak / 2**20:.2f} MiB")
+    del out
+for name in os.listdir( directory ):
+    os.remove( os.path.join( directory, name ) )
+os.rmdir( directory )
+
+print("\n ****** END ********************************************")
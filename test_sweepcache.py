@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+#
+#  test_sweepcache.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module sweepcache.py
+
+import os
+import time
+import shutil
+import tempfile
+import functools
+import concurrent.futures
+import numpy as np
+
+# import module to test
+from elements import *
+from sweep import *
+from sweepcache import *
+
+R1 = Resistance("100k")
+R2 = Resistance(1)
+L1 = Inductance("500uH")
+C1 = Capacitance("5nF")
+
+def transferfunction( f ):
+    Zrl = R2 + L1.getimpedance( f )
+    Zparallel = Zrl.parallelwith( C1.getimpedance( f ) )
+    return( Zparallel / ( R1 + Zparallel ) )
+
+# the same calculation written out differently
+def samefunction( freq ):
+    Zparallel = ( R2 + L1.getimpedance( freq ) ).parallelwith( C1.getimpedance( freq ) )
+    return( Zparallel / ( R1 + Zparallel ) )
+
+if __name__ != "__mp_main__": # worker processes only need the definitions above
+    print("Test of module sweepcache.py\n")
+    print("*"*40)
+    print("\n    S W E E P   C A C H E\n")
+
+    directory = tempfile.mkdtemp()
+    cache = Sweepcache( directory, maxbytes = 2**26 )
+    print("cache = Sweepcache( directory, maxbytes = 2**26 ) ->", cache)
+
+    print("\nSame sweep twice")
+    print("-"*30)
+    f = Frequencyrange( 1E3, 1E6, 2 * 10**6 )
+    start = time.perf_counter()
+    first = cache.sweep( transferfunction, f )
+    tmiss = time.perf_counter() - start
+    start = time.perf_counter()
+    second = cache.sweep( transferfunction, f )
+    thit = time.perf_counter() - start
+    print("cache.sweep( transferfunction, f ) ->", type( second ).__name__, second.shape, second.dtype)
+    print(f"first call: {tmiss:.3f} s, second call: {thit:.4f} s")
+    print("same values ->", np.array_equal( first, second ))
+    print("cache.info() ->", cache.info())
+
+    print("\nWhat the key depends on")
+    print("-"*30)
+    compiled = compile_transfer( transferfunction )
+    grid = np.geomspace(1E3, 1E6, num=1000)
+    key = cache.key( compiled, grid )
+    print("same calculation written differently ->", key == cache.key( compile_transfer( samefunction ), grid ))
+    print("C1 = '5n' given as a string ->", key == cache.key( compiled, grid, { "C1": "5n" } ))
+    print("C1 = '5n1' ->", key == cache.key( compiled, grid, { "C1": "5n1" } ))
+    print("one frequency changed ->", key == cache.key( compiled, np.append( grid[:-1], 1.0001E6 ) ))
+    R1 = Resistance("47k")
+    print("after R1 = Resistance('47k') ->", key == cache.key( compile_transfer( transferfunction ), grid ))
+    R1 = Resistance("100k")
+    result = cache.sweep( transferfunction, grid, C1 = "4n7" )
+    C1 = Capacitance("4n7")
+    print("cache.sweep( transferfunction, grid, C1 = '4n7' ) same as compile_transfer ->", \
+        np.allclose( result, compile_transfer( transferfunction )( grid ) ))
+    C1 = Capacitance("5nF")
+
+    print("\nLeast recently used results are removed first")
+    print("-"*30)
+    small = Sweepcache( os.path.join( directory, "small" ), maxentries = 3 )
+    keys = [ small.key( compiled, grid, { "R1": R } ) for R in ( "10k", "22k", "47k", "100k" ) ]
+    for k in keys[:3]:
+        small.store( k, compiled( grid ) )
+        time.sleep( 0.01 )
+    small.lookup( keys[0] ) # keys[1] is now the least recently used
+    time.sleep( 0.01 )
+    small.store( keys[3], compiled( grid ) )
+    print("after storing a fourth result with maxentries = 3 ->", [ small.lookup( k ) is not None for k in keys ])
+    sized = Sweepcache( os.path.join( directory, "sized" ), maxbytes = 40000 )
+    for k in keys:
+        sized.store( k, compiled( grid ) )
+    print("16 kB results with maxbytes = 40000 ->", sized.info())
+    stored = small.store( keys[0], compiled( grid ) )
+    for entry in os.scandir( small.directory ): # another process evicts everything
+        os.remove( entry.path )
+    print("store() returns the values, not the evicted file ->", type( stored ).__name__, np.array_equal( stored, compiled( grid ) ))
+    print("lookup() of the evicted result ->", small.lookup( keys[0] ))
+
+    print("\nProcesses sharing the cache")
+    print("-"*30)
+    shared = os.path.join( directory, "shared" )
+    # the workers get the compiled transferfunction, they do not import this module
+    sweep = functools.partial( Sweepcache( shared ).sweep, compile_transfer( transferfunction ) )
+    with concurrent.futures.ProcessPoolExecutor( 4 ) as pool:
+        sums = [ float( np.abs( result ).sum() ) for result in pool.map( sweep, [ Frequencyrange( 1E3, 1E6, 10**6 ) ] * 8 ) ]
+    print("8 sweeps in 4 processes give the same result ->", len( set( sums ) ) == 1)
+    print("files in the shared directory ->", sorted( name[-4:] for name in os.listdir( shared ) ))
+    print("the stored result is complete ->", np.isclose( np.abs( Sweepcache( shared ).sweep( transferfunction, \
+        Frequencyrange( 1E3, 1E6, 10**6 ) ) ).sum(), sums[0] ))
+
+    cache.clear()
+    print("\ncache.clear(); cache.info() ->", cache.info())
+    shutil.rmtree( directory )
+
+    print("\n ****** END ********************************************")
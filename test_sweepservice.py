@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+#
+#  test_sweepservice.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module sweepservice.py
+
+import os
+import time
+import asyncio
+import tempfile
+import numpy as np
+
+# import module to test
+from elements import *
+from circuit import *
+from sweepservice import *
+
+sallenkey = """Vin  in  0   1
+R1   in  a   10k
+R2   a   b   10k
+C3   a   out 1n
+C4   b   0   1n
+E1   out 0   b  0  1
+"""
+
+# complex ndarray of a dict with real and imag lists
+def values( answer ):
+    return( np.array( answer["real"] ) + 1j * np.array( answer["imag"] ) )
+
+async def exercise():
+    service = Sweepservice( workers = 2, batchwindow = 0.01 )
+    port = await service.start( port = 0 )
+    print("service.start( port = 0 ) -> listening on 127.0.0.1 port", port > 0)
+
+    print("\nIdentical requests at the same time are evaluated once")
+    print("-"*30)
+    payload = { "element": "C", "value": "1n", "frequency": "log 1k 1M 1000" }
+    answers = await asyncio.gather( *[ request( payload, port = port ) for _ in range(50) ] )
+    print("50 identical requests, all status 200 ->", all( status == 200 for status, answer in answers ))
+    print("evaluations, coalesced ->", service.counters["evaluations"], service.counters["coalesced"])
+    Z = Capacitance("1n").getimpedance( np.geomspace( 1E3, 1E6, num = 1000 ) ).value
+    print("same as Capacitance('1n').getimpedance( f ) ->", np.allclose( values( answers[0][1]["impedance"] ), Z ))
+    status, answer = await request( payload, port = port )
+    print("the same request again comes from the LRU, cachehits ->", service.counters["cachehits"])
+
+    print("\nSmall requests are evaluated in batches")
+    print("-"*30)
+    requests = [ { "element": "L", "value": "500uH", "frequency": [ 1E3 * ( i + 1 ), 2E3 * ( i + 1 ) ] } for i in range(20) ] \
+        + [ { "element": "R", "value": "4k7", "frequency": [ 50, 60 ] } ]
+    before = dict( service.counters )
+    answers = await asyncio.gather( *[ request( r, port = port ) for r in requests ] )
+    print("21 different small requests, batches ->", service.counters["batches"] - before.get( "batches", 0 ), \
+        "evaluations of an element ->", service.counters["batchevaluations"] - before.get( "batchevaluations", 0 ))
+    print("every request gets its own impedances ->", all( np.allclose( values( answer["impedance"] ), \
+        Inductance("500uH").getimpedance( np.array( r["frequency"] ) ).value ) for r, (status, answer) in zip( requests[:20], answers ) ))
+    print("impedance of a Resistance ->", values( answers[-1][1]["impedance"] ))
+
+    print("\nCircuits are solved in the process pool")
+    print("-"*30)
+    payload = { "circuit": sallenkey, "frequency": "log 500 200k 30", "output": "out" }
+    answers = await asyncio.gather( *[ request( payload, port = port ) for _ in range(5) ] )
+    circuit, f, outputs = readcircuit( sallenkey.splitlines() + [ "frequency log 500 200k 30", "output out" ] )
+    H = circuit.acsweep( f ).voltage("out").value
+    print("V(out) same as Circuit.acsweep() ->", np.allclose( values( answers[0][1]["voltages"]["out"] ), H ))
+    print("offloaded, coalesced ->", service.counters["offloaded"], service.counters["coalesced"])
+
+    print("\nErrors")
+    print("-"*30)
+    for payload in ( { "element": "Q", "value": 1, "frequency": [1] }, { "circuit": "R1 in 0 1x", "frequency": [1], "output": "in" }, [ 1, 2 ] ):
+        print(f"{str( payload )[:50]} ->", await request( payload, port = port ))
+    payload = { "circuit": "Vin in 0 1\nR1 in out 0\nC1 out 0 1n", "frequency": "log 1 1k 3", "output": [ "out" ] }
+    print("circuit with a resistance of 0 Ohm ->", await request( payload, port = port ))
+    payload = { "element": "C", "value": "1n", "frequency": "log 1 1k 1e400" }
+    print("other errors are answered with status 500 ->", await request( payload, port = port ))
+    class Failing: # a value whose impedance raises an error the batch does not expect
+        def __rmul__( self, other ):
+            raise RuntimeError("failing value")
+    try:
+        await asyncio.wait_for( service.batched( Capacitance, Failing(), np.array( [ 1.0 ] ) ), 1 )
+    except RuntimeError as error:
+        print("an error in a batch is raised in every request of the group ->", error)
+    print("GET /sweep ->", await request( None, port = port, method = "GET" ))
+    print("POST /other ->", await request( {}, port = port, target = "/other" ))
+
+    print("\nMetrics")
+    print("-"*30)
+    status, metrics = await request( None, port = port, method = "GET", target = "/metrics" )
+    print("GET /metrics counters ->", metrics["counters"])
+    print("latency percentiles in ms ->", { name: value is not None and value >= 0 for name, value in metrics["latencyms"].items() })
+    print("queue depth now and largest ->", metrics["queuedepth"], metrics["maxqueuedepth"] > 0)
+    await service.close()
+
+    print("\nUnix socket")
+    print("-"*30)
+    path = os.path.join( tempfile.mkdtemp(), "sweeps.sock" )
+    service = Sweepservice()
+    await service.start( path = path )
+    status, answer = await request( { "element": "R", "value": "1k", "frequency": [ 1 ] }, path = path )
+    print("request over", os.path.basename( path ), "->", status, values( answer["impedance"] ))
+    await service.close()
+    os.remove( path )
+
+if __name__ != "__mp_main__": # worker processes only need the definitions above
+    print("Test of module sweepservice.py\n")
+    print("*"*40)
+    print("\n    S W E E P   S E R V I C E\n")
+    asyncio.run( exercise() )
+    print("\n ****** END ********************************************")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+#
+#  test_transfercompiler.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# this code performs tests on the module transfercompiler.py
+
+import time
+import numpy as np
+
+# import module to test
+from elements import *
+from transfercompiler import *
+print("Test of module transfercompiler.py\n")
+print("*"*40)
+print("\n    S A L L E N   K E Y\n")
+
+R1 = Resistance("10k")
+R2 = Resistance("10k")
+C3 = Capacitance("1nF")
+C4 = Capacitance("1nF")
+
+def Vout_divby_Vin( freq ):
+    Z1 = R1
+    Z2 = R2
+    Z3 = C3.getimpedance( freq )
+    Z4 = C4.getimpedance( freq )
+    numerator = Z3 * Z4
+    denominator = Z1 * Z2 + Z3 * (Z1 + Z2) + Z3 * Z4
+    return( numerator / denominator )
+
+print("Compiling the transferfunction")
+print("-"*30)
+H = compile_transfer( Vout_divby_Vin, [ R1, R2, C3, C4 ] )
+print("H = compile_transfer( Vout_divby_Vin, [ R1, R2, C3, C4 ] ) -> H:", H)
+print("H.source ->")
+print(H.source)
+print("R1 is restored after tracing -> R1:", R1, type(R1))
+
+print("\nComparing with np.vectorize")
+print("-"*30)
+f = np.geomspace(500, 200000, num=1000)
+Hvectorize = np.vectorize( Vout_divby_Vin )( f )
+print("largest difference ->", np.max( np.abs( H( f ) - Hvectorize ) ))
+print("H( f[:3], C3 = '2nF' ) ->", H( f[:3], C3 = '2nF' ))
+C3 = Capacitance('2nF')
+print("same as changing C3 ->", np.allclose( H( f[:3], C3 = '2nF' ), np.vectorize( Vout_divby_Vin )( f[:3] ) ))
+C3 = Capacitance("1nF")
+
+f = np.geomspace(1, 1E6, num=100000)
+start = time.perf_counter()
+np.vectorize( Vout_divby_Vin )( f )
+tvectorize = time.perf_counter() - start
+start = time.perf_counter()
+H( f )
+tcompiled = time.perf_counter() - start
+print(f"100000 points, np.vectorize: {tvectorize:.3f} s, compiled: {tcompiled:.5f} s")
+print(f"speedup -> {tvectorize / tcompiled:.0f}x")
+
+print("\n    R L C\n")
+
+R1 = Resistance("100k")
+R2 = Resistance(1)
+L1 = Inductance("500uH")
+C1 = Capacitance("5nF")
+
+def transferfunction( f ):
+    Zrl = R2 + L1.getimpedance( f )
+    Zparallel = Zrl.parallelwith( C1.getimpedance( f ) )
+    return( Zparallel / ( R1 + Zparallel ) )
+
+print("Compiling using all elements the function refers to")
+print("-"*30)
+H = compile_transfer( transferfunction )
+print("H = compile_transfer( transferfunction ) -> H:", H)
+print(H.source)
+f = np.arange(90000, 110000, 150)
+print("largest difference ->", np.max( np.abs( H( f ) - [ transferfunction( freq ) for freq in f ] ) ))
+
+print("\nA transferfunction returning an impedance returns an ImpedanceArray")
+print("-"*30)
+Z = compile_transfer( lambda f: Impedance.parallel( R2 + L1.getimpedance( f ), C1.getimpedance( f ) ) )
+print("Z( [ 1E3, 1E5 ] ) ->", Z( [ 1E3, 1E5 ] ))
+print("type( Z( [ 1E3, 1E5 ] ) ) ->", type( Z( [ 1E3, 1E5 ] ) ))
+
+print("\n ****** END ********************************************")
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+#
+#  transfercompiler.py
+#
+#  Copyright 2025 Nap0
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 2 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+# compiles a transferfunction written with the classes of elements.py
+# into one numpy function
+#
+# the transferfunction is called once with tracer objects standing in
+# for the elements and the frequency, every calculation done with them
+# is recorded in an expression graph
+# identical subexpressions are only recorded once
+# the graph is then written out as the source of a single python function
+# working on numpy arrays
+#
+# this module defines:
+#
+# class Tracegraph
+# class Tracer(ElectricalelementArray)
+# class CompiledTransfer
+# function compile_transfer(fn, elements = None)
+# function tracetransfer(fn, elements = None)
+# function extraparameters(fn)
+# function buildkernel(source, constants, name)
+
+import math
+import inspect
+import contextlib
+import numpy as np
+from elements import * # module containing classes for Resistance, Capacitance, ..
+
+
+# resulting kind of a product or quotient of two different kinds of elements
+productkinds = { (Current, Impedance): Voltage, (Impedance, Current): Voltage }
+quotientkinds = { (Voltage, Impedance): Current, (Voltage, Current): Impedance }
+
+# array class used to return a result of a given kind
+arrayclasses = { Impedance: ImpedanceArray, Voltage: VoltageArray, Current: CurrentArray }
+
+# python operators used in the generated source
+operatorsymbols = { "add": "+", "sub": "-", "mul": "*", "div": "/", "pow": "**" }
+
+
+# return the kind of an element, Resistance is a kind of Impedance
+def kindof(element):
+    for kind in (Impedance, Capacitance, Inductance, Voltage, Current):
+        if isinstance( element, kind ):
+            return( kind )
+    return( None )
+
+
+# ----------------------------------------------------------
+# class recording the nodes of an expression graph
+# ----------------------------------------------------------
+class Tracegraph:
+
+    def __init__(self):
+        self.nodes = [] # in order of creation which is also a valid order of evaluation
+        self.lookup = {} # identical subexpressions map to the same node
+
+    # return the node for an operation, creating it only if it does not exist yet
+    def node(self, op, args, kind):
+        keys = [ ("n", arg.index) if isinstance(arg, Tracer) else ("c", repr(arg)) for arg in args ]
+        if op in ("add", "mul", "parallel"): # commutative, order of the arguments does not matter
+            keys.sort()
+        key = ( op, tuple(keys), kind )
+        node = self.lookup.get( key )
+        if node is None:
+            node = Tracer( self, op, tuple(args), kind )
+            node.index = len( self.nodes )
+            self.nodes.append( node )
+            self.lookup[key] = node
+        return( node )
+
+    # return a constant node
+    def constant(self, value, kind = None):
+        return( self.node( "const", (value,), kind ) )
+
+    # convert an operand to a node, returns None if not possible
+    def operand(self, x):
+        if isinstance( x, Tracer ):
+            return( x )
+        elif isinstance( x, Electricalelement ):
+            return( self.constant( x.value, kindof(x) ) )
+        elif isinstance( x, (int, float, complex, np.number) ):
+            return( self.constant( x ) )
+        return( None )
+
+    # record a binary operation, the kinds of the operands follow the rules of elements.py
+    def binary(self, op, a, b):
+        a, b = self.operand(a), self.operand(b)
+        if a is None or b is None:
+            return( NotImplemented )
+        if op in ("add", "sub"):
+            if a.kind is not b.kind:
+                raise TypeError(f"Cannot {op} {a.kindname()} and {b.kindname()}")
+            kind = a.kind
+        elif op == "mul":
+            if a.kind is None or b.kind is None:
+                kind = a.kind or b.kind
+            elif a.kind is b.kind:
+                kind = None
+            elif (a.kind, b.kind) in productkinds:
+                kind = productkinds[ (a.kind, b.kind) ]
+            else:
+                raise TypeError(f"Cannot multiply {a.kindname()} with {b.kindname()}")
+        elif op == "div":
+            if b.kind is None:
+                kind = a.kind
+            elif a.kind is None or a.kind is b.kind:
+                kind = None
+            elif (a.kind, b.kind) in quotientkinds:
+                kind = quotientkinds[ (a.kind, b.kind) ]
+            else:
+                raise TypeError(f"Cannot divide {a.kindname()} by {b.kindname()}")
+        else:
+            if a.kind is not None or b.kind is not None:
+                raise TypeError(f"Cannot raise {a.kindname()} to {b.kindname()}")
+            kind = None
+        return( self.node( op, (a, b), kind ) )
+
+    # write the nodes needed for output as the source of a python function
+    # constants are passed in as names, the returned dict maps them on their values
+    # generated names start with an underscore so they cannot clash with element names
+    def source(self, output, parameters, name = "kernel"):
+        needed = set()
+        stack = [ output ]
+        while stack:
+            node = stack.pop()
+            if node.index not in needed:
+                needed.add( node.index )
+                stack.extend( arg for arg in node.args if isinstance(arg, Tracer) )
+        names = {}
+        constants = {}
+        lines = [ f"def {name}(_f, {', '.join(parameters)}):" ]
+        for node in self.nodes:
+            if node.index not in needed:
+                continue
+            args = [ names.get( arg.index ) for arg in node.args if isinstance(arg, Tracer) ]
+            if node.op == "freq":
+                names[node.index] = "_f"
+            elif node.op == "param":
+                names[node.index] = node.args[0]
+            elif node.op == "const":
+                names[node.index] = f"_c{len(constants)}"
+                constants[ names[node.index] ] = node.args[0]
+            elif node.op == "value":
+                names[node.index] = args[0]
+            else:
+                if node.op == "neg":
+                    expression = f"-{args[0]}"
+                elif node.op == "parallel":
+                    expression = "1 / (" + " + ".join( f"1 / {arg}" for arg in args ) + ")"
+                else:
+                    expression = f"{args[0]} {operatorsymbols[node.op]} {args[1]}"
+                names[node.index] = f"_t{node.index}"
+                lines.append( f"    _t{node.index} = {expression}" )
+        lines.append( f"    return {names[output.index]}" )
+        return( "\n".join(lines) + "\n", constants )
+
+
+# ----------------------------------------------------------
+# class for a node in the expression graph, it stands in for
+# an element or a number while the transferfunction is traced
+# ----------------------------------------------------------
+class Tracer(ElectricalelementArray):
+
+    def __init__(self, graph, op, args = (), kind = None):
+        self.graph = graph
+        self.op = op
+        self.args = args
+        self.kind = kind
+        self.index = -1
+
+    # return a machine readable representation of a Tracer
+    def __repr__(self):
+        return( f"Tracer({self.op}, {self.kindname()})" )
+
+    __str__ = __repr__
+
+    def kindname(self):
+        if self.kind is None:
+            return( "number" )
+        return( self.kind.__name__ )
+
+    # a tracer has no values, elements created inside the traced function
+    # end up here when they are used with the traced frequency
+    def __array__(self, dtype = None, copy = None):
+        raise TypeError("Cannot convert a Tracer to an array, pass all elements used to compile_transfer")
+
+    def __len__(self):
+        raise TypeError("A Tracer has no length")
+
+    # the value of an element is a plain number
+    @property
+    def value(self):
+        return( self.graph.node( "value", (self,), None ) )
+
+    def __neg__(self):
+        return( self.graph.node( "neg", (self,), self.kind ) )
+
+    def __add__(self, other):
+        return( self.graph.binary( "add", self, other ) )
+
+    def __radd__(self, other):
+        return( self.graph.binary( "add", other, self ) )
+
+    def __sub__(self, other):
+        return( self.graph.binary( "sub", self, other ) )
+
+    def __rsub__(self, other):
+        return( self.graph.binary( "sub", other, self ) )
+
+    def __mul__(self, other):
+        return( self.graph.binary( "mul", self, other ) )
+
+    def __rmul__(self, other):
+        return( self.graph.binary( "mul", other, self ) )
+
+    def __truediv__(self, other):
+        return( self.graph.binary( "div", self, other ) )
+
+    def __rtruediv__(self, other):
+        return( self.graph.binary( "div", other, self ) )
+
+    def __pow__(self, other):
+        return( self.graph.binary( "pow", self, other ) )
+
+    # impedance of a traced Capacitance or Inductance, same calculation as in elements.py
+    def getimpedance(self, frequency):
+        graph = self.graph
+        omega = graph.binary( "mul", 2.0 * math.pi, frequency )
+        x = graph.node( "mul", (omega, self.value), None )
+        if self.kind is Capacitance:
+            return( graph.node( "mul", (graph.constant(-1j), graph.binary( "div", 1, x )), Impedance ) )
+        elif self.kind is Inductance:
+            return( graph.node( "mul", (graph.constant(1j), x), Impedance ) )
+        raise TypeError(f"Cannot get the impedance of a {self.kindname()}")
+
+    # parallel impedances or inductances, series capacitances
+    def parallelwith(self, *others):
+        return( Tracer.parallel( self, *others ) )
+
+    def serieswith(self, *others):
+        return( Tracer.series( self, *others ) )
+
+    @staticmethod
+    def parallel(*elements):
+        return( Tracer.reciprocalsum( elements ) )
+
+    @staticmethod
+    def series(*elements):
+        return( Tracer.reciprocalsum( elements ) )
+
+    # 1 / (1 / x1 + 1 / x2 + ...) of elements of the same kind
+    @staticmethod
+    def reciprocalsum(elements):
+        graph = next( x.graph for x in elements if isinstance(x, Tracer) )
+        nodes = [ graph.operand(x) for x in elements ]
+        kinds = set( node.kind for node in nodes )
+        if len( kinds ) != 1:
+            raise TypeError("Cannot combine elements of a different kind")
+        return( graph.node( "parallel", tuple(nodes), kinds.pop() ) )
+
+
+# ----------------------------------------------------------
+# class for a compiled transferfunction
+# calling it with an array of frequencies returns an array of results,
+# element values can be changed by name without compiling again
+# ----------------------------------------------------------
+class CompiledTransfer:
+
+    def __init__(self, kernel, source, constants, defaults, kinds, resultkind, nodecount):
+        self.kernel = kernel
+        self.source = source # source of the generated numpy function
+        self.constants = constants # values of the constants used in the source
+        self.defaults = defaults # element values at the time of compiling
+        self.kinds = kinds # kind of each element
+        self.resultkind = resultkind
+        self.nodecount = nodecount # number of unique nodes recorded while tracing
+
+    # return a machine readable representation of a CompiledTransfer
+    def __repr__(self):
+        return( f"CompiledTransfer({', '.join(self.defaults)})" )
+
+    # the generated kernel cannot be pickled, it is compiled again from its source
+    # so a CompiledTransfer can be sent to worker processes
+    def __getstate__(self):
+        state = dict( self.__dict__ )
+        del state["kernel"]
+        return( state )
+    
+    def __setstate__(self, state):
+        self.__dict__.update( state )
+        self.kernel = buildkernel( self.source, self.constants, self.kernelname )
+    
+    # name of the generated function
+    @property
+    def kernelname(self):
+        return( self.source[ len("def "):self.source.index("(") ] )
+
+    # evaluate for an array of frequencies, element values given by name
+    # can be numbers, numpy arrays, strings with metric prefix or elements
+    def __call__(self, frequency, **values):
+        arguments = dict( self.defaults )
+        for name, value in values.items():
+            if name not in arguments:
+                raise TypeError(f"Transferfunction has no element named {name}")
+            if isinstance( value, (Electricalelement, ElectricalelementArray) ):
+                value = value.value
+            elif isinstance( value, str ):
+                value = Electricalelement.metricprefixtofloat( value )
+            arguments[name] = value
+        f = np.asarray( frequency, dtype=float )
+        result = np.asarray( self.kernel( f, **arguments ), dtype=complex )
+        if result.shape != f.shape: # parts not depending on frequency
+            result = np.broadcast_to( result, np.broadcast_shapes( result.shape, f.shape ) ).copy()
+        if self.resultkind in arrayclasses:
+            return( arrayclasses[self.resultkind]( result ) )
+        return( result )
+
+
+# find the names the function uses for the elements
+# elements can be a dict of names and elements, a list of elements,
+# or None to use all elements the function refers to
+def elementnames(fn, elements):
+    if isinstance( elements, dict ):
+        return( dict( elements ) )
+    closure = dict( zip( fn.__code__.co_freevars, [ cell.cell_contents for cell in fn.__closure__ or () ] ) )
+    referred = dict( closure )
+    for name in fn.__code__.co_names:
+        if name in fn.__globals__ and name not in referred:
+            referred[name] = fn.__globals__[name]
+    if elements is None:
+        return( { name: x for name, x in referred.items() if isinstance(x, Electricalelement) } )
+    names = {}
+    for element in elements:
+        found = [ name for name, x in referred.items() if x is element ]
+        if not found:
+            raise ValueError(f"{element!r} is not used by {fn.__name__}")
+        names[ found[0] ] = element
+    return( names )
+
+
+# temporarily replace the elements used by the function with stand-ins
+@contextlib.contextmanager
+def standins(fn, replacements):
+    cells = dict( zip( fn.__code__.co_freevars, fn.__closure__ or () ) )
+    saved = {}
+    try:
+        for name, replacement in replacements.items():
+            if name in cells:
+                saved[name] = cells[name].cell_contents
+                cells[name].cell_contents = replacement
+            else:
+                saved[name] = fn.__globals__[name]
+                fn.__globals__[name] = replacement
+        yield
+    finally:
+        for name, original in saved.items():
+            if name in cells:
+                cells[name].cell_contents = original
+            else:
+                fn.__globals__[name] = original
+
+
+# compile a transferfunction fn( frequency ) using elements into a CompiledTransfer
+# the elements are replaced by tracers while fn is called once,
+# this is not thread safe as the globals of fn are changed during the call
+# further arguments of fn with a default, for instance fn( frequency, temperature = 25 ),
+# are traced as plain numbers and can be given by name like the elements
+def compile_transfer(fn, elements = None):
+    graph, output, defaults, kinds = tracetransfer( fn, elements )
+    name = fn.__name__ if fn.__name__.isidentifier() else "kernel"
+    source, constants = graph.source( output, list(defaults), name )
+    kernel = buildkernel( source, constants, name )
+    return( CompiledTransfer( kernel, source, constants, defaults, kinds, output.kind, len(graph.nodes) ) )
+
+
+# call fn once with tracers, returns the Tracegraph, the output node and
+# the values and kinds of the elements and further arguments by name
+def tracetransfer(fn, elements = None):
+    names = elementnames( fn, elements )
+    parameters = extraparameters( fn )
+    graph = Tracegraph()
+    frequency = graph.node( "freq", (), None )
+    replacements = { name: graph.node( "param", (name,), kindof(x) ) for name, x in names.items() }
+    arguments = { name: graph.node( "param", (name,), None ) for name in parameters }
+    with standins( fn, replacements ):
+        result = fn( frequency, **arguments )
+    output = graph.operand( result )
+    if output is None:
+        raise TypeError(f"Cannot compile a transferfunction returning a {type(result)}")
+    defaults = { name: x.value for name, x in names.items() }
+    defaults.update( parameters )
+    kinds = { name: kindof(x) for name, x in names.items() }
+    kinds.update( dict.fromkeys( parameters ) )
+    return( graph, output, defaults, kinds )
+
+
+# return the arguments of fn after the frequency with their default values
+def extraparameters(fn):
+    parameters = {}
+    for parameter in list( inspect.signature( fn ).parameters.values() )[1:]:
+        if parameter.default is inspect.Parameter.empty:
+            raise TypeError(f"Argument {parameter.name} of {fn.__name__} needs a default value")
+        parameters[parameter.name] = parameter.default
+    return( parameters )
+
+# compile the generated source and return the function named name
+def buildkernel(source, constants, name):
+    namespace = dict( constants )
+    exec( compile( source, f"<compiled {name}>", "exec" ), namespace )
+    return( namespace[name] )
+
+
+# --- tests --------------------------
+if __name__ == "__main__":
+    import test_transfercompiler